@@ -0,0 +1,341 @@
+"""Offline benchmark of the scraper against the local stand-in of the website.
+
+Run it from the root of the repository:
+
+    python benchmarks/benchmark.py --users 8 --output benchmarks/results/baseline.json
+    python benchmarks/benchmark.py --compare benchmarks/results/baseline.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCHMARKS)
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, BENCHMARKS)
+
+from fake_site import FakeSite, read_fixture, redirect_session  # noqa: E402
+
+SITE_URL = "https://balme.ug.edu.gh"
+LOGIN_URL = SITE_URL + "/past.exampapers/index.php?p=member"
+
+QUERY = "MATH 121"
+Timings = Dict[str, List[float]]
+
+
+def summarise(samples: List[float]) -> Dict[str, float]:
+    """It summarises latencies in seconds.
+
+    Args:
+      samples (List[float]): The latencies.
+
+    Returns:
+      The count, mean, median, 95th percentile and maximum.
+    """
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean": statistics.fmean(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1],
+    }
+
+
+def timed_call(timings: Timings, stage: str, function: Callable, *args):
+    """Calls function and appends its latency to the stage."""
+    start = time.perf_counter()
+    result = function(*args)
+    timings.setdefault(stage, []).append(time.perf_counter() - start)
+    return result
+
+
+class Benchmark:
+    """Runs the scenarios against a FakeSite and collects their results."""
+
+    def __init__(self, site: FakeSite, download_directory: str):
+        self.site = site
+        self.download_directory = download_directory
+        self._upstream = None
+
+    def new_scraper(self, pool_size: int = 10):
+        """Creates a scraper whose requests go to the stand-in."""
+        from http_scraper import HttpScraper, create_session
+        from upstream import TokenBucket, Upstream
+
+        if self._upstream is None:
+            # Shared by every scraper, with a rate limit high enough to measure the scraper itself.
+            self._upstream = Upstream(TokenBucket(rate=1e6, burst=10**6))
+
+        session = redirect_session(
+            create_session(pool_size), SITE_URL, self.site.url, pool_size
+        )
+        scraper = HttpScraper(session=session, upstream=self._upstream)
+        scraper.path = self.download_directory
+        return scraper
+
+    def user_session(self, scraper, timings: Timings, choice: int = 0) -> None:
+        """One user searching for a past question and downloading one of the results."""
+        start = time.perf_counter()
+        past_question_records = timed_call(timings, "search", scraper.search, QUERY)
+        if not past_question_records:
+            raise RuntimeError("The search returned no past questions.")
+        user_file = timed_call(
+            timings,
+            "download",
+            scraper.download_past_question,
+            past_question_records[choice % len(past_question_records)].link,
+        )
+        if user_file is None:
+            raise RuntimeError("The past question could not be downloaded.")
+        os.remove(user_file)
+        timings.setdefault("end_to_end", []).append(time.perf_counter() - start)
+
+    def stages(self, iterations: int) -> Dict[str, Dict[str, float]]:
+        """It measures the latency of each stage for a single user.
+
+        Args:
+          iterations (int): The number of times each stage is run.
+
+        Returns:
+          The summary of each stage.
+        """
+        from page_parser import parse_past_question_records
+
+        timings: Timings = {}
+        results_page = read_fixture("results_page_1.html")
+        for _ in range(iterations):
+            scraper = self.new_scraper()
+            if not timed_call(timings, "login", scraper.login):
+                raise RuntimeError("Could not log in to the stand-in.")
+            timed_call(timings, "parse", parse_past_question_records, results_page)
+            self.user_session(scraper, timings)
+        return {stage: summarise(samples) for stage, samples in timings.items()}
+
+    def throughput(self, users: int, sessions_per_user: int) -> Dict[str, float]:
+        """It runs concurrent users and measures how many searches and downloads complete per second.
+
+        Args:
+          users (int): The number of simulated users at once.
+          sessions_per_user (int): The number of searches and downloads each user makes.
+
+        Returns:
+          The sessions per second and the summary of the end to end latency.
+        """
+        scraper = self.new_scraper()
+        # Every user fetches the pages of its results over its own connections.
+        redirect_session(
+            scraper.session, SITE_URL, self.site.url, users * scraper.max_workers
+        )
+        if not scraper.login():
+            raise RuntimeError("Could not log in to the stand-in.")
+        timings: List[Timings] = [{} for _ in range(users)]
+
+        def run_user(user: int) -> None:
+            # Users at the same step download different files.
+            for session in range(sessions_per_user):
+                self.user_session(scraper, timings[user], user + session * users)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=users) as executor:
+            list(executor.map(run_user, range(users)))
+        elapsed = time.perf_counter() - start
+
+        latencies = [
+            latency for user_timings in timings for latency in user_timings["end_to_end"]
+        ]
+        return {
+            "users": users,
+            "sessions": len(latencies),
+            "seconds": elapsed,
+            "sessions_per_second": len(latencies) / elapsed,
+            "end_to_end": summarise(latencies),
+        }
+
+    def memory(self, users: int) -> int:
+        """It measures the peak memory allocated by python while users search and download at once.
+
+        Tracing allocations slows everything down, so it gets its own run.
+
+        Args:
+          users (int): The number of simulated users at once.
+
+        Returns:
+          The peak in bytes.
+        """
+        tracemalloc.start()
+        try:
+            self.throughput(users, 1)
+            _, peak_traced = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return peak_traced
+
+
+def peak_rss_mb() -> float:
+    """Returns the peak resident memory of the process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def git_commit() -> Optional[str]:
+    """Returns the commit being benchmarked."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(
+    iterations: int = 20,
+    users: int = 8,
+    sessions_per_user: int = 5,
+    latency: float = 0.0,
+    pdf_size: int = 512 * 1024,
+) -> Dict:
+    """It runs every scenario against a fresh stand-in of the website.
+
+    Args:
+      iterations (int): The number of single user runs measuring each stage.
+      users (int): The number of concurrent users of the throughput run.
+      sessions_per_user (int): The number of searches and downloads each concurrent user makes.
+      latency (float): Seconds the stand-in waits before each response.
+      pdf_size (int): The size in bytes of the served files.
+
+    Returns:
+      The results, ready to be saved as json.
+    """
+    with FakeSite(latency=latency, pdf_size=pdf_size) as site, tempfile.TemporaryDirectory() as download_directory:
+        benchmark = Benchmark(site, download_directory)
+        stages = benchmark.stages(iterations)
+        throughput = benchmark.throughput(users, sessions_per_user)
+        peak_traced = benchmark.memory(users)
+        site_requests = site.requests
+
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "config": {
+            "iterations": iterations,
+            "users": users,
+            "sessions_per_user": sessions_per_user,
+            "latency": latency,
+            "pdf_size": pdf_size,
+        },
+        "stages": stages,
+        "throughput": throughput,
+        "memory": {
+            "peak_python_mb": peak_traced / (1024 * 1024),
+            "peak_rss_mb": peak_rss_mb(),
+        },
+        "site_requests": site_requests,
+    }
+
+
+def compare(baseline: Dict, current: Dict, tolerance: float = 0.2) -> List[str]:
+    """It lists the measurements that got worse than the baseline by more than the tolerance.
+
+    Args:
+      baseline (Dict): Results of an earlier run.
+      current (Dict): Results of this run.
+      tolerance (float): The relative slowdown allowed, 0.2 for 20%.
+
+    Returns:
+      A line describing each regression.
+    """
+    regressions = []
+    for stage, summary in current["stages"].items():
+        before = baseline.get("stages", {}).get(stage)
+        if before and summary["p50"] > before["p50"] * (1 + tolerance):
+            regressions.append(
+                f"{stage} p50 went from {before['p50'] * 1000:.1f}ms to {summary['p50'] * 1000:.1f}ms"
+            )
+    before = baseline.get("throughput", {}).get("sessions_per_second")
+    after = current["throughput"]["sessions_per_second"]
+    if before and after < before / (1 + tolerance):
+        regressions.append(f"throughput went from {before:.1f}/s to {after:.1f}/s")
+    before = baseline.get("memory", {}).get("peak_python_mb")
+    after = current["memory"]["peak_python_mb"]
+    if before and after > before * (1 + tolerance):
+        regressions.append(f"peak python memory went from {before:.1f}MB to {after:.1f}MB")
+    return regressions
+
+
+def print_results(results: Dict) -> None:
+    """Prints a short table of the results."""
+    print(f"{'stage':<12}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for stage, summary in results["stages"].items():
+        print(
+            f"{stage:<12}{summary['p50'] * 1000:>10.1f}"
+            f"{summary['p95'] * 1000:>10.1f}{summary['max'] * 1000:>10.1f}"
+        )
+    throughput = results["throughput"]
+    print(
+        f"{throughput['users']} users: {throughput['sessions_per_second']:.1f} sessions/s, "
+        f"p95 {throughput['end_to_end']['p95'] * 1000:.1f}ms"
+    )
+    memory = results["memory"]
+    print(
+        f"memory: {memory['peak_python_mb']:.1f}MB python peak, {memory['peak_rss_mb']:.1f}MB rss peak"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--sessions-per-user", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per response")
+    parser.add_argument("--pdf-size", type=int, default=512 * 1024, help="bytes")
+    parser.add_argument("--output", help="where to save the results as json")
+    parser.add_argument("--compare", help="results of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+    # The scraper reads its login url and credentials when it is imported.
+    os.environ["URL"] = LOGIN_URL
+    os.environ.setdefault("USER_NAME", "10000000")
+    os.environ.setdefault("PASSWORD", "benchmark")
+    # The scraper logs every request, which would only measure the console.
+    logging.disable(logging.INFO)
+
+    results = run(
+        args.iterations, args.users, args.sessions_per_user, args.latency, args.pdf_size
+    )
+    print_results(results)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(json.load(file), results, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
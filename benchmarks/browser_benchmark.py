@@ -0,0 +1,155 @@
+"""Compare the memory and time of the default and lean browser profiles against the local stand-in.
+
+It needs Chrome. Run it from the root of the repository:
+
+    python benchmarks/browser_benchmark.py --iterations 5 --output benchmarks/results/browser.json
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCHMARKS), "src"))
+sys.path.insert(0, BENCHMARKS)
+
+from benchmark import Timings, git_commit, summarise, timed_call  # noqa: E402
+from fake_site import SITE_PATH, FakeSite  # noqa: E402
+
+QUERY = "MATH 121"
+
+
+def process_tree_rss_mb(pid: int) -> float:
+    """It adds up the resident memory of a process and all its descendants, read from /proc.
+
+    Args:
+      pid (int): The root process, like chromedriver.
+
+    Returns:
+      The memory in MB, 0 where /proc isn't available.
+    """
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc") if os.path.isdir("/proc") else []:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as file:
+                # The command name may contain spaces, the parent pid follows its closing parenthesis.
+                parent = int(file.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(parent, []).append(int(entry))
+
+    rss_kb = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        pending.extend(children.get(current, []))
+        try:
+            with open(f"/proc/{current}/status") as file:
+                for line in file:
+                    if line.startswith("VmRSS:"):
+                        rss_kb += int(line.split()[1])
+        except OSError:
+            continue
+    return rss_kb / 1024
+
+
+def measure(lean: bool, site: FakeSite, iterations: int) -> Dict:
+    """It starts a browser in one profile, logs in, searches and reloads the results pages.
+
+    Args:
+      lean (bool): Use the lean profile.
+      site (FakeSite): The running stand-in.
+      iterations (int): The number of searches and page loads.
+
+    Returns:
+      The summary of each stage and the memory of the browser.
+    """
+    from functions import Functions
+
+    timings: Timings = {}
+    scraper = Functions(lazy=True, lean=lean)
+    try:
+        timed_call(timings, "start_browser", lambda: scraper.driver)
+        if not timed_call(timings, "login", scraper.login):
+            raise RuntimeError("Could not log in to the stand-in.")
+        for iteration in range(iterations):
+            scraper.driver.get(site.url + SITE_PATH + "?p=member")
+            timed_call(timings, "search", scraper.search_for_past_question, QUERY)
+            page = iteration % 3 + 1
+            timed_call(
+                timings,
+                "page_load",
+                scraper.driver.get,
+                f"{site.url}{SITE_PATH}?keywords=&search=search&page={page}",
+            )
+        memory = process_tree_rss_mb(scraper.driver.service.process.pid)
+    finally:
+        scraper.quit()
+
+    return {
+        "stages": {stage: summarise(samples) for stage, samples in timings.items()},
+        "browser_rss_mb": memory,
+    }
+
+
+def savings(default: Dict, lean: Dict) -> Dict[str, float]:
+    """It returns how much less memory and time the lean profile used, in percent."""
+    saved = {}
+    if default["browser_rss_mb"]:
+        saved["browser_rss"] = 100 * (1 - lean["browser_rss_mb"] / default["browser_rss_mb"])
+    for stage, summary in default["stages"].items():
+        if summary["p50"]:
+            saved[stage] = 100 * (1 - lean["stages"][stage]["p50"] / summary["p50"])
+    return saved
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per response")
+    parser.add_argument("--output", help="where to save the results as json")
+    args = parser.parse_args(argv)
+    logging.disable(logging.INFO)
+
+    with FakeSite(latency=args.latency) as site:
+        # The browser logs in at URL, which functions reads when it is imported.
+        os.environ["URL"] = site.url + SITE_PATH + "?p=member"
+        os.environ.setdefault("USER_NAME", "10000000")
+        os.environ.setdefault("PASSWORD", "benchmark")
+        default = measure(False, site, args.iterations)
+        lean = measure(True, site, args.iterations)
+
+    results = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "config": {"iterations": args.iterations, "latency": args.latency},
+        "default": default,
+        "lean": lean,
+        "saved_percent": savings(default, lean),
+    }
+    print(f"{'':<14}{'default':>10}{'lean':>10}{'saved':>8}")
+    print(
+        f"{'browser MB':<14}{default['browser_rss_mb']:>10.1f}{lean['browser_rss_mb']:>10.1f}"
+        f"{results['saved_percent'].get('browser_rss', 0):>7.0f}%"
+    )
+    for stage, summary in default["stages"].items():
+        print(
+            f"{stage + ' ms':<14}{summary['p50'] * 1000:>10.1f}"
+            f"{lean['stages'][stage]['p50'] * 1000:>10.1f}"
+            f"{results['saved_percent'].get(stage, 0):>7.0f}%"
+        )
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""Local stand-in of the past questions website serving recorded pages."""
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+SITE_PATH = "/past.exampapers/index.php"
+SESSION_COOKIE = "SENAYAN_MEMBER"
+# Assets linked by the pages, served as filler of a realistic size.
+ASSETS = {
+    ".css": ("text/css", 40 * 1024),
+    ".js": ("application/javascript", 90 * 1024),
+    ".png": ("image/png", 60 * 1024),
+    ".woff2": ("font/woff2", 30 * 1024),
+}
+
+
+def read_fixture(name: str) -> bytes:
+    """Returns the content of a recorded page."""
+    with open(os.path.join(FIXTURES, name), "rb") as file:
+        return file.read()
+
+
+class FakeSite:
+    """Serves the login, search, results, detail, popup and file pages of the website from the fixtures.
+
+    Like on the real website anyone can search, but the detail pages and
+    files need the cookie set by logging in.
+    """
+
+    def __init__(self, latency: float = 0.0, pdf_size: int = 512 * 1024, port: int = 0):
+        """Loads the fixtures without starting the server.
+
+        Args:
+          latency (float): Seconds added to every response to mimic the network.
+          pdf_size (int): The size in bytes of the served past question files.
+          port (int): The port to listen on, 0 picks a free one.
+        """
+        self.latency = latency
+        self.port = port
+        self.pages: Dict[str, bytes] = {
+            name: read_fixture(name)
+            for name in sorted(os.listdir(FIXTURES))
+            if name.endswith(".html")
+        }
+        pdf = read_fixture("past_question.pdf")
+        # Comment lines after the end of file marker make the file as large as a scanned paper.
+        padding = max(0, pdf_size - len(pdf))
+        self.pdf = pdf + b"%" + b"0" * max(0, padding - 2) + b"\n" if padding else pdf
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        """The base url of the running server."""
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self) -> "FakeSite":
+        """Starts serving from a background thread."""
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately, Nagle would hold the body back.
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                site._handle(self, "GET")
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                site._handle(self, "POST")
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(
+            target=self._server.serve_forever, name="fake-site", daemon=True
+        ).start()
+        return self
+
+    def stop(self) -> None:
+        """Stops the server."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeSite":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _handle(self, handler: BaseHTTPRequestHandler, method: str) -> None:
+        """Routes a request to a recorded page."""
+        with self._lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        parsed_url = urlparse(handler.path)
+        query = {key: values[0] for key, values in parse_qs(parsed_url.query).items()}
+        logged_in = SESSION_COOKIE in (handler.headers.get("Cookie") or "")
+        headers = {}
+        content_type = "text/html; charset=UTF-8"
+
+        extension = os.path.splitext(parsed_url.path)[1]
+        if extension in ASSETS:
+            content_type, size = ASSETS[extension]
+            status, body = 200, b" " * size
+        elif parsed_url.path != SITE_PATH:
+            status, body = 404, b"Not found"
+        elif query.get("p") == "member" and method == "POST":
+            status, body = 200, self.pages["member.html"]
+            headers["Set-Cookie"] = f"{SESSION_COOKIE}=benchmark; Path=/"
+        elif "search" in query:
+            page = query.get("page", "1")
+            status, body = 200, self.pages.get(f"results_page_{page}.html", b"")
+        elif query.get("p") == "member" or not logged_in:
+            status, body = 200, self.pages["login.html"]
+        elif query.get("p") == "show_detail":
+            status, body = 200, self._fill("detail.html", query.get("id", ""))
+        elif query.get("p") == "fstream":
+            status, body = 200, self._fill("viewer.html", query.get("bid", ""))
+        elif query.get("p") == "fstream-pdf":
+            status, body, content_type = 200, self.pdf, "application/pdf"
+        else:
+            status, body = 200, self.pages["member.html"]
+
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _fill(self, name: str, record_id: str) -> bytes:
+        """Returns a recorded page with the record id of the request."""
+        return self.pages[name].replace(b"{record_id}", record_id.encode())
+
+
+class RedirectAdapter(HTTPAdapter):
+    """Sends the requests made to the real website to the local stand-in instead."""
+
+    def __init__(self, site_url: str, local_url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.site_url = site_url
+        self.local_url = local_url
+
+    def send(self, request, **kwargs):
+        if not request.url.startswith(self.site_url):
+            return super().send(request, **kwargs)
+        local_request = request.copy()
+        local_request.url = self.local_url + request.url[len(self.site_url) :]
+        response = super().send(local_request, **kwargs)
+        # The scraper keeps seeing the website's urls, so its cookies and links still match.
+        response.url = request.url
+        response.request = request
+        return response
+
+
+def redirect_session(
+    session: requests.Session, site_url: str, local_url: str, pool_size: int = 10
+) -> requests.Session:
+    """It makes a session send the requests meant for the website to the stand-in.
+
+    Args:
+      session (requests.Session): The session of a scraper.
+      site_url (str): The url of the real website.
+      local_url (str): The url of the running FakeSite.
+      pool_size (int): The number of connections kept open to the stand-in.
+
+    Returns:
+      The same session.
+    """
+    session.mount(
+        site_url,
+        RedirectAdapter(site_url, local_url, pool_connections=1, pool_maxsize=pool_size),
+    )
+    return session
@@ -0,0 +1,108 @@
+"""Download many past questions at once."""
+import logging
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Generator, Iterable, Optional
+
+from session_pool import SessionPool
+
+logger = logging.getLogger(__name__)
+
+Download = Callable[[str], Optional[str]]
+Progress = Callable[[int, int, str, Optional[str]], None]
+
+
+def download_with_retries(
+    download: Download, past_question_link: str, retries: int = 2, backoff: float = 1.0
+) -> Optional[str]:
+    """It downloads a past question, trying again with a growing, jittered wait when it fails.
+
+    Args:
+      download (Download): Downloads a detail link and returns the file path, or None on failure.
+      past_question_link (str): The link to the past question detail page.
+      retries (int): The number of extra attempts.
+      backoff (float): Seconds waited before the first retry, doubled on each retry.
+
+    Returns:
+      The path of the downloaded file, or None if every attempt failed.
+    """
+    for attempt in range(retries + 1):
+        try:
+            user_file = download(past_question_link)
+            if user_file is not None:
+                return user_file
+        except Exception:
+            logger.exception(f"Attempt {attempt + 1} to download {past_question_link} failed.")
+        if attempt < retries:
+            time.sleep(backoff * 2**attempt * random.uniform(0.5, 1.5))
+    return None
+
+
+def download_all(
+    past_question_links: Iterable[str],
+    download: Download,
+    max_workers: int = 4,
+    retries: int = 0,
+    backoff: float = 1.0,
+    progress: Optional[Progress] = None,
+) -> Generator[str, None, None]:
+    """It downloads past questions concurrently and yields each file as soon as it is ready.
+
+    Args:
+      past_question_links (Iterable[str]): The links to the past question detail pages.
+      download (Download): Downloads a detail link and returns the file path, must be safe to call from several threads.
+      max_workers (int): The maximum number of downloads at once.
+      retries (int): The number of extra attempts for each past question, none by default as the scrapers' Upstream already retries transient failures.
+      backoff (float): Seconds waited before the first retry.
+      progress (Optional[Progress]): Called with the number done, the total, the link and its file, or None if it failed.
+
+    Returns:
+      The path of each downloaded file in the order they complete.
+    """
+    past_question_links = list(past_question_links)
+    total = len(past_question_links)
+    if total == 0:
+        return
+
+    done = 0
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, total))
+    try:
+        pending: Dict[Future, str] = {
+            executor.submit(
+                download_with_retries, download, past_question_link, retries, backoff
+            ): past_question_link
+            for past_question_link in past_question_links
+        }
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                past_question_link = pending.pop(future)
+                user_file = future.result()
+                done += 1
+                if progress is not None:
+                    progress(done, total, past_question_link, user_file)
+                if user_file is None:
+                    logger.error(f"Gave up downloading {past_question_link}")
+                    continue
+                yield user_file
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    logger.info(f"Finished {done} of {total} downloads.")
+
+
+def browser_download(pool: SessionPool) -> Download:
+    """It returns a download function that leases a browser from the pool for each past question.
+
+    Args:
+      pool (SessionPool): The browsers shared by the downloads.
+
+    Returns:
+      A function suitable for download_all.
+    """
+
+    def download(past_question_link: str) -> Optional[str]:
+        with pool.lease() as browser:
+            return browser.get_past_question_file(past_question_link)
+
+    return download
@@ -0,0 +1,169 @@
+"""Offline index of every past question in the library catalogue."""
+import logging
+import sqlite3
+import threading
+import time
+from typing import Callable, Iterable, List, Optional
+
+from page_parser import parse_next_page_url, parse_past_question_records
+from records import PastQuestionRecord, get_course_code
+from search_cache import normalise_query
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogueIndex:
+    """Sqlite index of past question records, searchable by course code or full text."""
+
+    def __init__(self, path: str = "catalogue.sqlite3"):
+        """Creates the tables if needed.
+
+        Args:
+          path (str): The database file, ":memory:" keeps the index in memory.
+        """
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS records ("
+                "record_id TEXT PRIMARY KEY, course_code TEXT, title TEXT, "
+                "year TEXT, semester TEXT, link TEXT, crawled_at REAL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS records_course_code "
+                "ON records (course_code)"
+            )
+            self._connection.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS records_fts "
+                "USING fts5(record_id UNINDEXED, title)"
+            )
+
+    def __len__(self) -> int:
+        """The number of records in the index."""
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def upsert(self, records: Iterable[PastQuestionRecord]) -> int:
+        """It adds new records and updates changed ones.
+
+        Args:
+          records (Iterable[PastQuestionRecord]): Records parsed from a results page.
+
+        Returns:
+          The number of records that were new or changed.
+        """
+        changed = 0
+        now = time.time()
+        with self._lock, self._connection:
+            for record in records:
+                record_id = record.record_id
+                if record_id is None:
+                    continue
+                row = (record.title, record.year, record.semester, record.link)
+                existing = self._connection.execute(
+                    "SELECT title, year, semester, link FROM records WHERE record_id = ?",
+                    (record_id,),
+                ).fetchone()
+                if existing == row:
+                    continue
+                changed += 1
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (record_id, record.course_code, *row, now),
+                )
+                self._connection.execute(
+                    "DELETE FROM records_fts WHERE record_id = ?", (record_id,)
+                )
+                self._connection.execute(
+                    "INSERT INTO records_fts VALUES (?, ?)", (record_id, record.title)
+                )
+        return changed
+
+    def search(self, query: str) -> List[PastQuestionRecord]:
+        """It answers a query from the index, by course code when the query is one and by full text otherwise.
+
+        Args:
+          query (str): The query typed by the user.
+
+        Returns:
+          The matching records, most recent year first.
+        """
+        cleaned_query = normalise_query(query)
+        course_code = get_course_code(cleaned_query)
+        with self._lock:
+            if course_code == cleaned_query:
+                rows = self._connection.execute(
+                    "SELECT title, year, semester, link, record_id, course_code "
+                    "FROM records WHERE course_code = ? ORDER BY year DESC, title",
+                    (course_code,),
+                ).fetchall()
+            else:
+                # Every word is quoted so user input can't be read as fts syntax.
+                fts_query = " ".join(
+                    '"' + word.replace('"', '""') + '"' for word in cleaned_query.split()
+                )
+                if not fts_query:
+                    return []
+                rows = self._connection.execute(
+                    "SELECT records.title, records.year, records.semester, records.link, "
+                    "records.record_id, records.course_code "
+                    "FROM records_fts JOIN records USING (record_id) "
+                    "WHERE records_fts MATCH ? ORDER BY records.year DESC, records.title",
+                    (fts_query,),
+                ).fetchall()
+        return [PastQuestionRecord(*row) for row in rows]
+
+
+class CatalogueCrawler:
+    """Walks every page of the catalogue and stores its records in a CatalogueIndex."""
+
+    def __init__(
+        self,
+        index: CatalogueIndex,
+        fetch: Callable[[str], bytes],
+        start_url: str,
+    ):
+        """Initializes the crawler.
+
+        Args:
+          index (CatalogueIndex): Where the records are stored.
+          fetch (Callable[[str], bytes]): Returns the html of a url, like lambda url: scraper.fetch(url).content.
+          start_url (str): The first page of the catalogue, like an empty search.
+        """
+        self.index = index
+        self.fetch = fetch
+        self.start_url = start_url
+
+    def crawl(self, incremental: bool = True, max_pages: Optional[int] = None) -> int:
+        """It follows the next page links from the start url and indexes every record.
+
+        Args:
+          incremental (bool): Stop at the first page with nothing new, as newer records are listed first.
+          max_pages (Optional[int]): The maximum number of pages to visit.
+
+        Returns:
+          The number of records that were new or changed.
+        """
+        page_url: Optional[str] = self.start_url
+        visited = set()
+        changed = 0
+        while page_url is not None and page_url not in visited:
+            if max_pages is not None and len(visited) >= max_pages:
+                break
+            visited.add(page_url)
+            try:
+                page_content = self.fetch(page_url)
+            except Exception:
+                logger.exception(f"Failed to crawl {page_url}")
+                break
+
+            page_changed = self.index.upsert(parse_past_question_records(page_content))
+            changed += page_changed
+            if incremental and page_changed == 0:
+                break
+            page_url = parse_next_page_url(page_content, page_url)
+
+        logger.info(
+            f"Crawled {len(visited)} pages of the catalogue, {changed} records were new or changed."
+        )
+        return changed
@@ -0,0 +1,93 @@
+"""Each chat's last search results, so a choice resolves to a link without searching again."""
+import logging
+import time
+from typing import Dict, List, Optional
+
+from records import PastQuestionRecord
+from search_cache import MemoryBackend, SqliteBackend
+
+logger = logging.getLogger(__name__)
+
+
+class ChatStateStore:
+    """Keeps the results last shown to each chat, evicting idle and least recently used chats.
+
+    Results are kept in memory by default, pass a SqliteBackend to keep
+    them across restarts.
+    """
+
+    def __init__(self, backend=None, ttl: float = 30 * 60):
+        """Initializes the store.
+
+        Args:
+          backend: Where the results are stored, a MemoryBackend of 1000 chats by default.
+          ttl (float): Seconds the results of a chat are kept after its last search.
+        """
+        self.backend = backend or MemoryBackend(max_entries=1000)
+        self.ttl = ttl
+
+    @classmethod
+    def persistent(
+        cls, path: str = "chat_state.sqlite3", max_chats: int = 10000, ttl: float = 30 * 60
+    ) -> "ChatStateStore":
+        """Creates a store backed by sqlite."""
+        return cls(SqliteBackend(path, max_entries=max_chats, table="chat_state"), ttl)
+
+    def set_results(self, chat_id: int, records: List[PastQuestionRecord]) -> None:
+        """It remembers the results shown to a chat, replacing the previous ones.
+
+        Args:
+          chat_id (int): The chat the results were shown to.
+          records (List[PastQuestionRecord]): The results, in the order they were numbered.
+        """
+        self.backend.set(str(chat_id), time.time() + self.ttl, records)
+
+    def get_results(self, chat_id: int) -> Optional[List[PastQuestionRecord]]:
+        """It returns the results last shown to a chat.
+
+        Args:
+          chat_id (int): The chat.
+
+        Returns:
+          The records, or None if the chat has no results or they expired.
+        """
+        entry = self.backend.get(str(chat_id))
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            self.backend.delete(str(chat_id))
+            return None
+        return entry[1]
+
+    def get_links(self, chat_id: int) -> Dict[int, str]:
+        """It numbers the links of a chat's results like get_links_of_past_question.
+
+        Args:
+          chat_id (int): The chat.
+
+        Returns:
+          A dictionary of past question links, empty if the chat has no results.
+        """
+        return {
+            index: record.link
+            for index, record in enumerate(self.get_results(chat_id) or [], start=1)
+        }
+
+    def resolve(self, chat_id: int, choice: int) -> Optional[str]:
+        """It returns the link of the past question a chat chose from its results.
+
+        Args:
+          chat_id (int): The chat.
+          choice (int): The number the user typed, starting from 1.
+
+        Returns:
+          The link, or None if the chat has no results or the choice is out of range.
+        """
+        records = self.get_results(chat_id)
+        if not records or not 1 <= choice <= len(records):
+            return None
+        return records[choice - 1].link
+
+    def clear(self, chat_id: int) -> None:
+        """Forgets the results of a chat."""
+        self.backend.delete(str(chat_id))
@@ -0,0 +1,254 @@
+"""Send past questions to Telegram and storage straight from the website's response, without saving them to disk first."""
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import shutil
+import tempfile
+from typing import BinaryIO, Iterable, List, Optional
+
+import requests
+from telegram import Bot, Message
+
+from file_id_store import FileIdStore
+from metrics import increment, timed
+from pdf_cache import storage_key
+from storage import Storage
+
+logger = logging.getLogger(__name__)
+
+# The largest file a bot can upload.
+TELEGRAM_UPLOAD_LIMIT = 50 * 1024**2
+CHUNK_SIZE = 64 * 1024
+
+
+class ResponseReader(io.RawIOBase):
+    """A readable binary file over the body of a streamed response, so it can be passed to anything reading files.
+
+    Wrap it in io.BufferedReader, as open_response does, for reads that fill
+    the requested size.
+    """
+
+    def __init__(self, response: requests.Response, chunk_size: int = CHUNK_SIZE):
+        """Starts reading the body lazily.
+
+        Args:
+          response (requests.Response): A response fetched with stream=True.
+          chunk_size (int): The number of bytes read from the network at once.
+        """
+        self.response = response
+        self._chunks: Iterable[bytes] = iter(response.iter_content(chunk_size))
+        self._pending = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        """Fills buffer with the next bytes of the body, returning 0 at the end."""
+        while not self._pending:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._pending = memoryview(chunk)
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+    def close(self) -> None:
+        """Closes the response along with the reader."""
+        self.response.close()
+        super().close()
+
+
+def open_response(response: requests.Response) -> io.BufferedReader:
+    """Returns a buffered binary file reading the body of a streamed response."""
+    return io.BufferedReader(ResponseReader(response), CHUNK_SIZE)
+
+
+def stream_to_storage(response: requests.Response, storage: Storage, record_id: str) -> None:
+    """It uploads the body of a response to storage as it arrives, like S3 multipart parts, without a local copy.
+
+    Args:
+      response (requests.Response): The streamed response of the pdf.
+      storage (Storage): Where the file is stored.
+      record_id (str): The id of the past question from its detail link.
+    """
+    with open_response(response) as reader:
+        storage.upload_fileobj(storage_key(record_id), reader)
+
+
+def split_pdf(file: BinaryIO, limit: int) -> List[bytes]:
+    """It splits a pdf into parts of whole pages, halving the page ranges until each part fits in limit.
+
+    A single page larger than limit is returned as a part of its own. pypdf
+    is imported on the first split, to keep startup fast.
+
+    Args:
+      file (BinaryIO): The seekable pdf.
+      limit (int): The largest size of a part in bytes.
+
+    Returns:
+      The content of each part, in page order.
+    """
+    try:
+        from pypdf import PdfReader, PdfWriter
+    except ImportError as error:
+        raise ImportError(
+            "Splitting large past questions needs pypdf, install it with pip install pypdf."
+        ) from error
+
+    reader = PdfReader(file)
+
+    def write(start: int, end: int) -> bytes:
+        writer = PdfWriter()
+        for page in reader.pages[start:end]:
+            writer.add_page(page)
+        part = io.BytesIO()
+        writer.write(part)
+        return part.getvalue()
+
+    def split(start: int, end: int) -> List[bytes]:
+        part = write(start, end)
+        if len(part) <= limit or end - start == 1:
+            return [part]
+        middle = (start + end) // 2
+        return split(start, middle) + split(middle, end)
+
+    return split(0, len(reader.pages))
+
+
+async def stream_past_question(
+    bot: Bot,
+    chat_id: int,
+    response: requests.Response,
+    record_id: Optional[str] = None,
+    filename: Optional[str] = None,
+    storage: Optional[Storage] = None,
+    store: Optional[FileIdStore] = None,
+    limit: int = TELEGRAM_UPLOAD_LIMIT,
+) -> List[Message]:
+    """It sends the pdf of a streamed response to a chat and storage without writing it to disk.
+
+    Files within limit are held in memory only, as Telegram uploads whole
+    files. Larger files are spooled to a temporary file, stored, and sent
+    as parts of whole pages, or as a link to storage if they can't be split
+    and the storage serves them over http(s).
+
+    Args:
+      bot (Bot): The bot sending the document.
+      chat_id (int): The chat to send the document to.
+      response (requests.Response): The streamed response of the pdf, like HttpScraper.open_past_question returns.
+      record_id (Optional[str]): The id of the past question from its detail link.
+      filename (Optional[str]): The name shown to the user.
+      storage (Optional[Storage]): Where the file is also stored, under the key PdfCache reads.
+      store (Optional[FileIdStore]): Where the Telegram file id is kept, so the next send is by reference.
+      limit (int): The largest file sent in one message.
+
+    Returns:
+      The messages that were sent.
+    """
+    filename = filename or f"{record_id or 'past_question'}.pdf"
+    with open_response(response) as reader, timed("stream_delivery"):
+        content = await asyncio.to_thread(reader.read, limit + 1)
+        if len(content) <= limit:
+            return [
+                await _send_in_memory(
+                    bot, chat_id, content, record_id, filename, storage, store
+                )
+            ]
+
+        increment("oversize_past_questions_total")
+        with tempfile.SpooledTemporaryFile(max_size=limit) as spool:
+            spool.write(content)
+            del content
+            await asyncio.to_thread(shutil.copyfileobj, reader, spool, CHUNK_SIZE)
+            return await _send_oversize(
+                bot, chat_id, spool, record_id, filename, storage, limit
+            )
+
+
+async def _send_in_memory(
+    bot: Bot,
+    chat_id: int,
+    content: bytes,
+    record_id: Optional[str],
+    filename: str,
+    storage: Optional[Storage],
+    store: Optional[FileIdStore],
+) -> Message:
+    """Uploads a file held in memory to Telegram and storage at the same time."""
+    uploads = [bot.send_document(chat_id=chat_id, document=content, filename=filename)]
+    if storage is not None and record_id is not None:
+        uploads.append(
+            asyncio.to_thread(
+                storage.upload_fileobj, storage_key(record_id), io.BytesIO(content)
+            )
+        )
+    message, *stored = await asyncio.gather(*uploads, return_exceptions=True)
+    for error in stored:
+        if isinstance(error, Exception):
+            logger.error(f"Failed to store record {record_id}: {error!r}")
+    if isinstance(message, BaseException):
+        raise message
+
+    if store is not None and record_id is not None and message.document is not None:
+        store.set(record_id, hashlib.sha256(content).hexdigest(), message.document.file_id)
+    return message
+
+
+async def _send_oversize(
+    bot: Bot,
+    chat_id: int,
+    spool: BinaryIO,
+    record_id: Optional[str],
+    filename: str,
+    storage: Optional[Storage],
+    limit: int,
+) -> List[Message]:
+    """Stores a file too large for Telegram and sends it in parts, or a link to it."""
+    if storage is not None and record_id is not None:
+        spool.seek(0)
+        try:
+            await asyncio.to_thread(storage.upload_fileobj, storage_key(record_id), spool)
+        except Exception:
+            logger.exception(f"Failed to store record {record_id}.")
+
+    spool.seek(0)
+    try:
+        parts = await asyncio.to_thread(split_pdf, spool, limit)
+    except ImportError as error:
+        # A missing install, not a bad file, so it is reported as such.
+        logger.error(f"Large past questions can't be split: {error}")
+        increment("pdf_split_unavailable_total")
+        parts = []
+    except Exception:
+        logger.exception(f"Failed to split record {record_id}.")
+        parts = []
+
+    if parts and all(len(part) <= limit for part in parts):
+        name, extension = os.path.splitext(filename)
+        messages = []
+        for number, part in enumerate(parts, start=1):
+            messages.append(
+                await bot.send_document(
+                    chat_id=chat_id,
+                    document=part,
+                    filename=f"{name} (part {number} of {len(parts)}){extension}",
+                )
+            )
+        return messages
+
+    url = None
+    if storage is not None and record_id is not None:
+        try:
+            url = storage.url(storage_key(record_id), expires=24 * 60 * 60)
+        except Exception:
+            logger.exception(f"Failed to get a link to record {record_id}.")
+    # A local storage returns a path on this server, which is no use to the user.
+    if url is not None and url.startswith(("http://", "https://")):
+        text = f"{filename} is too large to send here, download it from {url}"
+    else:
+        text = f"{filename} is too large to send here."
+    return [await bot.send_message(chat_id=chat_id, text=text)]
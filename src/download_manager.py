@@ -0,0 +1,121 @@
+"""Per request download folders for the browser."""
+import logging
+import os
+import shutil
+import time
+from typing import Optional
+
+from utils.path_separator import get_file_separator
+from utils.uuid import generate_6_digits_uuid
+
+logger = logging.getLogger(__name__)
+
+PARTIAL_SUFFIXES = (".crdownload", ".tmp", ".part")
+
+
+class DownloadManager:
+    """Gives each download its own folder so concurrent users never pick up each other's files."""
+
+    def __init__(
+        self,
+        base_directory: Optional[str] = None,
+        timeout: float = 30.0,
+        poll_interval: float = 0.05,
+    ):
+        """Initializes the manager.
+
+        Args:
+          base_directory (Optional[str]): Where the request folders and finished files live, src/tmp by default.
+          timeout (float): Seconds to wait for a download to finish.
+          poll_interval (float): Seconds between checks of a request folder.
+        """
+        self.base_directory = base_directory or (
+            os.getcwd() + get_file_separator() + "src" + get_file_separator() + "tmp"
+        )
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+
+    def new_directory(self) -> str:
+        """It creates an empty folder for a single download.
+
+        Returns:
+          The path of the folder.
+        """
+        directory = os.path.join(
+            self.base_directory, f"download-{generate_6_digits_uuid()}"
+        )
+        os.makedirs(directory)
+        return directory
+
+    def wait_for_file(self, directory: str, timeout: Optional[float] = None) -> Optional[str]:
+        """It waits until the browser has finished writing a file in the folder.
+
+        Chrome writes to a .crdownload file and renames it once the download
+        completes, so the download is done when a file is present and no
+        partial file is left.
+
+        Args:
+          directory (str): A folder made by new_directory.
+          timeout (Optional[float]): Seconds to wait, the manager's timeout by default.
+
+        Returns:
+          The path of the finished file, or None if nothing finished in time.
+        """
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        while True:
+            try:
+                names = os.listdir(directory)
+            except FileNotFoundError:
+                return None
+            finished = [name for name in names if not name.endswith(PARTIAL_SUFFIXES)]
+            if finished and len(finished) == len(names):
+                return os.path.join(directory, finished[0])
+            if time.monotonic() >= deadline:
+                logger.error(f"Timeout waiting for download in {directory}")
+                return None
+            time.sleep(self.poll_interval)
+
+    def collect(self, directory: str, timeout: Optional[float] = None) -> Optional[str]:
+        """It waits for the download in a folder, moves the file out under a unique name and removes the folder.
+
+        Args:
+          directory (str): A folder made by new_directory.
+          timeout (Optional[float]): Seconds to wait, the manager's timeout by default.
+
+        Returns:
+          The path of the downloaded file, or None if the download didn't finish.
+        """
+        user_file = self.wait_for_file(directory, timeout)
+        if user_file is not None:
+            # The folder name keeps files with the same name from different requests apart.
+            destination = os.path.join(
+                self.base_directory,
+                f"{os.path.basename(directory)}-{os.path.basename(user_file)}",
+            )
+            os.replace(user_file, destination)
+            user_file = destination
+        self.discard(directory)
+        return user_file
+
+    def discard(self, directory: str) -> None:
+        """It removes a request folder and anything left in it.
+
+        Args:
+          directory (str): A folder made by new_directory.
+        """
+        shutil.rmtree(directory, ignore_errors=True)
+
+    def cleanup(self, max_age: float = 60 * 60) -> None:
+        """It removes request folders left behind by downloads that never completed.
+
+        Args:
+          max_age (float): Seconds after which an abandoned folder is removed.
+        """
+        now = time.time()
+        for entry in os.scandir(self.base_directory):
+            if (
+                entry.is_dir()
+                and entry.name.startswith("download-")
+                and now - entry.stat().st_mtime > max_age
+            ):
+                self.discard(entry.path)
@@ -0,0 +1,137 @@
+"""Reuse Telegram file ids so each past question is only uploaded once."""
+import asyncio
+import logging
+import os
+import re
+import sqlite3
+import threading
+from typing import Optional
+
+from telegram import Bot, Message
+from telegram.error import BadRequest
+
+from metrics import increment, timed
+from utils.hashing import sha256_of_file
+
+logger = logging.getLogger(__name__)
+
+SHA256_NAME = re.compile(r"^[0-9a-f]{64}\.pdf$")
+
+
+def file_fingerprint(path: str) -> str:
+    """It returns the sha256 of a file, read from the name of files stored by PdfCache.
+
+    Args:
+      path (str): The path of the file.
+
+    Returns:
+      The hex sha256 of the file's content.
+    """
+    name = os.path.basename(path)
+    if SHA256_NAME.match(name):
+        return name[:-4]
+    return sha256_of_file(path)
+
+
+class FileIdStore:
+    """Sqlite map from record id to the Telegram file id of its past question."""
+
+    def __init__(self, path: str = "file_ids.sqlite3"):
+        """Creates the table if needed.
+
+        Args:
+          path (str): The database file.
+        """
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS file_ids ("
+                "record_id TEXT PRIMARY KEY, fingerprint TEXT, file_id TEXT)"
+            )
+
+    def get(self, record_id: str, fingerprint: str) -> Optional[str]:
+        """It returns the file id of a record, unless the file has changed since it was uploaded.
+
+        Args:
+          record_id (str): The id of the past question from its detail link.
+          fingerprint (str): The sha256 of the file about to be sent.
+
+        Returns:
+          The Telegram file id, or None.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT fingerprint, file_id FROM file_ids WHERE record_id = ?",
+                (record_id,),
+            ).fetchone()
+        if row is None or row[0] != fingerprint:
+            return None
+        return row[1]
+
+    def set(self, record_id: str, fingerprint: str, file_id: str) -> None:
+        """It stores the file id Telegram returned for a record.
+
+        Args:
+          record_id (str): The id of the past question from its detail link.
+          fingerprint (str): The sha256 of the file that was uploaded.
+          file_id (str): The file id of the uploaded document.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO file_ids VALUES (?, ?, ?)",
+                (record_id, fingerprint, file_id),
+            )
+
+    def invalidate(self, record_id: str) -> None:
+        """It forgets the file id of a record.
+
+        Args:
+          record_id (str): The id of the past question from its detail link.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM file_ids WHERE record_id = ?", (record_id,)
+            )
+
+
+async def send_past_question(
+    bot: Bot,
+    chat_id: int,
+    record_id: Optional[str],
+    path: str,
+    store: FileIdStore,
+    filename: Optional[str] = None,
+) -> Message:
+    """It sends a past question by file id when it was uploaded before, and uploads it otherwise.
+
+    Args:
+      bot (Bot): The bot sending the document.
+      chat_id (int): The chat to send the document to.
+      record_id (Optional[str]): The id of the past question from its detail link.
+      path (str): The path of the downloaded file.
+      store (FileIdStore): Where file ids are kept.
+      filename (Optional[str]): The name shown to the user.
+
+    Returns:
+      The message that was sent.
+    """
+    fingerprint = await asyncio.to_thread(file_fingerprint, path)
+    if record_id is not None:
+        file_id = store.get(record_id, fingerprint)
+        if file_id is not None:
+            try:
+                message = await bot.send_document(chat_id=chat_id, document=file_id)
+                increment("file_id_reuses_total")
+                return message
+            except BadRequest:
+                logger.warning(f"Stored file id of record {record_id} was rejected.")
+                store.invalidate(record_id)
+
+    with open(path, "rb") as document, timed("upload"):
+        message = await bot.send_document(
+            chat_id=chat_id, document=document, filename=filename
+        )
+    if record_id is not None and message.document is not None:
+        store.set(record_id, fingerprint, message.document.file_id)
+    return message
@@ -1,85 +1,223 @@
 """Functions file."""
 import logging
-import logging.config
 import os
 import re
-import time
+import sys
 import traceback
-from typing import Dict, Generator, List, Union
+from typing import TYPE_CHECKING, Dict, Generator, List, Optional, Union
 
 import dotenv
 import requests
 
-# Polling Selenium setup
-from bs4 import BeautifulSoup
-from selenium import webdriver
+# The rest of selenium is imported when the browser is first needed, to keep startup fast.
 from selenium.common.exceptions import (
     NoSuchAttributeException,
     NoSuchElementException,
     TimeoutException,
 )
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import WebDriverWait
-from webdriver_manager.chrome import ChromeDriverManager
-
-
 
+from page_parser import (
+    parse_past_question_links,
+    parse_past_question_list,
+    parse_past_question_records,
+)
+from download_manager import DownloadManager
+from logging_setup import setup_logging
+from messages import SEPARATOR, format_past_question_list
+from metrics import increment, timed
+from pagination import iter_result_pages
+from pdf_cache import PdfCache
+from records import PastQuestionRecord, get_record_id
+from stats import record_event
+from upstream import UPSTREAM, Upstream
+from utils.chromedriver import get_chromedriver_path
 from utils.path_separator import get_file_separator
 
-# Logging setup
-logging.config.fileConfig(
-    fname="log.ini",
-    disable_existing_loggers=False,
-)
+if TYPE_CHECKING:
+    from bulk_download import Progress
+    from session_pool import SessionPool
+
+# Logging setup, after the environment as it may turn on ASYNC_LOGGING.
+dotenv.load_dotenv()
+setup_logging()
 logger = logging.getLogger(__name__)
-file_logger = logging.getLogger("fileLogger")
 
 
 # Constants
-dotenv.load_dotenv()
 URL = os.getenv("URL")
 USERNAME = os.getenv("USER_NAME")
 PASSWORD = os.getenv("PASSWORD")
+LEAN_BROWSER = os.getenv("LEAN_BROWSER", "").lower() in ("1", "true", "yes")
+
+# Content settings the scraper never needs, turned off in lean mode.
+LEAN_PREFERENCES = {
+    "profile.managed_default_content_settings.images": 2,
+    "profile.managed_default_content_settings.media_stream": 2,
+    "profile.default_content_setting_values.notifications": 2,
+}
+LEAN_ARGUMENTS = [
+    "--blink-settings=imagesEnabled=false",
+    "--disable-extensions",
+    "--disable-gpu",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-features=Translate,MediaRouter,OptimizationHints",
+    "--mute-audio",
+    "--no-first-run",
+    "--disk-cache-size=1",
+    "--media-cache-size=1",
+    "--renderer-process-limit=2",
+]
+# Chrome has no content setting for stylesheets or fonts, so they are only blocked by url.
+BLOCKED_URLS = [
+    "*.png",
+    "*.jpg",
+    "*.jpeg",
+    "*.gif",
+    "*.svg",
+    "*.webp",
+    "*.ico",
+    "*.css",
+    "*.woff",
+    "*.woff2",
+    "*.ttf",
+    "*.otf",
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*facebook.net*",
+    "*hotjar.com*",
+]
 
 
 class Functions:
     """Functions class."""
 
-    def __init__(self):
-        """Initializes a headless chrome browser and logs in to a website."""
+    def __init__(
+        self,
+        cache: Optional[PdfCache] = None,
+        lazy: bool = False,
+        lean: Optional[bool] = None,
+        upstream: Optional[Upstream] = None,
+    ):
+        """Initializes a headless chrome browser and logs in to a website.
+
+        Args:
+          cache (Optional[PdfCache]): Where downloaded past questions are kept to avoid downloading them again.
+          lazy (bool): Wait for the first search or download to start the browser and log in.
+          lean (Optional[bool]): Turn off images and block stylesheets, fonts and analytics by url to use less memory, LEAN_BROWSER by default.
+          upstream (Optional[Upstream]): The rate limit, retries and circuit breaker shared by every call to the website.
+        """
 
         self.logged_in = False
+        self.cache = cache
+        self.lean = LEAN_BROWSER if lean is None else lean
+        self.upstream = upstream or UPSTREAM
         self.path = (
             os.getcwd() + get_file_separator() + "src" + get_file_separator() + "tmp"
         )
+        self.downloads = DownloadManager(self.path)
         self.CURRENT_UUID = "CURRENT_UUID"
-        s = Service(ChromeDriverManager().install())
-        options = webdriver.ChromeOptions()
         # Open externally not with chrome's pdf viewer
         self.PROFILE = {
             "plugins.plugins_list": [{"enabled": False, "name": "Chrome PDF Viewer"}],
             "download.default_directory": self.path,
             "download.extensions_to_open": "",
         }
+        self._driver = None
+        if not lazy:
+            self.login()
+
+    @property
+    def driver(self):
+        """The browser, started on first use."""
+        if self._driver is None:
+            self._driver = self._start_browser()
+        return self._driver
+
+    @driver.setter
+    def driver(self, driver) -> None:
+        self._driver = driver
+
+    def _chrome_options(self):
+        """Builds the options of the browser, trimmed down in lean mode."""
+        from selenium import webdriver
+
+        options = webdriver.ChromeOptions()
         # options.binary_location = os.environ.get("GOOGLE_CHROME_BIN")
-        options.add_experimental_option("prefs", self.PROFILE)
+        preferences = dict(self.PROFILE)
+        if self.lean:
+            preferences.update(LEAN_PREFERENCES)
+        options.add_experimental_option("prefs", preferences)
         options.add_argument("--headless=new")
         options.add_argument("--no-sandbox")
         options.add_argument("--disable-dev-shm-usage")
+        if self.lean:
+            for argument in LEAN_ARGUMENTS:
+                options.add_argument(argument)
+            # Return once the html is parsed instead of waiting for every asset.
+            options.page_load_strategy = "eager"
+        return options
+
+    def _start_browser(self):
+        """Starts headless chrome with the download preferences."""
+        from selenium import webdriver
+        from selenium.common.exceptions import WebDriverException
+        from selenium.webdriver.chrome.service import Service
+
+        path = get_chromedriver_path()
+        try:
+            driver = webdriver.Chrome(service=Service(path), options=self._chrome_options())
+        except WebDriverException:
+            # The cached driver may no longer match Chrome after an update.
+            fresh_path = get_chromedriver_path(refresh=True)
+            if fresh_path == path:
+                raise
+            logger.warning(f"Chrome failed to start with {path}, retrying with {fresh_path}.")
+            driver = webdriver.Chrome(service=Service(fresh_path), options=self._chrome_options())
+        driver.implicitly_wait(6)
+        driver.set_page_load_timeout(self.upstream.timeout)
+        if self.lean:
+            # Preferences miss assets requested by scripts, the network domain catches the rest.
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+        logger.info(f"Started the browser{' in lean mode' if self.lean else ''}.")
+        return driver
+
+    def _open(self, url: str) -> None:
+        """Moves the browser to a url, through the rate limit and circuit breaker."""
+        self.upstream.call(self.driver.get, url)
+
+    def _fetch(self, url: str) -> requests.Response:
+        """Gets a page without the browser, through the rate limit and circuit breaker."""
+        return self.upstream.call(self._get, url)
+
+    def _get(self, url: str) -> requests.Response:
+        """Makes a single request, raising on error responses so they count against the website."""
+        response = requests.get(url, timeout=self.upstream.timeout)
+        response.raise_for_status()
+        return response
+
+    def _start_if_needed(self) -> None:
+        """Starts the browser and logs in on the first use of a lazy session."""
+        if self._driver is None:
+            self.login()
+
+    @timed("login")
+    def login(self) -> bool:
+        """Fills in the member login form with the credentials from the environment.
 
-        # self.driver = webdriver.Chrome(
-        #     executable_path=os.environ.get("CHROMEDRIVER_PATH"), options=options
-        # )
-        self.driver = webdriver.Chrome(service=s, options=options)
-        self.driver.implicitly_wait(6)
+        Returns:
+          True if the logout button is displayed after submitting the form, False otherwise.
+        """
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.common.keys import Keys
 
-        # Log in
+        self.logged_in = False
         try:
-            self.driver.get(URL)
+            self._open(URL)
 
             username_field = self.driver.find_element(By.NAME, "memberID")
             password_field = self.driver.find_element(By.NAME, "memberPassWord")
@@ -97,6 +235,41 @@ class Functions:
         except Exception:
             logger.exception("Error occurred while logging in.")
 
+        if not self.logged_in:
+            increment("login_failures_total")
+        return self.logged_in
+
+    def is_logged_in(self) -> bool:
+        """It moves back to the member page and checks that the logout button is still displayed.
+
+        Returns:
+          True if the session is still logged in, False otherwise.
+        """
+        from selenium.webdriver.common.by import By
+
+        if self._driver is None:
+            return False
+        try:
+            self._open(URL)
+            self.driver.find_element(By.ID, "memberLogout")
+            return True
+        except (NoSuchElementException, NoSuchAttributeException):
+            logger.warning("Session is no longer logged in.")
+        except Exception:
+            logger.exception("Error occurred while checking session.")
+
+        self.logged_in = False
+        return False
+
+    def quit(self) -> None:
+        """Closes the browser."""
+        if self._driver is None:
+            return
+        try:
+            self.driver.quit()
+        except Exception:
+            logger.exception("Error occurred while closing the browser.")
+
     def get_past_question_path(self, path: str) -> Union[str, None]:
         """It takes a path as an argument, checks if there are any pdf files in the path, and if there are, it returns the most recent file in the path, if they aren't it returns None.
 
@@ -113,31 +286,35 @@ class Functions:
             for basename in path_directory
             if basename.endswith(".pdf")
         ]
-        logger.info(path_directory)
         if len(user_file_path) == 0:
             return None
 
         user_file = max(user_file_path, key=os.path.getctime)
-        file_logger.info(
-            f"Downloaded file from path {user_file} has been uploaded to user."
-        )
-        file_logger.info("")
+        record_event("upload", file=os.path.basename(user_file))
 
         return user_file
 
-    def search_for_past_question(self, cleaned_pasco_name: str) -> int:
+    @timed("search")
+    def search_for_past_question(
+        self, cleaned_pasco_name: str, record: bool = True
+    ) -> int:
         """It searches for a past question on the website, and returns 0 if it was successful, and 1 if it wasn't.
 
         Args:
           cleaned_pasco_name (str): The name of the file you're searching for.
+          record (bool): Count the search as a user request in the stats file.
 
         Returns:
           The return value is the status code of the function.
         """
+        from selenium.webdriver.common.by import By
+
+        self._start_if_needed()
         logger.info(
             f"Searching for {cleaned_pasco_name}: The current_url is {self.driver.current_url}"
         )
-        file_logger.info(f"User has requested for {cleaned_pasco_name} past question.")
+        if record:
+            record_event("request", query=cleaned_pasco_name)
         try:
             search_field = self.driver.find_element(By.NAME, "keywords")
             search_button = self.driver.find_element(By.NAME, "search")
@@ -155,6 +332,22 @@ class Functions:
             logger.exception(f"Failed to search for {cleaned_pasco_name}")
             return 1
 
+    def _iter_result_pages(self, first_content: bytes) -> Generator:
+        """It yields the html of every page of the current search results, fetching the pages after the first concurrently.
+
+        Args:
+          first_content (bytes): The html of the current page.
+
+        Returns:
+          The html of each page in order.
+        """
+        return iter_result_pages(
+            self.driver.current_url,
+            first_content,
+            lambda page_url: self._fetch(page_url).content,
+        )
+
+    @timed("list_parse")
     def get_list_of_past_question(self) -> List[str]:
         """
         It retrieves the names, year and semester of past questions displayed then adds them to a list.
@@ -166,11 +359,7 @@ class Functions:
         logger.info(f"Retrieving list of past question from {self.driver.current_url}")
 
         try:
-            past_question_page = requests.get(self.driver.current_url)
-            past_question_content = BeautifulSoup(past_question_page.content, "lxml")
-            past_question_list = past_question_content.find_all(
-                "div", class_="item biblioRecord"
-            )
+            past_question_page = self._fetch(self.driver.current_url)
             logger.info("Got list of past questions successfully.")
         except (NoSuchElementException, NoSuchAttributeException):
             logger.exception("Past question content field not found.")
@@ -179,36 +368,33 @@ class Functions:
             logger.exception("Failed to retrieve past questions.")
             return filtered_past_question_list
         else:
-            if past_question_list:
-                for past_question in past_question_list:
-                    past_question_title = past_question.find("a", class_="titleField")
-                    past_question_year = past_question.find(
-                        "div", class_="customField isbnField"
-                    )
-                    past_question_semester = past_question.find(
-                        "div", class_="customField collationField"
-                    )
-                    filtered_past_question_list.append(
-                        past_question_title.get_text()
-                        + "\n"
-                        + past_question_year.get_text()
-                        + "\n"
-                        + past_question_semester.get_text()
-                    )
+            for page_content in self._iter_result_pages(past_question_page.content):
+                filtered_past_question_list.extend(
+                    parse_past_question_list(page_content)
+                )
             logger.info(
                 "Appended key aspects of past questions to filtered list successfully."
             )
             return filtered_past_question_list
 
-    def past_question_list_to_string(self, list_of_values: List[str]) -> str:
-        """It takes a list of strings, and returns a string with each item in the list on a new line, with a number in front of it.
+    def past_question_list_to_string(
+        self, list_of_values: Union[List[str], List[PastQuestionRecord]]
+    ) -> str:
+        """It takes a list of strings or records, and returns a string with each item in the list on a new line, with a number in front of it.
 
         Args:
-          list_of_values (List[str]): List[str]
+          list_of_values (Union[List[str], List[PastQuestionRecord]]): The strings from get_list_of_past_question, or records.
 
         Returns:
           A string
         """
+        if list_of_values and isinstance(list_of_values[0], PastQuestionRecord):
+            # The trailing newline matches the output for strings below.
+            return (
+                SEPARATOR.join(format_past_question_list(list_of_values, limit=sys.maxsize))
+                + "\n"
+            )
+
         updated_list = []
         for value in range(len(list_of_values)):
             updated_list.append(
@@ -220,6 +406,7 @@ class Functions:
 
         return modified_text
 
+    @timed("link_parse")
     def get_links_of_past_question(self) -> Dict[int, str]:
         """
         It gets the links of past questions from the current page.
@@ -231,11 +418,7 @@ class Functions:
         logger.info(f"Retrieving links of past question from {self.driver.current_url}")
 
         try:
-            past_question_page = requests.get(self.driver.current_url)
-            past_question_content = BeautifulSoup(past_question_page.content, "lxml")
-            past_question_list = past_question_content.find_all(
-                "a", class_="titleField"
-            )
+            past_question_page = self._fetch(self.driver.current_url)
             logger.info("Retrieved past question links successfully.")
         except (NoSuchElementException, NoSuchAttributeException):
             logger.exception("Past question link field not found.")
@@ -246,52 +429,143 @@ class Functions:
             )
             return past_question_links
         else:
-            for past_question_index in range(1, len(past_question_list) + 1):
-                past_question_links[past_question_index] = (
-                    "https://balme.ug.edu.gh"
-                    + past_question_list[past_question_index - 1]["href"]
-                )
+            for page_content in self._iter_result_pages(past_question_page.content):
+                for past_question_link in parse_past_question_links(
+                    page_content
+                ).values():
+                    past_question_links[len(past_question_links) + 1] = (
+                        past_question_link
+                    )
             logger.info("Extracted past question links successfully.")
 
             return past_question_links
 
+    @timed("records_parse")
+    def get_past_question_records(self) -> List[PastQuestionRecord]:
+        """
+        It fetches each page of the current results once and extracts the title, year, semester and link of every past question on them.
+
+        Returns:
+          A list of past question records.
+        """
+        logger.info(f"Retrieving past question records from {self.driver.current_url}")
+
+        try:
+            past_question_page = self._fetch(self.driver.current_url)
+            past_question_records = [
+                past_question_record
+                for page_content in self._iter_result_pages(past_question_page.content)
+                for past_question_record in parse_past_question_records(page_content)
+            ]
+        except Exception:
+            logger.exception("Failed to retrieve past question records.")
+            return []
+
+        logger.info(f"Retrieved {len(past_question_records)} past question records.")
+        return past_question_records
+
+    def search(
+        self, cleaned_pasco_name: str, record: bool = True
+    ) -> List[PastQuestionRecord]:
+        """It searches for a past question and returns the records on the results page.
+
+        Args:
+          cleaned_pasco_name (str): The name of the file you're searching for.
+          record (bool): Count the search as a user request in the stats file, False for the cache warmer.
+
+        Returns:
+          A list of past question records, empty if the search failed.
+        """
+        if self.search_for_past_question(cleaned_pasco_name, record) != 0:
+            return []
+        return self.get_past_question_records()
+
     def get_past_question(
-        self, past_question_links: Dict[int, str], choice: int
+        self,
+        past_question_links: Dict[int, str],
+        choice: int,
+        pool: Optional["SessionPool"] = None,
+        progress: Optional["Progress"] = None,
     ) -> Generator:
         """It takes in a dictionary of past question links and a choice from the user, then it moves to the url of the users choice and downloads the past question.
 
+        When the choice is -1, every past question is downloaded through
+        download_all, concurrently on the browsers of pool if one is given
+        and one at a time on this session otherwise.
+
         Args:
           past_question_links (Dict[int, Any]): This is a dictionary of the past questions links.
           choice (int): The choice of the user.
+          pool (Optional[SessionPool]): Browser sessions sharing the downloads when the choice is -1.
+          progress (Optional[Progress]): Called after each download when the choice is -1.
 
         Returns:
           The path to the past_question_file
         """
-        print("kwame")
         if int(choice) == -1:
-            print("nii")
-            for past_question_link in past_question_links.values():
-                self.driver.get(past_question_link)
-                logger.info(f"Moved to {past_question_link} successfully.")
-                self.download_past_question()
-                yield self.get_past_question_path(self.path)
+            # Imported here as bulk_download depends on this module through session_pool.
+            from bulk_download import browser_download, download_all
+
+            if pool is not None:
+                download, max_workers = browser_download(pool), pool.size
+            else:
+                # A single browser can only download one file at a time.
+                download, max_workers = self.get_past_question_file, 1
+            yield from download_all(
+                past_question_links.values(),
+                download,
+                max_workers=max_workers,
+                progress=progress,
+            )
         else:
-            print("temp")
             for index, past_question_link in past_question_links.items():
                 if int(choice) == index:
-                    print("yooo")
-                    self.driver.get(
-                        past_question_link
-                    )  # Move to the url of users choice.
-                    logger.info(f"Moved to {past_question_link} successfully.")
-
-                    self.download_past_question()
-                    yield self.get_past_question_path(self.path)
+                    yield self.get_past_question_file(past_question_link)
                     break
-                print("herh")
+
+    def get_past_question_file(self, past_question_link: str) -> Union[str, None]:
+        """It returns the cached file of a past question, downloading it with the browser on a miss.
+
+        Args:
+          past_question_link (str): The link to the past question detail page.
+
+        Returns:
+          The path to the past_question_file
+        """
+        record_id = get_record_id(past_question_link)
+        if self.cache is not None:
+            cached_file = self.cache.get(record_id)
+            if cached_file is not None:
+                return cached_file
+
+        self._start_if_needed()
+        with timed("download"):
+            # Each download gets its own folder so concurrent users can't swap files.
+            directory = self.downloads.new_directory()
+            self._set_download_directory(directory)
+            self._open(past_question_link)  # Move to the url of users choice.
+            logger.info(f"Moved to {past_question_link} successfully.")
+            if self.download_past_question():
+                user_file = self.downloads.collect(directory)
+            else:
+                self.downloads.discard(directory)
+                user_file = None
+        if user_file is not None and self.cache is not None:
+            user_file = self.cache.put(record_id, user_file)
+        return user_file
+
+    def _set_download_directory(self, directory: str) -> None:
+        """Tells the browser to save the next downloads in the given folder."""
+        self.driver.execute_cdp_cmd(
+            "Page.setDownloadBehavior", {"behavior": "allow", "downloadPath": directory}
+        )
 
     def download_past_question(self) -> bool:
         """Clicks on a button that opens a frame, then clicks on a button in the frame to download a file."""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
         logger.info(f"Downloading past question from {self.driver.current_url}")
         try:
             file = self.driver.find_element(By.CLASS_NAME, "openPopUp")
@@ -299,17 +573,19 @@ class Functions:
                 "arguments[0].click();", file
             )  # screen displayed is a frame, so adapts to a frame.
             wait = WebDriverWait(self.driver, 15)
-            wait.until(
-                EC.frame_to_be_available_and_switch_to_it((By.CLASS_NAME, "cboxIframe"))
-            )
+            with timed("popup_wait"):
+                wait.until(
+                    EC.frame_to_be_available_and_switch_to_it(
+                        (By.CLASS_NAME, "cboxIframe")
+                    )
+                )
             self.driver.find_element(By.ID, "download").click()
 
             # wait.until(EC.element_to_be_clickable((By.ID, "download"))).click()
 
             logger.info("Downloading file...")
-            file_logger.info(f"{self.driver.current_url} has been downloaded.")
+            record_event("download", link=self.driver.current_url)
             self.driver.back()
-            time.sleep(2)
             return True
         except (NoSuchElementException, NoSuchAttributeException):
             logger.exception("Failed to find download button.")
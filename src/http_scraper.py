@@ -0,0 +1,433 @@
+"""Browserless scraper that talks to the website over a keep-alive http session."""
+import logging
+import os
+from typing import Dict, Generator, List, Optional, Union
+from urllib.parse import urljoin
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from bulk_download import Progress, download_all
+from catalogue import CatalogueCrawler, CatalogueIndex
+from functions import PASSWORD, URL, USERNAME
+from metrics import increment, timed
+from page_parser import parse_file_url, parse_past_question_records, parse_popup_url
+from pagination import iter_result_pages
+from pdf_cache import PdfCache
+from records import PastQuestionRecord, get_record_id
+from session_pool import SessionPool
+from stats import record_event
+from upstream import UPSTREAM, Upstream
+from utils.path_separator import get_file_separator
+from utils.uuid import generate_6_digits_uuid
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+)
+
+
+def create_session(pool_size: int = 10) -> requests.Session:
+    """Creates a requests session that keeps up to pool_size connections to the website alive.
+
+    Args:
+      pool_size (int): The number of connections kept open per host.
+
+    Returns:
+      A requests session.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+class HttpScraper:
+    """Searches and downloads past questions without a browser, using Selenium only as a fallback."""
+
+    def __init__(
+        self,
+        session: Optional[requests.Session] = None,
+        fallback: Optional[SessionPool] = None,
+        timeout: float = 15.0,
+        cache: Optional[PdfCache] = None,
+        index: Optional[CatalogueIndex] = None,
+        max_workers: int = 4,
+        upstream: Optional[Upstream] = None,
+    ):
+        """Initializes the scraper, call login before searching.
+
+        Args:
+          session (Optional[requests.Session]): The http session to use, a new keep-alive session by default.
+          fallback (Optional[SessionPool]): Browser sessions used when a page can't be handled over http.
+          timeout (float): Seconds to wait for the website to respond.
+          cache (Optional[PdfCache]): Where downloaded past questions are kept to avoid downloading them again.
+          index (Optional[CatalogueIndex]): A crawled catalogue answering searches before the website is contacted.
+          max_workers (int): The maximum number of pages of results fetched at once.
+          upstream (Optional[Upstream]): The rate limit, retries and circuit breaker shared by every call to the website.
+        """
+        self.session = session or create_session()
+        self.fallback = fallback
+        self.timeout = timeout
+        self.cache = cache
+        self.index = index
+        self.max_workers = max_workers
+        self.upstream = upstream or UPSTREAM
+        self.logged_in = False
+        self.current_url: Optional[str] = None
+        self._records: Optional[List[PastQuestionRecord]] = None
+        self.path = (
+            os.getcwd() + get_file_separator() + "src" + get_file_separator() + "tmp"
+        )
+        self.search_url = (URL or "").split("?")[0]
+
+    @classmethod
+    def from_driver(cls, driver, **kwargs) -> "HttpScraper":
+        """Creates a scraper that reuses the cookies of a logged in Selenium driver.
+
+        Args:
+          driver: A logged in Selenium webdriver.
+
+        Returns:
+          A logged in HttpScraper.
+        """
+        scraper = cls(**kwargs)
+        for cookie in driver.get_cookies():
+            scraper.session.cookies.set(
+                cookie["name"],
+                cookie["value"],
+                domain=cookie.get("domain"),
+                path=cookie.get("path", "/"),
+            )
+        scraper.logged_in = True
+        return scraper
+
+    @timed("http_login")
+    def login(self) -> bool:
+        """Posts the member login form, keeping any hidden fields the form carries.
+
+        Returns:
+          True if the logout button is displayed after logging in, False otherwise.
+        """
+        self.logged_in = False
+        try:
+            login_page = self.upstream.call(self.session.get, URL, timeout=self.timeout)
+            form_data: Dict[str, str] = {}
+            action = URL
+            login_form = BeautifulSoup(login_page.content, "lxml").find(
+                lambda tag: tag.name == "form" and tag.find(attrs={"name": "memberID"})
+            )
+            if login_form is not None:
+                action = urljoin(login_page.url, login_form.get("action") or URL)
+                for field in login_form.find_all("input"):
+                    if field.get("name") and field.get("type") in ("hidden", "submit"):
+                        form_data[field["name"]] = field.get("value", "")
+
+            form_data["memberID"] = USERNAME or ""
+            form_data["memberPassWord"] = (PASSWORD or "").rstrip("\n")
+            response = self.upstream.call(
+                self.session.post, action, data=form_data, timeout=self.timeout
+            )
+            self.logged_in = "memberLogout" in response.text
+        except requests.RequestException:
+            logger.exception("Error occurred while logging in.")
+
+        if self.logged_in:
+            logger.info("Logged in successfully over http.")
+        else:
+            logger.critical("Failed to log in over http.")
+            increment("http_login_failures_total")
+        return self.logged_in
+
+    def fetch(self, url: str, **kwargs) -> requests.Response:
+        """Gets a page over the shared session, through the rate limit and circuit breaker.
+
+        Args:
+          url (str): The url of the page.
+
+        Returns:
+          The response.
+        """
+        return self.upstream.call(self._get, url, **kwargs)
+
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        """Makes a single request, raising on error responses so they can be retried."""
+        response = self.session.get(url, timeout=self.timeout, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def search_for_past_question(
+        self, cleaned_pasco_name: str, record: bool = True
+    ) -> int:
+        """It searches for a past question on the website, and returns 0 if it was successful, and 1 if it wasn't.
+
+        Args:
+          cleaned_pasco_name (str): The name of the file you're searching for.
+          record (bool): Count the search as a user request in the stats file.
+
+        Returns:
+          The return value is the status code of the function.
+        """
+        try:
+            for _ in self.iter_search(cleaned_pasco_name, record):
+                pass
+        except Exception:
+            logger.exception("Failed to retrieve past question records.")
+            return 1
+        return 0 if self._records is not None else 1
+
+    def iter_search(
+        self, cleaned_pasco_name: str, record: bool = True
+    ) -> Generator[List[PastQuestionRecord], None, None]:
+        """It searches for a past question and yields the records page by page, so the first page can be shown while the rest are fetched.
+
+        Args:
+          cleaned_pasco_name (str): The name of the file you're searching for.
+          record (bool): Count the search as a user request in the stats file.
+
+        Returns:
+          The records of each page of results in order.
+        """
+        if record:
+            record_event("request", query=cleaned_pasco_name)
+        self._records = None
+        if self.index is not None:
+            indexed_records = self.index.search(cleaned_pasco_name)
+            if indexed_records:
+                logger.info(f"Answered {cleaned_pasco_name} from the catalogue index.")
+                self.current_url = None
+                self._records = indexed_records
+                yield indexed_records
+                return
+
+        try:
+            # Double Quotes give accurate queries
+            response = self.fetch(
+                self.search_url,
+                params={"keywords": f'"{cleaned_pasco_name}"', "search": "search"},
+            )
+        except requests.RequestException:
+            logger.exception(f"Failed to search for {cleaned_pasco_name}")
+            return
+
+        self.current_url = response.url
+        logger.info(
+            f"After searching for {cleaned_pasco_name}: The current_url is {self.current_url}"
+        )
+        past_question_records: List[PastQuestionRecord] = []
+        self._records = past_question_records
+        for page_content in iter_result_pages(
+            response.url,
+            response.content,
+            lambda page_url: self.fetch(page_url).content,
+            max_workers=self.max_workers,
+        ):
+            page_records = parse_past_question_records(page_content)
+            past_question_records.extend(page_records)
+            yield page_records
+
+    def get_past_question_records(self) -> List[PastQuestionRecord]:
+        """
+        It returns the title, year, semester and link of every past question found by the last search.
+
+        Returns:
+          A list of past question records.
+        """
+        if self._records is None:
+            logger.error("No search has been made yet.")
+            return []
+        return self._records
+
+    @timed("http_search")
+    def search(
+        self, cleaned_pasco_name: str, record: bool = True
+    ) -> List[PastQuestionRecord]:
+        """It searches for a past question and returns the records on every page of results.
+
+        The records are collected locally, so concurrent searches on the same
+        scraper each get their own results.
+
+        Args:
+          cleaned_pasco_name (str): The name of the file you're searching for.
+          record (bool): Count the search as a user request in the stats file, False for the cache warmer.
+
+        Returns:
+          A list of past question records, empty if the search failed.
+        """
+        past_question_records: List[PastQuestionRecord] = []
+        try:
+            for page_records in self.iter_search(cleaned_pasco_name, record):
+                past_question_records.extend(page_records)
+        except Exception:
+            logger.exception("Failed to retrieve past question records.")
+            return []
+        return past_question_records
+
+    def crawl_catalogue(self, index: CatalogueIndex, incremental: bool = True) -> int:
+        """It walks every page of an empty search and stores the records in the index.
+
+        Args:
+          index (CatalogueIndex): Where the records are stored.
+          incremental (bool): Stop at the first page with nothing new.
+
+        Returns:
+          The number of records that were new or changed.
+        """
+        crawler = CatalogueCrawler(
+            index,
+            lambda url: self.fetch(url).content,
+            f"{self.search_url}?keywords=&search=search",
+        )
+        return crawler.crawl(incremental=incremental)
+
+    def get_list_of_past_question(self) -> List[str]:
+        """
+        It retrieves the names, year and semester of past questions on the search results page.
+
+        Returns:
+          A list of strings.
+        """
+        return [record.to_text() for record in self.get_past_question_records()]
+
+    def get_links_of_past_question(self) -> Dict[int, str]:
+        """
+        It gets the links of past questions from the search results page.
+
+        Returns:
+          A dictionary of past question links.
+        """
+        return {
+            index: record.link
+            for index, record in enumerate(self.get_past_question_records(), start=1)
+        }
+
+    def get_past_question(
+        self,
+        past_question_links: Dict[int, str],
+        choice: int,
+        progress: Optional[Progress] = None,
+    ) -> Generator:
+        """It downloads the past question the user chose, or all of them concurrently if the choice is -1.
+
+        Args:
+          past_question_links (Dict[int, str]): This is a dictionary of the past questions links.
+          choice (int): The choice of the user.
+          progress (Optional[Progress]): Called after each download when the choice is -1.
+
+        Returns:
+          The path to each downloaded past question file, as soon as it is ready.
+        """
+        if int(choice) == -1:
+            yield from download_all(
+                past_question_links.values(),
+                self.download_past_question,
+                max_workers=self.max_workers,
+                progress=progress,
+            )
+            return
+
+        for index, past_question_link in past_question_links.items():
+            if int(choice) == index:
+                yield self.download_past_question(past_question_link)
+
+    def download_past_question(self, past_question_link: str) -> Union[str, None]:
+        """Downloads the file attached to a past question, falling back to a browser if that fails.
+
+        Args:
+          past_question_link (str): The link to the past question detail page.
+
+        Returns:
+          The path of the downloaded file, or None if it couldn't be downloaded.
+        """
+        record_id = get_record_id(past_question_link)
+        if self.cache is not None:
+            cached_file = self.cache.get(record_id)
+            if cached_file is not None:
+                return cached_file
+
+        logger.info(f"Downloading past question from {past_question_link}")
+        try:
+            with timed("http_download"):
+                user_file = self._download_over_http(past_question_link)
+        except requests.RequestException:
+            logger.exception("Error occurred while downloading file over http.")
+            user_file = None
+
+        if (
+            user_file is None
+            and self.fallback is not None
+            # A browser would hit the same failing website.
+            and not self.upstream.breaker.is_open
+        ):
+            logger.info("Falling back to a browser to download the file.")
+            with self.fallback.lease() as browser:
+                user_file = browser.get_past_question_file(past_question_link)
+
+        if user_file is not None:
+            record_event("download", link=past_question_link)
+            if self.cache is not None:
+                user_file = self.cache.put(record_id, user_file)
+        return user_file
+
+    def open_past_question(self, past_question_link: str) -> Optional[requests.Response]:
+        """It follows the detail page and popup to the pdf and returns its response before the body is read.
+
+        The caller streams the body wherever it is needed, like Telegram or
+        storage, and closes the response.
+
+        Args:
+          past_question_link (str): The link to the past question detail page.
+
+        Returns:
+          The streamed response of the pdf, or None if there is no pdf behind the link.
+        """
+        detail_page = self.fetch(past_question_link)
+        popup_url = parse_popup_url(detail_page.content, detail_page.url)
+        if popup_url is None:
+            logger.error("Failed to find download button.")
+            return None
+
+        file_url: Optional[str] = popup_url
+        # The popup is either the file itself or a viewer pointing at it.
+        for _ in range(2):
+            response = self.fetch(file_url, stream=True)
+            if _is_pdf(response):
+                return response
+            file_url = parse_file_url(response.content, response.url)
+            response.close()
+            if file_url is None:
+                break
+
+        logger.error(f"No pdf found behind {popup_url}")
+        return None
+
+    def _download_over_http(self, past_question_link: str) -> Union[str, None]:
+        """Streams the pdf behind a detail link to the tmp folder."""
+        response = self.open_past_question(past_question_link)
+        if response is None:
+            return None
+        with response:
+            return self._save(response, past_question_link)
+
+    def _save(self, response: requests.Response, past_question_link: str) -> str:
+        """Streams a pdf response to the tmp folder, under a name unique to this download."""
+        record_id = get_record_id(past_question_link) or "past_question"
+        # Downloads of the same record may overlap, like the warmer and a user.
+        user_file = os.path.join(self.path, f"{record_id}-{generate_6_digits_uuid()}.pdf")
+        partial_file = f"{user_file}.part"
+        with open(partial_file, "wb") as file:
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                file.write(chunk)
+        os.replace(partial_file, user_file)
+        return user_file
+
+
+def _is_pdf(response: requests.Response) -> bool:
+    """Checks whether a streamed response is a pdf file."""
+    content_type = response.headers.get("Content-Type", "")
+    return "pdf" in content_type or "octet-stream" in content_type
@@ -0,0 +1,170 @@
+"""Logging configuration, with an optional mode that moves the writing of logs off the request path."""
+import atexit
+import logging
+import logging.config
+import os
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import List, Optional
+
+from metrics import increment
+
+_listeners: List[QueueListener] = []
+_configured = False
+
+
+class BatchingRotatingFileHandler(RotatingFileHandler):
+    """Rotates the file once it reaches maxBytes and flushes it once per batch instead of after every record.
+
+    A timer flushes a batch that isn't full flush_interval seconds after its
+    first record, so the last records reach the file even if no more come.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        mode: str = "a",
+        maxBytes: int = 5 * 1024**2,
+        backupCount: int = 3,
+        encoding: Optional[str] = "utf-8",
+        batch_size: int = 50,
+        flush_interval: float = 5.0,
+    ):
+        """Initializes the handler, the file is opened on the first record.
+
+        Args:
+          filename (str): The log file.
+          mode (str): The mode the file is opened with.
+          maxBytes (int): The size at which the file is rotated.
+          backupCount (int): The number of rotated files kept.
+          encoding (Optional[str]): The encoding of the file.
+          batch_size (int): The number of records written before the file is flushed.
+          flush_interval (float): Seconds after which a record is flushed by a timer even if the batch isn't full.
+        """
+        super().__init__(filename, mode, maxBytes, backupCount, encoding, delay=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = 0
+        self._flushed_at = time.monotonic()
+        self._size = 0
+        self._timer: Optional[threading.Timer] = None
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        """Checks the size counted so far, as seeking to the end of the file like RotatingFileHandler would flush it."""
+        if self.stream is None:
+            # Never rollover anything other than regular files, see bpo-45401.
+            if os.path.exists(self.baseFilename) and not os.path.isfile(self.baseFilename):
+                return False
+            self.stream = self._open()
+            self._size = self.stream.tell()
+        if self.maxBytes <= 0:
+            return False
+        length = len(self.format(record)) + 1
+        if self._size and self._size + length >= self.maxBytes:
+            self._size = length
+            return True
+        self._size += length
+        return False
+
+    def flush(self) -> None:
+        """Counts the record just written, flushing the file when the batch is full or old enough."""
+        self._pending += 1
+        if (
+            self._pending >= self.batch_size
+            or time.monotonic() - self._flushed_at >= self.flush_interval
+        ):
+            self.flush_now()
+        elif self._timer is None:
+            self._timer = threading.Timer(self.flush_interval, self._flush_on_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush_now(self) -> None:
+        """Flushes the records written so far."""
+        super().flush()
+        self._pending = 0
+        self._flushed_at = time.monotonic()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _flush_on_timer(self) -> None:
+        """Flushes a batch that wasn't filled in time, called on the timer's thread."""
+        self.acquire()
+        try:
+            self._timer = None
+            if self._pending:
+                self.flush_now()
+        finally:
+            self.release()
+
+    def close(self) -> None:
+        """Flushes the last batch and closes the file."""
+        self.acquire()
+        try:
+            self.flush_now()
+        finally:
+            self.release()
+        super().close()
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Puts records on a bounded queue, dropping them when it is full rather than blocking the caller."""
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Queues a record, counting it as dropped if the queue is full."""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            increment("log_records_dropped_total")
+
+
+def make_asynchronous(logger: logging.Logger, max_queued: int = 10000) -> QueueListener:
+    """It moves the handlers of a logger behind a queue, so logging only formats the record and returns.
+
+    Args:
+      logger (logging.Logger): The logger, like the root logger or fileLogger.
+      max_queued (int): The number of records waiting to be written above which new ones are dropped.
+
+    Returns:
+      The started listener writing the records on its own thread.
+    """
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=max_queued)
+    listener = QueueListener(log_queue, *logger.handlers, respect_handler_level=True)
+    logger.handlers = [DroppingQueueHandler(log_queue)]
+    listener.start()
+    _listeners.append(listener)
+    return listener
+
+
+def stop_listeners() -> None:
+    """Writes the queued records and stops the listeners, before logging flushes and closes the handlers."""
+    while _listeners:
+        _listeners.pop().stop()
+
+
+def setup_logging(fname: str = "log.ini", asynchronous: Optional[bool] = None) -> None:
+    """It configures logging from log.ini once per process.
+
+    Args:
+      fname (str): The logging configuration file.
+      asynchronous (Optional[bool]): Write the console and stats logs on background threads, ASYNC_LOGGING by default.
+    """
+    global _configured
+    if _configured:
+        return
+    _configured = True
+    logging.config.fileConfig(fname=fname, disable_existing_loggers=False)
+    if asynchronous is None:
+        asynchronous = os.getenv("ASYNC_LOGGING", "").lower() in ("1", "true", "yes")
+    if asynchronous:
+        make_asynchronous(logging.getLogger())
+        make_asynchronous(logging.getLogger("fileLogger"))
+        atexit.register(stop_listeners)
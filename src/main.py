@@ -1,24 +1,25 @@
 """Main bot file."""
 
 import logging
-import logging.config
 import os
 
 import dotenv
 from telegram import Update
 from telegram.ext import ApplicationBuilder, ContextTypes, MessageHandler, filters
 
-# Logging setup
-logging.config.fileConfig(
-    fname="log.ini",
-    disable_existing_loggers=False,
-)
+from logging_setup import setup_logging
+from metrics import REGISTRY, start_metrics_server, statsd_listener
+
+# Logging setup, after the environment as it may turn on ASYNC_LOGGING.
+dotenv.load_dotenv()
+setup_logging()
 
 logger = logging.getLogger(__name__)
 
-dotenv.load_dotenv()
 PORT = int(os.environ.get("PORT", 8443))
 TOKEN = os.environ["TOKEN"]
+METRICS_PORT = os.environ.get("METRICS_PORT")
+STATSD_HOST = os.environ.get("STATSD_HOST")
 
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -34,7 +35,13 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 def main():
     """Start bot."""
-    app = ApplicationBuilder().token(TOKEN).build()
+    if METRICS_PORT:
+        start_metrics_server(int(METRICS_PORT), address="0.0.0.0")
+    if STATSD_HOST:
+        REGISTRY.add_listener(statsd_listener(STATSD_HOST))
+
+    # Handle chats concurrently instead of one update at a time.
+    app = ApplicationBuilder().token(TOKEN).concurrent_updates(True).build()
 
     app.add_handler(MessageHandler(filters.TEXT, handle_message))
 
@@ -0,0 +1,43 @@
+"""Telegram messages listing past questions."""
+from typing import Iterable, List
+
+from records import PastQuestionRecord
+
+TELEGRAM_MESSAGE_LIMIT = 4096
+SEPARATOR = "\n\n"
+
+# Bound once, so each record is rendered by a single format call.
+format_past_question_record = "{0}. {1.title}, {1.year}, {1.semester}".format
+
+
+def format_past_question_list(
+    records: Iterable[PastQuestionRecord],
+    start: int = 1,
+    limit: int = TELEGRAM_MESSAGE_LIMIT,
+) -> List[str]:
+    """It numbers the records and renders them in one pass, split into messages Telegram accepts.
+
+    Args:
+      records (Iterable[PastQuestionRecord]): The records to list.
+      start (int): The number of the first record.
+      limit (int): The maximum length of a message.
+
+    Returns:
+      The messages, each holding whole records separated by blank lines.
+    """
+    messages: List[str] = []
+    lines: List[str] = []
+    length = 0
+    for number, record in enumerate(records, start):
+        line = format_past_question_record(number, record)
+        if len(line) > limit:
+            line = line[: limit - 3] + "..."
+        if lines and length + len(SEPARATOR) + len(line) > limit:
+            messages.append(SEPARATOR.join(lines))
+            lines = []
+            length = 0
+        length += len(line) + (len(SEPARATOR) if lines else 0)
+        lines.append(line)
+    if lines:
+        messages.append(SEPARATOR.join(lines))
+    return messages
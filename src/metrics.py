@@ -0,0 +1,269 @@
+"""Counters, gauges and latency histograms, exposed for Prometheus and StatsD."""
+import logging
+import math
+import socket
+import threading
+import time
+from contextlib import ContextDecorator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "pasco_"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+Listener = Callable[[str, str, float], None]
+
+
+class Counter:
+    """A value that only goes up."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, registry: "MetricsRegistry"):
+        self.name = name
+        self.description = description
+        self.value = 0.0
+        self._registry = registry
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        """Adds amount to the counter."""
+        with self._lock:
+            self.value += amount
+        self._registry.emit("c", self.name, amount)
+
+    def samples(self) -> List[Tuple[str, float]]:
+        return [(self.name, self.value)]
+
+
+class Gauge:
+    """A value that goes up and down, like the number of browsers in use."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str, registry: "MetricsRegistry"):
+        self.name = name
+        self.description = description
+        self.value = 0.0
+        self._registry = registry
+
+    def set(self, value: float) -> None:
+        """Replaces the value of the gauge."""
+        self.value = value
+        self._registry.emit("g", self.name, value)
+
+    def samples(self) -> List[Tuple[str, float]]:
+        return [(self.name, self.value)]
+
+
+class Histogram:
+    """Counts observations, like latencies in seconds, in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        registry: "MetricsRegistry",
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+        self._registry = registry
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """Records one observation."""
+        with self._lock:
+            self.sum += value
+            self.count += 1
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[index] += 1
+                    break
+        self._registry.emit("ms", self.name, value * 1000)
+
+    def samples(self) -> List[Tuple[str, float]]:
+        samples = []
+        cumulative = 0
+        with self._lock:
+            for bound, count in zip(self.buckets, self.counts):
+                cumulative += count
+                label = "+Inf" if bound == math.inf else repr(float(bound))
+                samples.append((f'{self.name}_bucket{{le="{label}"}}', cumulative))
+            samples.append((f"{self.name}_sum", self.sum))
+            samples.append((f"{self.name}_count", self.count))
+        return samples
+
+
+Metric = Union[Counter, Gauge, Histogram]
+
+
+class MetricsRegistry:
+    """Holds every metric of the process by name."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._listeners: List[Listener] = []
+        self._lock = threading.Lock()
+
+    def _get(self, metric_class, name: str, description: str, **kwargs) -> Metric:
+        """Returns the metric called name, creating it the first time."""
+        name = PREFIX + name
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_class(
+                    name, description, self, **kwargs
+                )
+        return metric
+
+    def counter(self, name: str, description: str = "") -> Counter:
+        """Returns the counter called name."""
+        return self._get(Counter, name, description)
+
+    def gauge(self, name: str, description: str = "") -> Gauge:
+        """Returns the gauge called name."""
+        return self._get(Gauge, name, description)
+
+    def histogram(
+        self, name: str, description: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Returns the histogram called name."""
+        return self._get(Histogram, name, description, buckets=buckets)
+
+    def add_listener(self, listener: Listener) -> None:
+        """Calls listener with the statsd type, name and value of every update."""
+        self._listeners.append(listener)
+
+    def emit(self, kind: str, name: str, value: float) -> None:
+        """Passes an update to the listeners."""
+        for listener in self._listeners:
+            try:
+                listener(kind, name, value)
+            except Exception:
+                logger.exception("Metrics listener failed.")
+
+    def render(self) -> str:
+        """It renders every metric in the Prometheus text format.
+
+        Returns:
+          The body of a /metrics response.
+        """
+        lines = []
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        for metric in metrics:
+            if metric.description:
+                lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for sample_name, value in metric.samples():
+                lines.append(f"{sample_name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+class timed(ContextDecorator):
+    """Times a block or function into the <name>_seconds histogram and counts failures in <name>_errors_total.
+
+    Use it as ``with timed("search"):`` or as the ``@timed("search")`` decorator.
+    """
+
+    def __init__(self, name: str, registry: Optional[MetricsRegistry] = None):
+        self.name = name
+        self.registry = registry or REGISTRY
+        self._start = 0.0
+
+    def _recreate_cm(self) -> "timed":
+        # A fresh timer per call keeps concurrent calls of a decorated function apart.
+        return timed(self.name, self.registry)
+
+    def __enter__(self) -> "timed":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> bool:
+        self.registry.histogram(
+            f"{self.name}_seconds", f"Time spent in {self.name}."
+        ).observe(time.perf_counter() - self._start)
+        if exc_type is not None:
+            self.registry.counter(
+                f"{self.name}_errors_total", f"Failures of {self.name}."
+            ).inc()
+        return False
+
+
+def increment(name: str, amount: float = 1) -> None:
+    """Adds amount to the counter called name in the default registry."""
+    REGISTRY.counter(name).inc(amount)
+
+
+def set_gauge(name: str, value: float) -> None:
+    """Sets the gauge called name in the default registry."""
+    REGISTRY.gauge(name).set(value)
+
+
+def start_metrics_server(
+    port: int = 9100, address: str = "127.0.0.1", registry: Optional[MetricsRegistry] = None
+) -> ThreadingHTTPServer:
+    """It serves the metrics at /metrics for Prometheus from a background thread.
+
+    Args:
+      port (int): The port to listen on, 0 picks a free one.
+      address (str): The address to listen on.
+      registry (Optional[MetricsRegistry]): The metrics served, the default registry by default.
+
+    Returns:
+      The running server, call shutdown() to stop it.
+    """
+    registry = registry or REGISTRY
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((address, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logger.info(f"Serving metrics on {address}:{server.server_port}/metrics")
+    return server
+
+
+def statsd_listener(host: str = "127.0.0.1", port: int = 8125) -> Listener:
+    """It returns a listener that sends every update to a StatsD or Datadog agent over udp.
+
+    Args:
+      host (str): The host of the agent.
+      port (int): The udp port of the agent.
+
+    Returns:
+      A listener for MetricsRegistry.add_listener.
+    """
+    udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def send(kind: str, name: str, value: float) -> None:
+        try:
+            udp_socket.sendto(f"{name}:{value:g}|{kind}".encode(), (host, port))
+        except OSError:
+            pass
+
+    return send
@@ -0,0 +1,204 @@
+"""Parsers for the pages of the past questions website."""
+from typing import Dict, List, Optional, Union
+from urllib.parse import parse_qs, urlencode, urljoin, urlparse, urlunparse
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from records import PastQuestionRecord
+
+SITE_URL = "https://balme.ug.edu.gh"
+
+# Only the result divs are built into a tree, the rest of the page is skipped.
+BIBLIO_RECORDS = SoupStrainer("div", class_="item biblioRecord")
+# Only the paging links are built when counting the pages.
+PAGING = SoupStrainer(class_=["biblioPaging", "pagingList"])
+
+
+def _get_text(past_question, name: str, class_: str) -> str:
+    """Returns the text of a field of a result, or an empty string if it is missing."""
+    field = past_question.find(name, class_=class_)
+    return field.get_text() if field is not None else ""
+
+
+def parse_past_question_records(
+    content: Union[str, bytes]
+) -> List[PastQuestionRecord]:
+    """It parses the title, year, semester and link of every past question on a search results page in one pass.
+
+    Args:
+      content (Union[str, bytes]): The html of the search results page.
+
+    Returns:
+      A list of past question records in the order they are displayed.
+    """
+    past_question_content = BeautifulSoup(content, "lxml", parse_only=BIBLIO_RECORDS)
+    past_question_records: List[PastQuestionRecord] = []
+    for past_question in past_question_content.find_all(
+        "div", class_="item biblioRecord"
+    ):
+        past_question_title = past_question.find("a", class_="titleField")
+        if past_question_title is None or not past_question_title.get("href"):
+            continue
+        past_question_records.append(
+            PastQuestionRecord(
+                title=past_question_title.get_text(),
+                year=_get_text(past_question, "div", "customField isbnField"),
+                semester=_get_text(past_question, "div", "customField collationField"),
+                link=SITE_URL + past_question_title["href"],
+            )
+        )
+    return past_question_records
+
+
+def parse_past_question_list(content: Union[str, bytes]) -> List[str]:
+    """It retrieves the names, year and semester of the past questions on a search results page.
+
+    Args:
+      content (Union[str, bytes]): The html of the search results page.
+
+    Returns:
+      A list of strings, each holding the title, year and semester on separate lines.
+    """
+    past_question_content = BeautifulSoup(content, "lxml")
+    filtered_past_question_list: List[str] = []
+    for past_question in past_question_content.find_all(
+        "div", class_="item biblioRecord"
+    ):
+        past_question_title = past_question.find("a", class_="titleField")
+        past_question_year = past_question.find("div", class_="customField isbnField")
+        past_question_semester = past_question.find(
+            "div", class_="customField collationField"
+        )
+        filtered_past_question_list.append(
+            past_question_title.get_text()
+            + "\n"
+            + past_question_year.get_text()
+            + "\n"
+            + past_question_semester.get_text()
+        )
+    return filtered_past_question_list
+
+
+def parse_past_question_links(content: Union[str, bytes]) -> Dict[int, str]:
+    """It gets the links of the past questions on a search results page.
+
+    Args:
+      content (Union[str, bytes]): The html of the search results page.
+
+    Returns:
+      A dictionary of past question links, numbered from 1.
+    """
+    past_question_content = BeautifulSoup(content, "lxml")
+    past_question_list = past_question_content.find_all("a", class_="titleField")
+    return {
+        index: SITE_URL + past_question["href"]
+        for index, past_question in enumerate(past_question_list, start=1)
+    }
+
+
+def parse_popup_url(content: Union[str, bytes], page_url: str) -> Optional[str]:
+    """It finds the url opened by the download button of a past question detail page.
+
+    Args:
+      content (Union[str, bytes]): The html of the detail page.
+      page_url (str): The url of the detail page, used to resolve relative links.
+
+    Returns:
+      The absolute url of the popup, or None if the page has no file attached.
+    """
+    popup = BeautifulSoup(content, "lxml").find("a", class_="openPopUp")
+    if popup is None or not popup.get("href"):
+        return None
+    return urljoin(page_url, popup["href"])
+
+
+def parse_file_url(content: Union[str, bytes], page_url: str) -> Optional[str]:
+    """It finds the url of the pdf shown inside the popup frame.
+
+    Args:
+      content (Union[str, bytes]): The html of the popup.
+      page_url (str): The url of the popup, used to resolve relative links.
+
+    Returns:
+      The absolute url of the file, or None if it couldn't be found.
+    """
+    popup_content = BeautifulSoup(content, "lxml")
+    candidates = [
+        popup_content.find(id="download"),
+        popup_content.find("iframe"),
+        popup_content.find("embed"),
+        popup_content.find("object"),
+    ]
+    for candidate in candidates:
+        if candidate is None:
+            continue
+        file_url = (
+            candidate.get("href") or candidate.get("src") or candidate.get("data")
+        )
+        if not file_url:
+            continue
+        # The pdf.js viewer passes the real file in its query string.
+        viewer_file = parse_qs(urlparse(file_url).query).get("file")
+        if viewer_file:
+            file_url = viewer_file[0]
+        return urljoin(page_url, file_url)
+
+    for link in popup_content.find_all("a", href=True):
+        if link["href"].lower().endswith(".pdf"):
+            return urljoin(page_url, link["href"])
+    return None
+
+
+def parse_next_page_url(content: Union[str, bytes], page_url: str) -> Optional[str]:
+    """It finds the link to the next page of search results.
+
+    Args:
+      content (Union[str, bytes]): The html of the search results page.
+      page_url (str): The url of the page, used to resolve relative links.
+
+    Returns:
+      The absolute url of the next page, or None on the last page.
+    """
+    paging_content = BeautifulSoup(content, "lxml")
+    next_link = paging_content.find("a", class_="next_link")
+    if next_link is None:
+        next_link = paging_content.find(
+            "a", string=lambda text: text and text.strip().lower() in ("next", "next page")
+        )
+    if next_link is None or not next_link.get("href"):
+        return None
+    return urljoin(page_url, next_link["href"])
+
+
+def parse_page_count(content: Union[str, bytes]) -> int:
+    """It finds the number of pages of search results from the paging links of the first page.
+
+    Args:
+      content (Union[str, bytes]): The html of the search results page.
+
+    Returns:
+      The number of pages, 1 if the results fit on one page.
+    """
+    paging_content = BeautifulSoup(content, "lxml", parse_only=PAGING)
+    page_count = 1
+    for link in paging_content.find_all("a", href=True):
+        pages = parse_qs(urlparse(link["href"]).query).get("page")
+        if pages and pages[0].isdigit():
+            page_count = max(page_count, int(pages[0]))
+    return page_count
+
+
+def get_page_url(page_url: str, page: int) -> str:
+    """It returns the url of another page of the same search results.
+
+    Args:
+      page_url (str): The url of any page of the search results.
+      page (int): The page wanted, starting from 1.
+
+    Returns:
+      The url with its page parameter replaced.
+    """
+    parsed_url = urlparse(page_url)
+    query = parse_qs(parsed_url.query, keep_blank_values=True)
+    query["page"] = [str(page)]
+    return urlunparse(parsed_url._replace(query=urlencode(query, doseq=True)))
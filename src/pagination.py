@@ -0,0 +1,57 @@
+"""Fetch every page of search results concurrently."""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Generator, Union
+
+from page_parser import get_page_url, parse_page_count
+
+logger = logging.getLogger(__name__)
+
+
+def iter_result_pages(
+    first_url: str,
+    first_content: Union[str, bytes],
+    fetch: Callable[[str], Union[str, bytes]],
+    max_workers: int = 4,
+    max_pages: int = 20,
+) -> Generator[Union[str, bytes], None, None]:
+    """It yields the html of every page of search results in order, starting with the page already fetched.
+
+    The remaining pages are requested before the first page is yielded, so
+    they load while the caller reads the first one and the total wait is
+    close to a single page.
+
+    Args:
+      first_url (str): The url of the first page.
+      first_content (Union[str, bytes]): The html of the first page.
+      fetch (Callable[[str], Union[str, bytes]]): Returns the html of a url.
+      max_workers (int): The maximum number of pages fetched at once.
+      max_pages (int): The maximum number of pages read.
+
+    Returns:
+      The html of each page, pages that fail to load are skipped.
+    """
+    page_count = parse_page_count(first_content)
+    if page_count > max_pages:
+        logger.warning(
+            f"Only reading {max_pages} of the {page_count} pages of results for {first_url}"
+        )
+        page_count = max_pages
+    if page_count <= 1:
+        yield first_content
+        return
+    page_urls = [get_page_url(first_url, page) for page in range(2, page_count + 1)]
+    logger.info(f"Fetching {len(page_urls)} more pages of results.")
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(page_urls)))
+    try:
+        # Submitted before the first page is handed over, so they load while it is read.
+        futures = [executor.submit(fetch, page_url) for page_url in page_urls]
+        yield first_content
+        for page_url, future in zip(page_urls, futures):
+            try:
+                yield future.result()
+            except Exception:
+                logger.exception(f"Failed to fetch {page_url}")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,243 @@
+"""Local cache of downloaded past question files."""
+import atexit
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from typing import Dict, Optional
+
+from metrics import increment
+from storage import Storage, storage_from_env
+from utils.hashing import sha256_of_file
+from utils.path_separator import get_file_separator
+from utils.uuid import generate_6_digits_uuid
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.json"
+
+
+def storage_key(record_id: str) -> str:
+    """Returns the key of a record's file in the shared storage."""
+    return f"past_questions/{record_id}.pdf"
+
+
+class PdfCache:
+    """Stores each past question once, named by its sha256, with an index from record id to file."""
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_bytes: int = 500 * 1024**2,
+        storage: Optional[Storage] = None,
+    ):
+        """Loads the index of the cache, creating the directory if needed.
+
+        Args:
+          directory (Optional[str]): Where the files are stored, src/tmp/cache by default.
+          max_bytes (int): The size above which the least recently used files are evicted.
+          storage (Optional[Storage]): Shared storage read through on a local miss and written to on put, configured by storage_from_env by default.
+        """
+        self.directory = directory or (
+            os.getcwd()
+            + get_file_separator()
+            + "src"
+            + get_file_separator()
+            + "tmp"
+            + get_file_separator()
+            + "cache"
+        )
+        self.max_bytes = max_bytes
+        self.storage = storage if storage is not None else storage_from_env()
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self._index: Dict[str, Dict] = self._load_index()
+        # Hits only touch last_access in memory, it is written with the next change or on exit.
+        self._dirty = False
+        atexit.register(self.flush)
+
+    @property
+    def size(self) -> int:
+        """The total size in bytes of the files in the cache."""
+        with self._lock:
+            return sum(
+                {entry["sha256"]: entry["size"] for entry in self._index.values()}.values()
+            )
+
+    def get(self, record_id: Optional[str], verify: bool = False) -> Optional[str]:
+        """It returns the cached file of a past question if it is present and intact, fetching it from the shared storage otherwise.
+
+        Args:
+          record_id (Optional[str]): The id of the past question from its detail link.
+          verify (bool): Rehash the file instead of only checking its size.
+
+        Returns:
+          The path of the cached file, or None on a miss.
+        """
+        if record_id is None:
+            return None
+        with self._lock:
+            entry = self._index.get(record_id)
+            if entry is not None:
+                path = self._path_of(entry["sha256"])
+                if self._is_intact(path, entry, verify):
+                    entry["last_access"] = time.time()
+                    self._dirty = True
+                    logger.info(f"Cache hit for record {record_id}.")
+                    increment("pdf_cache_hits_total")
+                    return path
+                logger.warning(f"Dropping corrupted cache entry for record {record_id}.")
+                del self._index[record_id]
+                self._remove_unreferenced(entry["sha256"])
+                self._save_index()
+        path = self._read_through(record_id)
+        increment(
+            "pdf_cache_misses_total" if path is None else "pdf_cache_storage_hits_total"
+        )
+        return path
+
+    def put(self, record_id: Optional[str], file_path: str) -> str:
+        """It moves a downloaded file into the cache and indexes it under its record id.
+
+        Args:
+          record_id (Optional[str]): The id of the past question from its detail link.
+          file_path (str): The path of the downloaded file.
+
+        Returns:
+          The path of the cached file, or file_path if it couldn't be cached.
+        """
+        if record_id is None:
+            return file_path
+        try:
+            sha256 = sha256_of_file(file_path)
+            size = os.path.getsize(file_path)
+            path = self._path_of(sha256)
+            with self._lock:
+                if os.path.exists(path):
+                    # Same content under another record id, keep a single copy.
+                    os.remove(file_path)
+                else:
+                    shutil.move(file_path, path)
+                previous = self._index.get(record_id)
+                self._index[record_id] = {
+                    "sha256": sha256,
+                    "size": size,
+                    "last_access": time.time(),
+                }
+                if previous is not None and previous["sha256"] != sha256:
+                    self._remove_unreferenced(previous["sha256"])
+                self._evict(keep=record_id)
+                self._save_index()
+        except OSError:
+            logger.exception(f"Failed to cache record {record_id}.")
+            return file_path
+
+        if self.storage is not None:
+            try:
+                if not self.storage.exists(storage_key(record_id)):
+                    self.storage.upload_file(storage_key(record_id), path)
+            except Exception:
+                logger.exception(f"Failed to upload record {record_id} to storage.")
+        return path
+
+    def flush(self) -> None:
+        """Writes the access times of the hits since the index was last saved."""
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    def _read_through(self, record_id: str) -> Optional[str]:
+        """Fetches a record missing locally from the shared storage."""
+        if self.storage is None:
+            return None
+        partial_path = os.path.join(
+            self.directory, f"{record_id}.{generate_6_digits_uuid()}.part"
+        )
+        try:
+            if not self.storage.download_file(storage_key(record_id), partial_path):
+                return None
+            sha256 = sha256_of_file(partial_path)
+            path = self._path_of(sha256)
+            os.replace(partial_path, path)
+        except Exception:
+            logger.exception(f"Failed to fetch record {record_id} from storage.")
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            return None
+
+        with self._lock:
+            self._index[record_id] = {
+                "sha256": sha256,
+                "size": os.path.getsize(path),
+                "last_access": time.time(),
+            }
+            self._evict(keep=record_id)
+            self._save_index()
+        logger.info(f"Fetched record {record_id} from storage.")
+        return path
+
+    def _path_of(self, sha256: str) -> str:
+        """Returns the path of the file with the given digest."""
+        return os.path.join(self.directory, f"{sha256}.pdf")
+
+    @staticmethod
+    def _is_intact(path: str, entry: Dict, verify: bool) -> bool:
+        """Checks the size, and optionally the digest, of a cached file against its entry."""
+        try:
+            if os.path.getsize(path) != entry["size"]:
+                return False
+        except OSError:
+            return False
+        return not verify or sha256_of_file(path) == entry["sha256"]
+
+    def _evict(self, keep: str) -> None:
+        """Removes the least recently used files, except keep, until the cache fits in max_bytes."""
+        sizes = {entry["sha256"]: entry["size"] for entry in self._index.values()}
+        total = sum(sizes.values())
+        for record_id, entry in sorted(
+            self._index.items(), key=lambda item: item[1]["last_access"]
+        ):
+            if total <= self.max_bytes:
+                break
+            if record_id == keep:
+                continue
+            del self._index[record_id]
+            if self._remove_unreferenced(entry["sha256"]):
+                total -= sizes[entry["sha256"]]
+                logger.info(f"Evicted record {record_id} from the cache.")
+
+    def _remove_unreferenced(self, sha256: str) -> bool:
+        """Deletes a file once no record id points to it."""
+        if any(entry["sha256"] == sha256 for entry in self._index.values()):
+            return False
+        try:
+            os.remove(self._path_of(sha256))
+        except FileNotFoundError:
+            pass
+        return True
+
+    def _load_index(self) -> Dict[str, Dict]:
+        """Reads the index file, starting empty if it is missing or unreadable."""
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE)) as index_file:
+                return json.load(index_file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            logger.exception("Failed to read the cache index, starting empty.")
+            return {}
+
+    def _save_index(self) -> None:
+        """Writes the index file atomically, through a temporary file unique to this write."""
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        temporary_path = f"{index_path}.{generate_6_digits_uuid()}.tmp"
+        try:
+            with open(temporary_path, "w") as index_file:
+                json.dump(self._index, index_file)
+            os.replace(temporary_path, index_path)
+        finally:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+        self._dirty = False
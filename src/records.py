@@ -0,0 +1,89 @@
+"""Past question records."""
+import re
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+COURSE_CODE = re.compile(r"\b([A-Z]{2,5})\s*-?\s*(\d{3}[A-Z]?)\b")
+
+
+def get_record_id(past_question_link: str) -> Optional[str]:
+    """It extracts the record id from the link of a past question detail page.
+
+    Args:
+      past_question_link (str): A link like ".../index.php?p=show_detail&id=9731".
+
+    Returns:
+      The record id, or None if the link has no id.
+    """
+    record_ids = parse_qs(urlparse(past_question_link).query).get("id")
+    return record_ids[0] if record_ids else None
+
+
+def get_course_code(title: str) -> Optional[str]:
+    """It extracts the course code from the title of a past question.
+
+    Args:
+      title (str): A title like "MATH 121: Algebra And Trigonometry".
+
+    Returns:
+      The course code written as "MATH 121", or None if the title has none.
+    """
+    course_code = COURSE_CODE.search(title.upper())
+    if course_code is None:
+        return None
+    return f"{course_code.group(1)} {course_code.group(2)}"
+
+
+@dataclass(frozen=True, slots=True)
+class PastQuestionRecord:
+    """A past question listed on a search results page.
+
+    The record id and course code are read from the link and title when
+    they aren't given.
+    """
+
+    title: str
+    year: str
+    semester: str
+    link: str
+    record_id: Optional[str] = None
+    course_code: Optional[str] = None
+
+    def __post_init__(self):
+        if self.record_id is None:
+            object.__setattr__(self, "record_id", get_record_id(self.link))
+        if self.course_code is None:
+            object.__setattr__(self, "course_code", get_course_code(self.title))
+
+    def to_text(self) -> str:
+        """Returns the title, year and semester on separate lines, like get_list_of_past_question."""
+        return self.title + "\n" + self.year + "\n" + self.semester
+
+
+def filter_records(
+    records: Iterable[PastQuestionRecord],
+    year: Optional[str] = None,
+    semester: Optional[str] = None,
+) -> List[PastQuestionRecord]:
+    """It keeps the records of a year and semester, most recent year first.
+
+    Args:
+      records (Iterable[PastQuestionRecord]): The records to filter.
+      year (Optional[str]): Keep only this year, like "2019".
+      semester (Optional[str]): Keep only semesters containing this, like "first".
+
+    Returns:
+      The matching records sorted by year, newest first.
+    """
+    semester = semester.lower() if semester else None
+    return sorted(
+        (
+            record
+            for record in records
+            if (year is None or record.year.strip() == year)
+            and (semester is None or semester in record.semester.lower())
+        ),
+        key=lambda record: record.year,
+        reverse=True,
+    )
@@ -0,0 +1,240 @@
+"""Cache of search results keyed by the normalised query."""
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from metrics import increment
+from records import PastQuestionRecord
+
+logger = logging.getLogger(__name__)
+
+COURSE_CODE = re.compile(r"^([A-Z]{2,5})\s*-?\s*(\d{3}[A-Z]?)$")
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalise_query(query: str) -> str:
+    """It canonicalises a query so that "Math 121", "MATH121" and "math 121 " are the same.
+
+    Args:
+      query (str): The query typed by the user.
+
+    Returns:
+      The query in upper case with single spaces, and course codes written as "MATH 121".
+    """
+    cleaned_query = WHITESPACE.sub(" ", query).strip().upper()
+    course_code = COURSE_CODE.match(cleaned_query)
+    if course_code:
+        return f"{course_code.group(1)} {course_code.group(2)}"
+    return cleaned_query
+
+
+class MemoryBackend:
+    """Keeps search results in a dictionary, evicting the least recently used."""
+
+    def __init__(self, max_entries: int = 1024):
+        """Initializes an empty backend.
+
+        Args:
+          max_entries (int): The number of queries kept.
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, List[PastQuestionRecord]]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[float, List[PastQuestionRecord]]]:
+        """Returns the expiry time and records stored under key."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, expires_at: float, records: List[PastQuestionRecord]) -> None:
+        """Stores records under key until expires_at."""
+        with self._lock:
+            self._entries[key] = (expires_at, list(records))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        """Removes the records stored under key."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class SqliteBackend:
+    """Keeps search results in a sqlite database so they survive restarts."""
+
+    def __init__(
+        self,
+        path: str = "search_cache.sqlite3",
+        max_entries: int = 10000,
+        table: str = "search_cache",
+    ):
+        """Creates the table if needed.
+
+        Args:
+          path (str): The database file.
+          max_entries (int): The number of queries kept.
+          table (str): The table used, so other stores can share the file.
+        """
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name {table}")
+        self.max_entries = max_entries
+        self.table = table
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "query TEXT PRIMARY KEY, expires_at REAL, "
+                "last_access REAL, records TEXT)"
+            )
+
+    def get(self, key: str) -> Optional[Tuple[float, List[PastQuestionRecord]]]:
+        """Returns the expiry time and records stored under key."""
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                f"SELECT expires_at, records FROM {self.table} WHERE query = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute(
+                f"UPDATE {self.table} SET last_access = ? WHERE query = ?",
+                (time.time(), key),
+            )
+        return row[0], [PastQuestionRecord(**record) for record in json.loads(row[1])]
+
+    def set(self, key: str, expires_at: float, records: List[PastQuestionRecord]) -> None:
+        """Stores records under key until expires_at."""
+        serialised = json.dumps([asdict(record) for record in records])
+        with self._lock, self._connection:
+            self._connection.execute(
+                f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?, ?)",
+                (key, expires_at, time.time(), serialised),
+            )
+            self._connection.execute(
+                f"DELETE FROM {self.table} WHERE query IN ("
+                f"SELECT query FROM {self.table} ORDER BY last_access DESC "
+                "LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def delete(self, key: str) -> None:
+        """Removes the records stored under key."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                f"DELETE FROM {self.table} WHERE query = ?", (key,)
+            )
+
+
+class SearchCache:
+    """Answers repeated queries from memory instead of searching the website again."""
+
+    def __init__(
+        self, backend=None, ttl: float = 6 * 60 * 60, stale_ttl: float = 24 * 60 * 60
+    ):
+        """Initializes the cache.
+
+        Args:
+          backend: Where the results are stored, a MemoryBackend by default.
+          ttl (float): Seconds a search result stays fresh.
+          stale_ttl (float): Seconds an expired result is kept to answer while the website is failing.
+        """
+        self.backend = backend or MemoryBackend()
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """The number of hits and misses so far."""
+        return {"hits": self.hits, "misses": self.misses}
+
+    def get(self, query: str) -> Optional[List[PastQuestionRecord]]:
+        """It returns the fresh results of a query, or None on a miss.
+
+        Args:
+          query (str): The query typed by the user.
+
+        Returns:
+          The cached records, or None.
+        """
+        key = normalise_query(query)
+        entry = self.backend.get(key)
+        if entry is not None and entry[0] > time.time():
+            with self._lock:
+                self.hits += 1
+            increment("search_cache_hits_total")
+            return entry[1]
+        if entry is not None and entry[0] + self.stale_ttl <= time.time():
+            self.backend.delete(key)
+        with self._lock:
+            self.misses += 1
+        increment("search_cache_misses_total")
+        return None
+
+    def get_stale(self, query: str) -> Optional[List[PastQuestionRecord]]:
+        """It returns the results of a query even if they expired, as long as they are within stale_ttl.
+
+        Args:
+          query (str): The query typed by the user.
+
+        Returns:
+          The cached records, or None.
+        """
+        entry = self.backend.get(normalise_query(query))
+        if entry is None or entry[0] + self.stale_ttl <= time.time():
+            return None
+        return entry[1]
+
+    def set(self, query: str, records: List[PastQuestionRecord]) -> None:
+        """It stores the results of a query, empty results are not cached as they usually mean the search failed.
+
+        Args:
+          query (str): The query typed by the user.
+          records (List[PastQuestionRecord]): The results of the search.
+        """
+        if records:
+            self.backend.set(normalise_query(query), time.time() + self.ttl, records)
+
+    def get_or_search(
+        self, query: str, search: Callable[[str], List[PastQuestionRecord]]
+    ) -> List[PastQuestionRecord]:
+        """It returns the cached results of a query, searching with the normalised query on a miss.
+
+        When the search comes back empty, as it does while the website is
+        failing, expired results of the query are returned if there are any.
+
+        Args:
+          query (str): The query typed by the user.
+          search (Callable[[str], List[PastQuestionRecord]]): Searches the website, like HttpScraper.search.
+
+        Returns:
+          The records of the query.
+        """
+        records = self.get(query)
+        if records is not None:
+            logger.info(f"Search cache hit for {query}.")
+            return records
+
+        records = search(normalise_query(query))
+        if not records:
+            stale_records = self.get_stale(query)
+            if stale_records is not None:
+                logger.warning(f"Serving expired results for {query}.")
+                increment("search_cache_stale_total")
+                return stale_records
+        self.set(query, records)
+        return records
@@ -0,0 +1,217 @@
+"""Asynchronous service that runs the blocking scrapers off the bot's event loop."""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from chat_state import ChatStateStore
+from metrics import increment
+from records import PastQuestionRecord, get_record_id
+from search_cache import normalise_query
+
+logger = logging.getLogger(__name__)
+
+# Identical requests share a key, like ("search", "MATH 121") or ("download", "9731").
+Key = Tuple[str, str]
+Job = Tuple["asyncio.Future[Any]", Key, Callable[..., Any], Tuple[Any, ...]]
+
+
+class UserBusyError(Exception):
+    """Raised when a user already has too many requests waiting."""
+
+
+class ChoiceError(Exception):
+    """Raised when a choice doesn't match the results last shown to a chat."""
+
+
+class PastQuestionService:
+    """Queues each chat's requests and runs them on a thread pool, so handlers never block the event loop.
+
+    Requests from the same chat run one after the other, requests from
+    different chats run in parallel up to max_workers. Identical searches
+    and downloads of the same record share a single run while it is in
+    flight, so a burst of chats asking for the same course hits the
+    website once.
+    """
+
+    def __init__(
+        self,
+        search: Callable[[str], List[PastQuestionRecord]],
+        download: Callable[[str], Optional[str]],
+        max_workers: int = 8,
+        timeout: float = 60.0,
+        max_pending: int = 5,
+        idle_timeout: float = 300.0,
+        state: Optional[ChatStateStore] = None,
+    ):
+        """Initializes the service.
+
+        Args:
+          search (Callable[[str], List[PastQuestionRecord]]): Blocking search, like HttpScraper.search.
+          download (Callable[[str], Optional[str]]): Blocking download of a detail link, like HttpScraper.download_past_question.
+          max_workers (int): The number of requests run at once across all chats.
+          timeout (float): Seconds a single request may take.
+          max_pending (int): The number of requests a chat may have waiting.
+          idle_timeout (float): Seconds after which an idle chat's queue is dropped.
+          state (Optional[ChatStateStore]): Where each chat's last results are kept, so choices can be resolved.
+        """
+        self._search = search
+        self._download = download
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self.idle_timeout = idle_timeout
+        self.state = state
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="scraper"
+        )
+        self._queues: Dict[int, "asyncio.Queue[Job]"] = {}
+        self._running: Dict[int, "asyncio.Future[Any]"] = {}
+        self._in_flight: Dict[Key, "asyncio.Future[Any]"] = {}
+        self._workers: Set["asyncio.Task[None]"] = set()
+
+    async def search(self, chat_id: int, query: str) -> List[PastQuestionRecord]:
+        """It searches for a past question without blocking the event loop.
+
+        Args:
+          chat_id (int): The chat the request came from.
+          query (str): The query typed by the user.
+
+        Returns:
+          The records found.
+        """
+        records = await self._submit(
+            chat_id, ("search", normalise_query(query)), self._search, query
+        )
+        if self.state is not None:
+            self.state.set_results(chat_id, records)
+        return records
+
+    async def download(self, chat_id: int, past_question_link: str) -> Optional[str]:
+        """It downloads a past question without blocking the event loop.
+
+        Args:
+          chat_id (int): The chat the request came from.
+          past_question_link (str): The link to the past question detail page.
+
+        Returns:
+          The path of the downloaded file, or None if it couldn't be downloaded.
+        """
+        record_id = get_record_id(past_question_link) or past_question_link
+        return await self._submit(
+            chat_id, ("download", record_id), self._download, past_question_link
+        )
+
+    async def download_choice(self, chat_id: int, choice: int) -> Optional[str]:
+        """It downloads the past question a chat chose from its last results.
+
+        Args:
+          chat_id (int): The chat the request came from.
+          choice (int): The number the user typed, starting from 1.
+
+        Returns:
+          The path of the downloaded file, or None if it couldn't be downloaded.
+
+        Raises:
+          ChoiceError: If the chat has no results or the choice is out of range.
+        """
+        past_question_link = (
+            self.state.resolve(chat_id, choice) if self.state is not None else None
+        )
+        if past_question_link is None:
+            raise ChoiceError(f"Choice {choice} doesn't match the results of chat {chat_id}.")
+        return await self.download(chat_id, past_question_link)
+
+    def cancel(self, chat_id: int) -> int:
+        """It cancels the running and waiting requests of a chat.
+
+        The thread already running a request can't be interrupted, but its
+        caller stops waiting for it straight away.
+
+        Args:
+          chat_id (int): The chat whose requests are cancelled.
+
+        Returns:
+          The number of requests cancelled.
+        """
+        cancelled = 0
+        running = self._running.get(chat_id)
+        if running is not None and running.cancel():
+            cancelled += 1
+        queue = self._queues.get(chat_id)
+        while queue is not None and not queue.empty():
+            future, _, _, _ = queue.get_nowait()
+            if future.cancel():
+                cancelled += 1
+        return cancelled
+
+    def shutdown(self) -> None:
+        """Stops the thread pool once the running requests finish."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _submit(
+        self, chat_id: int, key: Key, function: Callable[..., Any], *args: Any
+    ) -> Any:
+        """Queues a request for a chat, starting the chat's worker if needed, and waits for its result."""
+        queue = self._queues.get(chat_id)
+        if queue is None:
+            queue = self._queues[chat_id] = asyncio.Queue(maxsize=self.max_pending)
+            worker = asyncio.get_running_loop().create_task(self._work(chat_id, queue))
+            self._workers.add(worker)
+            worker.add_done_callback(self._workers.discard)
+
+        future: "asyncio.Future[Any]" = asyncio.get_running_loop().create_future()
+        try:
+            queue.put_nowait((future, key, function, args))
+        except asyncio.QueueFull:
+            raise UserBusyError(f"Chat {chat_id} already has requests waiting.")
+        return await future
+
+    async def _work(self, chat_id: int, queue: "asyncio.Queue[Job]") -> None:
+        """Runs the requests of one chat in order until the chat goes idle."""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                future, key, function, args = await asyncio.wait_for(
+                    queue.get(), self.idle_timeout
+                )
+            except asyncio.TimeoutError:
+                if queue.empty():
+                    del self._queues[chat_id]
+                    return
+                continue
+
+            if future.done():
+                continue
+            self._running[chat_id] = future
+            job = self._in_flight.get(key)
+            if job is None:
+                job = self._in_flight[key] = loop.run_in_executor(
+                    self._executor, function, *args
+                )
+                job.add_done_callback(lambda job, key=key: self._finish(key, job))
+            else:
+                logger.info(f"Sharing the {key[0]} of {key[1]} already in flight.")
+                increment(f"{key[0]}_coalesced_total")
+            try:
+                # Waiting on the caller's future too lets cancel() free the worker.
+                await asyncio.wait(
+                    {job, future}, timeout=self.timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if future.done():
+                    continue
+                if not job.done():
+                    logger.error(f"Request from chat {chat_id} timed out.")
+                    future.set_exception(TimeoutError("The request took too long."))
+                elif job.exception() is not None:
+                    future.set_exception(job.exception())
+                else:
+                    future.set_result(job.result())
+            finally:
+                self._running.pop(chat_id, None)
+
+    def _finish(self, key: Key, job: "asyncio.Future[Any]") -> None:
+        """Forgets a finished job so the next identical request runs again."""
+        if self._in_flight.get(key) is job:
+            del self._in_flight[key]
+        # Retrieve the outcome of jobs nobody waits for any more.
+        job.cancelled() or job.exception()
@@ -0,0 +1,262 @@
+"""Pool of logged in browser sessions."""
+import logging
+import queue
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Generator, List, Optional
+
+from functions import Functions
+from metrics import set_gauge
+
+logger = logging.getLogger(__name__)
+
+
+class SessionPool:
+    """Keeps a fixed number of logged in Functions sessions warm and leases them to requests."""
+
+    def __init__(
+        self,
+        size: int = 2,
+        factory: Callable[[], Functions] = Functions,
+        max_uses: int = 50,
+        health_check_interval: float = 300.0,
+    ):
+        """Initializes the pool without starting any browser.
+
+        Args:
+          size (int): The maximum number of browsers alive at once, which caps the memory used by the pool.
+          factory (Callable[[], Functions]): Creates a new logged in session.
+          max_uses (int): The number of leases after which a browser is closed and replaced, to stop Chrome from growing.
+          health_check_interval (float): Seconds between background checks of idle sessions.
+        """
+        if size < 1:
+            raise ValueError("Pool size must be at least 1.")
+        self.size = size
+        self.factory = factory
+        self.max_uses = max_uses
+        self.health_check_interval = health_check_interval
+
+        self._idle: Deque[Functions] = deque()
+        self._uses: Dict[int, int] = {}
+        self._total = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._returned: "queue.Queue[Optional[Functions]]" = queue.Queue()
+        self._maintenance: Optional[threading.Thread] = None
+
+    @property
+    def occupancy(self) -> int:
+        """The number of sessions currently leased out."""
+        with self._condition:
+            return self._total - len(self._idle)
+
+    def _report_occupancy(self) -> None:
+        """Publishes the number of leased sessions, called with the condition held."""
+        set_gauge("session_pool_occupancy", self._total - len(self._idle))
+
+    def start(self) -> None:
+        """Warms up every session in parallel and starts the background health checks."""
+        with self._condition:
+            missing = self.size - self._total
+            self._total += missing
+
+        workers: List[threading.Thread] = [
+            threading.Thread(target=self._add_session, daemon=True)
+            for _ in range(missing)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self._start_maintenance()
+        logger.info(f"Session pool started with {len(self._idle)} sessions.")
+
+    def _start_maintenance(self) -> None:
+        """Starts the background thread that checks sessions, once."""
+        with self._condition:
+            if self._maintenance is not None:
+                return
+            self._maintenance = threading.Thread(
+                target=self._maintain, name="session-pool", daemon=True
+            )
+        self._maintenance.start()
+
+    def acquire(self, timeout: Optional[float] = None) -> Functions:
+        """Takes an idle session from the pool, creating one if the pool isn't full yet.
+
+        Args:
+          timeout (Optional[float]): Seconds to wait for a session to be released.
+
+        Returns:
+          A logged in session.
+
+        Raises:
+          TimeoutError: If no session became available in time.
+        """
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Session pool is closed.")
+                if self._idle:
+                    session = self._idle.popleft()
+                    self._report_occupancy()
+                    return session
+                if self._total < self.size:
+                    self._total += 1
+                    self._report_occupancy()
+                    break
+                if not self._condition.wait(timeout):
+                    raise TimeoutError("No browser session became available.")
+
+        # Cold start, only paid when the pool was not warmed up.
+        try:
+            session = self.factory()
+        except Exception:
+            with self._condition:
+                self._total -= 1
+                self._condition.notify()
+            raise
+        self._uses[id(session)] = 0
+        return session
+
+    def release(self, session: Functions, healthy: bool = True) -> None:
+        """Hands a session back, making it available to the next lease straight away.
+
+        Sessions whose lease failed, and sessions that reached max_uses, are
+        checked or replaced in the background instead. The others are only
+        checked by the periodic sweep of idle sessions, so releasing never
+        waits for a page load.
+
+        Args:
+          session (Functions): A session returned by acquire.
+          healthy (bool): False if the lease failed, so the session is checked before it is leased again.
+        """
+        self._uses[id(session)] = self._uses.get(id(session), 0) + 1
+        if healthy and self._uses[id(session)] < self.max_uses:
+            self._put_idle(session)
+            return
+        self._start_maintenance()
+        self._returned.put(session)
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None) -> Generator[Functions, None, None]:
+        """Context manager around acquire and release.
+
+        Args:
+          timeout (Optional[float]): Seconds to wait for a session to be released.
+        """
+        session = self.acquire(timeout)
+        healthy = True
+        try:
+            yield session
+        except Exception:
+            healthy = False
+            raise
+        finally:
+            self.release(session, healthy and session.logged_in)
+
+    def close(self) -> None:
+        """Stops the health checks and closes every idle browser."""
+        with self._condition:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._condition.notify_all()
+        self._returned.put(None)
+        for session in idle:
+            self._retire(session)
+        logger.info("Session pool closed.")
+
+    def _add_session(self) -> None:
+        """Creates a session for a slot already counted in the total."""
+        try:
+            session = self.factory()
+        except Exception:
+            logger.exception("Failed to start a browser session.")
+            with self._condition:
+                self._total -= 1
+                self._condition.notify()
+            return
+        self._uses[id(session)] = 0
+        if not session.logged_in and not session.login():
+            self._retire(session)
+            return
+        self._put_idle(session)
+
+    def _put_idle(self, session: Functions) -> None:
+        """Makes a healthy session available to acquire."""
+        with self._condition:
+            if self._closed:
+                closed = True
+            else:
+                closed = False
+                self._idle.append(session)
+                self._report_occupancy()
+                self._condition.notify()
+        if closed:
+            self._retire(session)
+
+    def _retire(self, session: Functions) -> None:
+        """Closes a session and frees its slot."""
+        self._uses.pop(id(session), None)
+        session.quit()
+        with self._condition:
+            self._total -= 1
+            self._report_occupancy()
+            self._condition.notify()
+
+    def _refresh(self, session: Functions) -> None:
+        """Health checks a session and logs it back in if it has expired."""
+        if self._uses.get(id(session), 0) >= self.max_uses:
+            logger.info("Replacing browser session after reaching its maximum uses.")
+            self._retire(session)
+            self._replace()
+            return
+
+        if session.is_logged_in() or session.login():
+            self._put_idle(session)
+            return
+
+        logger.warning("Replacing browser session that could not log back in.")
+        self._retire(session)
+        self._replace()
+
+    def _replace(self) -> None:
+        """Creates a new session for a freed slot."""
+        with self._condition:
+            if self._closed or self._total >= self.size:
+                return
+            self._total += 1
+        self._add_session()
+
+    def _maintain(self) -> None:
+        """Background loop that refreshes sessions whose lease failed and periodically checks idle ones."""
+        while True:
+            try:
+                session = self._returned.get(timeout=self.health_check_interval)
+            except queue.Empty:
+                self._check_idle_sessions()
+                continue
+
+            if session is None:
+                return
+            try:
+                self._refresh(session)
+            except Exception:
+                logger.exception("Error occurred while refreshing a browser session.")
+
+    def _check_idle_sessions(self) -> None:
+        """Takes each idle session out of the pool in turn and refreshes it."""
+        with self._condition:
+            count = len(self._idle)
+        for _ in range(count):
+            with self._condition:
+                if self._closed or not self._idle:
+                    return
+                session = self._idle.popleft()
+            try:
+                self._refresh(session)
+            except Exception:
+                logger.exception("Error occurred while checking a browser session.")
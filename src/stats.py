@@ -0,0 +1,57 @@
+"""Structured request stats written to the stats file by the fileLogger."""
+import json
+import logging
+import os
+import random
+import re
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+file_logger = logging.getLogger("fileLogger")
+
+STATS_SAMPLE_RATE = float(os.getenv("STATS_SAMPLE_RATE") or "1")
+
+EVENT_LINE = re.compile(r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),\d+ - (\{.*\})$")
+
+
+def record_event(event: str, sample_rate: Optional[float] = None, **fields: Any) -> bool:
+    """It writes a sampled event as one line of json, like {"event": "request", "query": "MATH 121", "sample_rate": 1.0}.
+
+    Args:
+      event (str): The kind of event, like "request", "download" or "upload".
+      sample_rate (Optional[float]): The share of events written, STATS_SAMPLE_RATE by default.
+      **fields: The details of the event.
+
+    Returns:
+      True if the event was written, False if it was sampled out.
+    """
+    sample_rate = STATS_SAMPLE_RATE if sample_rate is None else sample_rate
+    if sample_rate < 1 and random.random() >= sample_rate:
+        return False
+    if not file_logger.isEnabledFor(logging.INFO):
+        return False
+    file_logger.info(
+        json.dumps({"event": event, **fields, "sample_rate": sample_rate}, ensure_ascii=False)
+    )
+    return True
+
+
+def parse_event(line: str) -> Optional[Tuple[datetime, Dict[str, Any]]]:
+    """It reads an event back from a line of the stats file.
+
+    Args:
+      line (str): A line written by record_event.
+
+    Returns:
+      The time and fields of the event, or None if the line isn't an event.
+    """
+    match = EVENT_LINE.match(line.rstrip("\n"))
+    if match is None:
+        return None
+    try:
+        event = json.loads(match.group(2))
+    except ValueError:
+        return None
+    if not isinstance(event, dict):
+        return None
+    return datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S"), event
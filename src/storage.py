@@ -0,0 +1,181 @@
+"""Storage backends for the shared corpus of past question files."""
+import logging
+import os
+import shutil
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from utils.uuid import generate_6_digits_uuid
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class Storage(ABC):
+    """Interface of a place where past question files are kept by key."""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        """Returns True if a file is stored under key."""
+
+    def upload_file(self, key: str, path: str) -> None:
+        """Stores the file at path under key without reading it all in memory."""
+        with open(path, "rb") as file:
+            self.upload_fileobj(key, file)
+
+    @abstractmethod
+    def upload_fileobj(self, key: str, fileobj: BinaryIO) -> None:
+        """Stores the content of a readable binary stream under key."""
+
+    @abstractmethod
+    def download_file(self, key: str, path: str) -> bool:
+        """Streams the file stored under key to path, returns False if there is none."""
+
+    @abstractmethod
+    def read_range(self, key: str, start: int, end: int) -> bytes:
+        """Returns the bytes from start to end, both included, of the file stored under key."""
+
+    @abstractmethod
+    def url(self, key: str, expires: int = 3600) -> Optional[str]:
+        """Returns a url the file stored under key can be fetched from for expires seconds."""
+
+
+class LocalStorage(Storage):
+    """Keeps files in a folder, shared by bot instances on the same machine or a mounted volume."""
+
+    def __init__(self, root: str):
+        """Creates the folder if needed.
+
+        Args:
+          root (str): The folder files are stored in.
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        """Returns the path of a key, refusing keys that leave the root folder."""
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(os.path.abspath(self.root) + os.sep):
+            raise ValueError(f"Invalid storage key {key}")
+        return path
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self._path(key))
+
+    def upload_fileobj(self, key: str, fileobj: BinaryIO) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique per upload, as threads and processes may store the same key at once.
+        partial_path = f"{path}.{generate_6_digits_uuid()}.part"
+        with open(partial_path, "wb") as file:
+            shutil.copyfileobj(fileobj, file, CHUNK_SIZE)
+        os.replace(partial_path, path)
+
+    def download_file(self, key: str, path: str) -> bool:
+        if not self.exists(key):
+            return False
+        shutil.copyfile(self._path(key), path)
+        return True
+
+    def read_range(self, key: str, start: int, end: int) -> bytes:
+        with open(self._path(key), "rb") as file:
+            file.seek(start)
+            return file.read(end - start + 1)
+
+    def url(self, key: str, expires: int = 3600) -> Optional[str]:
+        return Path(self._path(key)).as_uri() if self.exists(key) else None
+
+
+class S3Storage(Storage):
+    """Keeps files in an S3 compatible bucket, like AWS S3 or MinIO."""
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: Optional[str] = None,
+        client=None,
+    ):
+        """Creates the client, boto3 is only needed when this backend is used.
+
+        Args:
+          bucket (str): The bucket files are stored in.
+          endpoint_url (Optional[str]): The url of an S3 compatible server, AWS by default.
+          client: An existing boto3 S3 client.
+        """
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+        except ImportError as error:
+            raise ImportError(
+                "S3Storage needs boto3, install it with pip install boto3."
+            ) from error
+
+        self.bucket = bucket
+        self.client = client or boto3.client("s3", endpoint_url=endpoint_url)
+        # Files above the threshold are sent as a multipart upload of 8MB parts.
+        self.transfer_config = TransferConfig(
+            multipart_threshold=CHUNK_SIZE, multipart_chunksize=CHUNK_SIZE
+        )
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as error:
+            if error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+                return False
+            raise
+
+    def upload_file(self, key: str, path: str) -> None:
+        self.client.upload_file(
+            path,
+            self.bucket,
+            key,
+            ExtraArgs={"ContentType": "application/pdf"},
+            Config=self.transfer_config,
+        )
+
+    def upload_fileobj(self, key: str, fileobj: BinaryIO) -> None:
+        self.client.upload_fileobj(
+            fileobj,
+            self.bucket,
+            key,
+            ExtraArgs={"ContentType": "application/pdf"},
+            Config=self.transfer_config,
+        )
+
+    def download_file(self, key: str, path: str) -> bool:
+        if not self.exists(key):
+            return False
+        self.client.download_file(self.bucket, key, path, Config=self.transfer_config)
+        return True
+
+    def read_range(self, key: str, start: int, end: int) -> bytes:
+        response = self.client.get_object(
+            Bucket=self.bucket, Key=key, Range=f"bytes={start}-{end}"
+        )
+        return response["Body"].read()
+
+    def url(self, key: str, expires: int = 3600) -> Optional[str]:
+        return self.client.generate_presigned_url(
+            "get_object", Params={"Bucket": self.bucket, "Key": key}, ExpiresIn=expires
+        )
+
+
+def storage_from_env() -> Optional[Storage]:
+    """It returns the storage configured by the S3_BUCKET and S3_ENDPOINT_URL or STORAGE_DIRECTORY variables.
+
+    Returns:
+      The configured storage, or None if none is configured.
+    """
+    bucket = os.getenv("S3_BUCKET")
+    if bucket:
+        return S3Storage(bucket, endpoint_url=os.getenv("S3_ENDPOINT_URL") or None)
+    directory = os.getenv("STORAGE_DIRECTORY")
+    if directory:
+        return LocalStorage(directory)
+    return None
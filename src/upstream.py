@@ -0,0 +1,252 @@
+"""Protects the website from bursts of requests and the bot from a slow or failing website."""
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Optional
+
+import requests
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from metrics import increment, set_gauge
+
+logger = logging.getLogger(__name__)
+
+UPSTREAM_RATE = float(os.getenv("UPSTREAM_RATE") or "5")
+UPSTREAM_BURST = int(os.getenv("UPSTREAM_BURST") or "10")
+UPSTREAM_TIMEOUT = float(os.getenv("UPSTREAM_TIMEOUT") or "15")
+
+
+class UpstreamUnavailableError(requests.RequestException):
+    """Raised instead of contacting the website while it is failing or too busy.
+
+    It is a RequestException, so callers handle it like the website being
+    unreachable.
+    """
+
+
+def is_transient(error: BaseException) -> bool:
+    """It tells whether an error is worth retrying and counts against the website.
+
+    Args:
+      error (BaseException): The error raised by a request.
+
+    Returns:
+      True for timeouts, dropped connections, 429 and 5xx responses, and the
+      browser's network errors like net::ERR_CONNECTION_REFUSED.
+    """
+    if isinstance(error, UpstreamUnavailableError):
+        return False
+    if isinstance(error, requests.HTTPError):
+        status = error.response.status_code if error.response is not None else 500
+        return status == 429 or status >= 500
+    if isinstance(error, TimeoutException):
+        return True
+    if isinstance(error, WebDriverException):
+        return "net::ERR_" in str(error.msg or "")
+    return isinstance(
+        error, (requests.ConnectionError, requests.Timeout, TimeoutError)
+    )
+
+
+class TokenBucket:
+    """Lets through rate requests per second on average and up to burst at once.
+
+    The rate halves on each failure and creeps back up on success, so the
+    bot backs off when the website struggles.
+    """
+
+    def __init__(self, rate: float, burst: int, min_rate: Optional[float] = None):
+        """Initializes a full bucket.
+
+        Args:
+          rate (float): The maximum number of requests per second.
+          burst (int): The number of requests allowed at once.
+          min_rate (Optional[float]): The rate is never lowered below this, a tenth of rate by default.
+        """
+        self.max_rate = rate
+        self.min_rate = min_rate if min_rate is not None else rate / 10
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """It waits for a token.
+
+        Args:
+          timeout (Optional[float]): Seconds to wait at most, forever if None.
+
+        Returns:
+          True if a token was taken, False if none came in time.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def slow_down(self) -> None:
+        """Halves the rate."""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+        set_gauge("upstream_rate", self.rate)
+
+    def speed_up(self) -> None:
+        """Raises the rate by a tenth of the maximum."""
+        with self._lock:
+            if self.rate >= self.max_rate:
+                return
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+        set_gauge("upstream_rate", self.rate)
+
+
+class CircuitBreaker:
+    """Stops calls to the website after repeated failures, letting one through after reset_timeout to check if it recovered."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """Initializes a closed breaker.
+
+        Args:
+          failure_threshold (int): The number of failures in a row that opens the breaker.
+          reset_timeout (float): Seconds the breaker stays open before a trial call.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls are refused."""
+        with self._lock:
+            return (
+                self.opened_at is not None
+                and time.monotonic() - self.opened_at < self.reset_timeout
+            )
+
+    def allow(self) -> bool:
+        """It tells whether a call may go through, letting a single trial call through once reset_timeout has passed."""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self) -> None:
+        """Closes the breaker."""
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info("The website recovered, closing the circuit breaker.")
+                set_gauge("upstream_circuit_open", 0)
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def cancel_trial(self) -> None:
+        """Lets another trial call through, when the last one failed for a reason unrelated to the website."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        """Counts a failure, opening the breaker at the threshold or when the trial call failed."""
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.error("The website keeps failing, opening the circuit breaker.")
+                    set_gauge("upstream_circuit_open", 1)
+                self.opened_at = time.monotonic()
+                self._trial_running = False
+
+
+class Upstream:
+    """Runs every call to the website through a shared rate limit, retries and a circuit breaker."""
+
+    def __init__(
+        self,
+        bucket: Optional[TokenBucket] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        timeout: float = UPSTREAM_TIMEOUT,
+        retries: int = 2,
+        backoff: float = 0.5,
+        max_backoff: float = 5.0,
+    ):
+        """Initializes the guard.
+
+        Args:
+          bucket (Optional[TokenBucket]): The rate limit, UPSTREAM_RATE per second by default.
+          breaker (Optional[CircuitBreaker]): The circuit breaker, a default one if None.
+          timeout (float): Seconds a single call may take, also the longest wait for a token.
+          retries (int): The number of times a transient failure is retried.
+          backoff (float): The base delay in seconds before a retry, doubled on each attempt.
+          max_backoff (float): The longest delay before a retry.
+        """
+        self.bucket = bucket or TokenBucket(UPSTREAM_RATE, UPSTREAM_BURST)
+        self.breaker = breaker or CircuitBreaker()
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def call(self, function: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """It calls the website, retrying transient failures after a jittered delay.
+
+        Args:
+          function (Callable[..., Any]): Makes one request, like session.get.
+
+        Returns:
+          What function returned.
+
+        Raises:
+          UpstreamUnavailableError: If the breaker is open or no token came within timeout.
+        """
+        for attempt in range(self.retries + 1):
+            if not self.bucket.acquire(self.timeout):
+                increment("upstream_rejected_total")
+                raise UpstreamUnavailableError("Too many requests to the website.")
+            if not self.breaker.allow():
+                increment("upstream_rejected_total")
+                raise UpstreamUnavailableError("The website is failing, try again later.")
+            try:
+                result = function(*args, **kwargs)
+            except Exception as error:
+                if isinstance(error, requests.HTTPError) and not is_transient(error):
+                    # The website answered, a 404 doesn't mean it is down.
+                    self.breaker.record_success()
+                    raise
+                if not is_transient(error):
+                    self.breaker.cancel_trial()
+                    raise
+                self.breaker.record_failure()
+                self.bucket.slow_down()
+                if attempt == self.retries:
+                    raise
+                # Full jitter spreads out the retries of concurrent users.
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+                logger.warning(f"Retrying in {delay:.2f}s after {error!r}.")
+                increment("upstream_retries_total")
+                time.sleep(delay)
+            else:
+                self.breaker.record_success()
+                self.bucket.speed_up()
+                return result
+
+
+UPSTREAM = Upstream()
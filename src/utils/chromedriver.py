@@ -0,0 +1,64 @@
+"""Resolve the chromedriver executable once and remember it across restarts."""
+import logging
+import os
+from typing import Optional
+
+from utils.path_separator import get_file_separator
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE = (
+    os.getcwd()
+    + get_file_separator()
+    + "src"
+    + get_file_separator()
+    + "tmp"
+    + get_file_separator()
+    + ".chromedriver_path"
+)
+
+
+def _install_chromedriver() -> str:
+    """Downloads the chromedriver matching the installed Chrome, which may go over the network."""
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    return ChromeDriverManager().install()
+
+
+def _is_executable(path: Optional[str]) -> bool:
+    """Returns True if path is an executable file."""
+    return bool(path) and os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+def get_chromedriver_path(cache_file: str = CACHE_FILE, refresh: bool = False) -> str:
+    """It returns the chromedriver to use, from CHROMEDRIVER_PATH, the cache file, or webdriver_manager as a last resort.
+
+    Args:
+      cache_file (str): Where the path resolved by webdriver_manager is remembered.
+      refresh (bool): Ignore the cache file, when the browser failed to start with the driver it named.
+
+    Returns:
+      The path of the chromedriver executable.
+    """
+    path = os.getenv("CHROMEDRIVER_PATH")
+    if _is_executable(path):
+        return path
+
+    if not refresh:
+        try:
+            with open(cache_file) as file:
+                path = file.read().strip()
+            if _is_executable(path):
+                return path
+        except OSError:
+            pass
+
+    path = _install_chromedriver()
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with open(cache_file, "w") as file:
+            file.write(path)
+    except OSError:
+        logger.warning(f"Failed to remember the chromedriver path in {cache_file}")
+    logger.info(f"Resolved chromedriver to {path}")
+    return path
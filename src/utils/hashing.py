@@ -0,0 +1,11 @@
+"""Hash files without loading them in memory."""
+import hashlib
+
+
+def sha256_of_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Return the hex sha256 digest of the file at path."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,195 @@
+"""Warm the caches with the most requested past questions during off-peak hours."""
+import glob
+import logging
+import os
+import re
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pdf_cache import PdfCache
+from records import PastQuestionRecord
+from search_cache import SearchCache, normalise_query
+from stats import parse_event
+
+logger = logging.getLogger(__name__)
+
+# The free text lines written before the stats became json events.
+REQUEST_LINE = re.compile(
+    r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),\d+ - User has requested for (.+) past question\.$"
+)
+
+
+def count_requested_queries(
+    stats_file: str = "stats_file.log", since: Optional[datetime] = None
+) -> Counter:
+    """It counts how often each query was requested, from the events the scrapers write to the stats file and its rotated backups.
+
+    A sampled event counts as the number of requests it stands for.
+
+    Args:
+      stats_file (str): The file written by the fileLogger.
+      since (Optional[datetime]): Only count requests made after this time.
+
+    Returns:
+      A counter of normalised queries.
+    """
+    requested_queries: Counter = Counter()
+    stats_files = glob.glob(glob.escape(stats_file) + ".[0-9]*") + [stats_file]
+    if not any(os.path.exists(path) for path in stats_files):
+        logger.warning(f"No stats file found at {stats_file}")
+        return requested_queries
+
+    for path in stats_files:
+        try:
+            with open(path, encoding="utf-8", errors="replace") as file:
+                for line in file:
+                    request = _parse_request(line)
+                    if request is None:
+                        continue
+                    requested_at, query, weight = request
+                    if since is not None and requested_at < since:
+                        continue
+                    requested_queries[normalise_query(query)] += weight
+        except FileNotFoundError:
+            continue
+    return requested_queries
+
+
+def _parse_request(line: str) -> Optional[Tuple[datetime, str, float]]:
+    """Reads the time, query and weight of a request event or an older request line."""
+    event = parse_event(line)
+    if event is not None:
+        requested_at, fields = event
+        if fields.get("event") != "request" or not fields.get("query"):
+            return None
+        return requested_at, fields["query"], 1 / (fields.get("sample_rate") or 1)
+
+    request = REQUEST_LINE.match(line.rstrip("\n"))
+    if request is None:
+        return None
+    return datetime.strptime(request.group(1), "%Y-%m-%d %H:%M:%S"), request.group(2), 1
+
+
+class CacheWarmer:
+    """Refreshes the search results and files of the hottest queries within a budget."""
+
+    def __init__(
+        self,
+        search: Callable[..., List[PastQuestionRecord]],
+        search_cache: SearchCache,
+        download: Optional[Callable[[str], Optional[str]]] = None,
+        pdf_cache: Optional[PdfCache] = None,
+        stats_file: str = "stats_file.log",
+        max_queries: int = 20,
+        max_downloads: int = 50,
+        off_peak_hours: Tuple[int, int] = (1, 6),
+        lookback: timedelta = timedelta(days=30),
+    ):
+        """Initializes the warmer.
+
+        Args:
+          search (Callable[..., List[PastQuestionRecord]]): Searches the website, like HttpScraper.search, called with record=False so warming isn't counted as demand.
+          search_cache (SearchCache): The cache the results are stored in.
+          download (Optional[Callable[[str], Optional[str]]]): Downloads a detail link into the pdf cache, like HttpScraper.download_past_question.
+          pdf_cache (Optional[PdfCache]): Used to skip files that are already cached.
+          stats_file (str): The file written by the fileLogger.
+          max_queries (int): The number of hot queries refreshed per run.
+          max_downloads (int): The number of files downloaded per run.
+          off_peak_hours (Tuple[int, int]): The local hours, start included and end excluded, in which runs happen.
+          lookback (timedelta): How far back requests are counted.
+        """
+        self.search = search
+        self.search_cache = search_cache
+        self.download = download
+        self.pdf_cache = pdf_cache
+        self.stats_file = stats_file
+        self.max_queries = max_queries
+        self.max_downloads = max_downloads
+        self.off_peak_hours = off_peak_hours
+        self.lookback = lookback
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def hot_queries(self) -> List[str]:
+        """It ranks the queries requested within the lookback.
+
+        Returns:
+          The most requested queries, hottest first.
+        """
+        requested_queries = count_requested_queries(
+            self.stats_file, since=datetime.now() - self.lookback
+        )
+        return [query for query, _ in requested_queries.most_common(self.max_queries)]
+
+    def warm(self) -> Dict[str, int]:
+        """It refreshes the results of the hot queries and downloads their files until the budget runs out.
+
+        Returns:
+          The number of queries refreshed and files downloaded.
+        """
+        warmed = {"queries": 0, "downloads": 0}
+        for query in self.hot_queries():
+            if self._stop.is_set():
+                break
+            try:
+                # Not counted as a request, or the warmed queries would stay hot because they were warmed.
+                past_question_records = self.search(query, record=False)
+            except Exception:
+                logger.exception(f"Failed to warm {query}")
+                continue
+            self.search_cache.set(query, past_question_records)
+            warmed["queries"] += 1
+
+            if self.download is None:
+                continue
+            for past_question_record in past_question_records:
+                if warmed["downloads"] >= self.max_downloads or self._stop.is_set():
+                    break
+                if self.pdf_cache is not None and self.pdf_cache.get(
+                    past_question_record.record_id
+                ):
+                    continue
+                if self.download(past_question_record.link) is not None:
+                    warmed["downloads"] += 1
+
+        logger.info(
+            f"Warmed {warmed['queries']} queries and downloaded {warmed['downloads']} files."
+        )
+        return warmed
+
+    def is_off_peak(self, now: Optional[datetime] = None) -> bool:
+        """Returns True if now falls in the off-peak hours."""
+        start, end = self.off_peak_hours
+        hour = (now or datetime.now()).hour
+        if start <= end:
+            return start <= hour < end
+        return hour >= start or hour < end
+
+    def start(self) -> None:
+        """Starts a background thread that warms the caches once per off-peak window."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cache-warmer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops the background thread after the current query."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        """Background loop, warming at most once per day."""
+        last_run: Optional[datetime] = None
+        while not self._stop.is_set():
+            now = datetime.now()
+            if self.is_off_peak(now) and (
+                last_run is None or now - last_run > timedelta(hours=12)
+            ):
+                last_run = now
+                self.warm()
+            self._stop.wait(timeout=5 * 60)
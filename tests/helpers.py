@@ -14,3 +14,8 @@ def count_pdfs_in_path(path):
         if os.path.splitext(filename)[1] == ".pdf":
             pdf_count += 1
     return pdf_count
+
+
+def read_fixture(name):
+    with open(os.path.join(os.path.dirname(__file__), "fixtures", name), "rb") as file:
+        return file.read()
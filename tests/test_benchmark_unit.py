@@ -0,0 +1,80 @@
+"""Benchmark Unit Tests."""
+import pytest
+import requests
+
+import http_scraper
+from benchmark import LOGIN_URL, SITE_URL, Benchmark, compare, summarise
+from fake_site import FakeSite, redirect_session
+
+
+@pytest.fixture
+def site():
+    with FakeSite(pdf_size=64 * 1024) as site:
+        yield site
+
+
+@pytest.fixture
+def benchmark(site, tmp_path, monkeypatch):
+    monkeypatch.setattr(http_scraper, "URL", LOGIN_URL)
+    return Benchmark(site, str(tmp_path))
+
+
+@pytest.mark.unit
+def test_fake_site_needs_login_unit(site):
+    """Test if the stand-in shows results to anyone but detail pages only to a logged in session."""
+    session = redirect_session(requests.Session(), SITE_URL, site.url)
+    search_url = f"{SITE_URL}/past.exampapers/index.php?keywords=MATH&search=search"
+    detail_url = f"{SITE_URL}/past.exampapers/index.php?p=show_detail&id=9799"
+
+    response = session.get(search_url)
+    assert response.url == search_url
+    assert "biblioRecord" in response.text
+    assert "memberPassWord" in session.get(detail_url).text
+
+    session.post(LOGIN_URL, data={"memberID": "1", "memberPassWord": "2"})
+    assert "openPopUp" in session.get(detail_url).text
+
+
+@pytest.mark.unit
+def test_scraper_against_fake_site_unit(benchmark, tmp_path):
+    """Test if the scraper logs in, reads every page of results and downloads a pdf from the stand-in."""
+    scraper = benchmark.new_scraper()
+
+    assert scraper.login()
+    past_question_records = scraper.search("MATH 121")
+    assert len(past_question_records) == 30
+    user_file = scraper.download_past_question(past_question_records[0].link)
+    with open(user_file, "rb") as file:
+        content = file.read()
+    assert content.startswith(b"%PDF")
+    assert len(content) == 64 * 1024
+
+
+@pytest.mark.unit
+def test_throughput_unit(benchmark):
+    """Test if concurrent users each complete their sessions."""
+    throughput = benchmark.throughput(users=3, sessions_per_user=2)
+
+    assert throughput["sessions"] == 6
+    assert throughput["sessions_per_second"] > 0
+
+
+@pytest.mark.unit
+def test_compare_reports_regressions_unit():
+    """Test if compare reports the stages, throughput and memory that got worse than the tolerance."""
+    baseline = {
+        "stages": {"search": summarise([0.1]), "download": summarise([0.2])},
+        "throughput": {"sessions_per_second": 10.0},
+        "memory": {"peak_python_mb": 5.0},
+    }
+    current = {
+        "stages": {"search": summarise([0.15]), "download": summarise([0.21])},
+        "throughput": {"sessions_per_second": 9.5},
+        "memory": {"peak_python_mb": 8.0},
+    }
+
+    regressions = compare(baseline, current, tolerance=0.2)
+
+    assert len(regressions) == 2
+    assert regressions[0].startswith("search p50")
+    assert regressions[1].startswith("peak python memory")
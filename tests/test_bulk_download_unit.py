@@ -0,0 +1,94 @@
+"""Bulk Download Unit Tests."""
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from bulk_download import browser_download, download_all
+
+LINKS = [f"https://balme.ug.edu.gh/index.php?p=show_detail&id={id}" for id in range(8)]
+
+
+@pytest.mark.unit
+def test_files_are_yielded_as_they_complete_unit():
+    """Test if a fast download isn't held back by a slow one."""
+
+    def download(link):
+        time.sleep(0.1 if link.endswith("id=0") else 0.01)
+        return link.rsplit("=", 1)[1] + ".pdf"
+
+    files = list(download_all(LINKS[:3], download, max_workers=3))
+    assert files[-1] == "0.pdf"
+    assert sorted(files) == ["0.pdf", "1.pdf", "2.pdf"]
+
+
+@pytest.mark.unit
+def test_concurrency_is_bounded_unit():
+    """Test if no more than max_workers downloads run at once."""
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def download(link):
+        with lock:
+            active.append(link)
+            peak.append(len(active))
+        time.sleep(0.02)
+        with lock:
+            active.remove(link)
+        return link
+
+    start = time.monotonic()
+    assert len(list(download_all(LINKS, download, max_workers=4))) == len(LINKS)
+    assert max(peak) == 4
+    assert time.monotonic() - start < 0.15
+
+
+@pytest.mark.unit
+def test_transient_failures_are_retried_unit():
+    """Test if a download that fails once is retried and one that always fails is reported."""
+    attempts = {}
+    reports = []
+
+    def download(link):
+        attempts[link] = attempts.get(link, 0) + 1
+        if link == LINKS[0] and attempts[link] == 1:
+            raise ConnectionError(link)
+        if link == LINKS[1]:
+            return None
+        return "file.pdf"
+
+    files = list(
+        download_all(
+            LINKS[:2],
+            download,
+            retries=2,
+            backoff=0,
+            progress=lambda done, total, link, path: reports.append((done, total, path)),
+        )
+    )
+    assert files == ["file.pdf"]
+    assert attempts == {LINKS[0]: 2, LINKS[1]: 3}
+    assert [report[:2] for report in reports] == [(1, 2), (2, 2)]
+    assert {report[2] for report in reports} == {"file.pdf", None}
+
+
+@pytest.mark.unit
+def test_browser_download_leases_a_session_unit():
+    """Test if each download runs on a browser leased from the pool."""
+    leased = []
+
+    class FakeBrowser:
+        def get_past_question_file(self, link):
+            return link + ".pdf"
+
+    class FakePool:
+        @contextmanager
+        def lease(self):
+            leased.append(True)
+            yield FakeBrowser()
+
+    download = browser_download(FakePool())
+    assert download("a") == "a.pdf"
+    assert leased == [True]
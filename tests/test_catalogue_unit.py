@@ -0,0 +1,60 @@
+"""Catalogue Unit Tests."""
+import pytest
+from helpers import read_fixture
+
+from catalogue import CatalogueCrawler, CatalogueIndex
+
+START_URL = "https://balme.ug.edu.gh/past.exampapers/index.php?keywords=&search=search"
+PAGES = {
+    START_URL: "catalogue_page_1.html",
+    START_URL + "&page=2": "catalogue_page_2.html",
+}
+
+
+@pytest.fixture
+def fetched():
+    return []
+
+
+@pytest.fixture
+def crawler(fetched):
+    def fetch(url):
+        fetched.append(url)
+        return read_fixture(PAGES[url])
+
+    return CatalogueCrawler(CatalogueIndex(":memory:"), fetch, START_URL)
+
+
+@pytest.mark.unit
+def test_crawl_follows_next_page_links_unit(crawler, fetched):
+    """Test if every page of the catalogue is indexed."""
+    assert crawler.crawl() == 3
+    assert fetched == [START_URL, START_URL + "&page=2"]
+    assert len(crawler.index) == 3
+
+
+@pytest.mark.unit
+def test_incremental_crawl_stops_at_known_records_unit(crawler, fetched):
+    """Test if a re-crawl stops at the first page without new records."""
+    crawler.crawl()
+    fetched.clear()
+    assert crawler.crawl() == 0
+    assert fetched == [START_URL]
+
+
+@pytest.mark.parametrize(
+    "query,expected_years",
+    [
+        ("math121", ["2019", "2018"]),
+        ("Math 121 ", ["2019", "2018"]),
+        ("critical thinking", ["2017"]),
+        ("trigonometry", ["2019", "2018"]),
+        ("MATH 999", []),
+        ('"', []),
+    ],
+)
+@pytest.mark.unit
+def test_search_answers_from_index_unit(crawler, query, expected_years):
+    """Test if course codes and title words are found in the index."""
+    crawler.crawl()
+    assert [record.year for record in crawler.index.search(query)] == expected_years
@@ -0,0 +1,85 @@
+"""Chat State Unit Tests."""
+import asyncio
+
+import pytest
+
+from chat_state import ChatStateStore
+from records import PastQuestionRecord
+from search_cache import MemoryBackend
+from service import ChoiceError, PastQuestionService
+
+LINK = "https://balme.ug.edu.gh/past.exampapers/index.php?p=show_detail&id={}"
+RECORDS = [
+    PastQuestionRecord(
+        title="MATH 121: Algebra", year=year, semester="First Semester", link=LINK.format(id)
+    )
+    for year, id in [("2019", 9731), ("2018", 9730)]
+]
+
+
+@pytest.mark.unit
+def test_resolve_choice_unit():
+    """Test if a choice resolves to the link of the record shown under that number."""
+    store = ChatStateStore()
+    store.set_results(1, RECORDS)
+
+    assert store.resolve(1, 1) == LINK.format(9731)
+    assert store.resolve(1, 2) == LINK.format(9730)
+    assert store.resolve(1, 3) is None
+    assert store.resolve(1, 0) is None
+    assert store.resolve(2, 1) is None
+    assert store.get_links(1) == {1: LINK.format(9731), 2: LINK.format(9730)}
+
+
+@pytest.mark.unit
+def test_results_expire_unit():
+    """Test if a chat's results are forgotten after the ttl."""
+    store = ChatStateStore(ttl=0)
+    store.set_results(1, RECORDS)
+
+    assert store.get_results(1) is None
+    assert store.backend.get("1") is None
+
+
+@pytest.mark.unit
+def test_least_recently_used_chat_is_evicted_unit():
+    """Test if the chat idle the longest is evicted once the store is full."""
+    store = ChatStateStore(MemoryBackend(max_entries=2))
+    store.set_results(1, RECORDS)
+    store.set_results(2, RECORDS)
+    store.get_results(1)
+    store.set_results(3, RECORDS)
+
+    assert store.get_results(1) == RECORDS
+    assert store.get_results(2) is None
+    assert store.get_results(3) == RECORDS
+
+
+@pytest.mark.unit
+def test_persistent_store_survives_restart_unit(tmp_path):
+    """Test if results kept in sqlite are read back by a new store."""
+    path = str(tmp_path / "state.sqlite3")
+    ChatStateStore.persistent(path).set_results(1, RECORDS)
+
+    assert ChatStateStore.persistent(path).get_results(1) == RECORDS
+
+
+@pytest.mark.unit
+def test_service_downloads_choice_unit():
+    """Test if the service remembers a chat's results and downloads the chosen one."""
+
+    async def run():
+        service = PastQuestionService(
+            lambda query: RECORDS, lambda link: link, state=ChatStateStore()
+        )
+        try:
+            await service.search(1, "MATH 121")
+            assert await service.download_choice(1, 2) == LINK.format(9730)
+            with pytest.raises(ChoiceError):
+                await service.download_choice(1, 3)
+            with pytest.raises(ChoiceError):
+                await service.download_choice(2, 1)
+        finally:
+            service.shutdown()
+
+    asyncio.run(run())
@@ -0,0 +1,73 @@
+"""Chromedriver Unit Tests."""
+import os
+
+import pytest
+
+from utils import chromedriver
+from utils.chromedriver import get_chromedriver_path
+
+
+@pytest.fixture
+def executable(tmp_path):
+    path = tmp_path / "chromedriver"
+    path.write_text("#!/bin/sh\n")
+    path.chmod(0o755)
+    return str(path)
+
+
+@pytest.fixture
+def installs(monkeypatch, executable):
+    calls = []
+
+    def install():
+        calls.append(1)
+        return executable
+
+    monkeypatch.delenv("CHROMEDRIVER_PATH", raising=False)
+    monkeypatch.setattr(chromedriver, "_install_chromedriver", install)
+    return calls
+
+
+@pytest.mark.unit
+def test_path_from_environment_unit(monkeypatch, executable, installs, tmp_path):
+    """Test if CHROMEDRIVER_PATH is used without resolving the driver."""
+    monkeypatch.setenv("CHROMEDRIVER_PATH", executable)
+
+    assert get_chromedriver_path(str(tmp_path / "cache")) == executable
+    assert installs == []
+
+
+@pytest.mark.unit
+def test_path_is_cached_unit(executable, installs, tmp_path):
+    """Test if the driver is resolved once and read from the cache file afterwards."""
+    cache_file = str(tmp_path / "tmp" / ".chromedriver_path")
+
+    assert get_chromedriver_path(cache_file) == executable
+    assert get_chromedriver_path(cache_file) == executable
+    assert len(installs) == 1
+
+
+@pytest.mark.unit
+def test_stale_cache_is_resolved_again_unit(executable, installs, tmp_path):
+    """Test if a cached path whose driver was removed is resolved again."""
+    cache_file = tmp_path / ".chromedriver_path"
+    cache_file.write_text(str(tmp_path / "removed" / "chromedriver"))
+
+    assert get_chromedriver_path(str(cache_file)) == executable
+    assert len(installs) == 1
+    assert cache_file.read_text() == executable
+    assert os.path.isfile(cache_file.read_text())
+
+
+@pytest.mark.unit
+def test_refresh_ignores_cache_unit(executable, installs, tmp_path):
+    """Test if a refresh resolves the driver again and replaces the cached path."""
+    outdated = tmp_path / "outdated_chromedriver"
+    outdated.write_text("#!/bin/sh\n")
+    outdated.chmod(0o755)
+    cache_file = tmp_path / ".chromedriver_path"
+    cache_file.write_text(str(outdated))
+
+    assert get_chromedriver_path(str(cache_file), refresh=True) == executable
+    assert len(installs) == 1
+    assert cache_file.read_text() == executable
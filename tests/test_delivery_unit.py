@@ -0,0 +1,209 @@
+"""Delivery Unit Tests."""
+import asyncio
+import hashlib
+import io
+import os
+
+import pytest
+import requests
+
+import delivery
+from delivery import open_response, split_pdf, stream_past_question, stream_to_storage
+from file_id_store import FileIdStore
+from storage import LocalStorage
+
+PDF = b"%PDF-1.4 " + bytes(range(256)) * 100
+
+
+def make_response(content):
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = io.BytesIO(content)
+    response.headers["Content-Type"] = "application/pdf"
+    return response
+
+
+class FakeBot:
+    """Records documents and messages sent instead of calling Telegram."""
+
+    def __init__(self):
+        self.documents = []
+        self.messages = []
+
+    async def send_document(self, chat_id, document, filename=None):
+        self.documents.append((filename, document))
+        file_id = f"file-{len(self.documents)}"
+        return type("", (), {"document": type("", (), {"file_id": file_id})()})()
+
+    async def send_message(self, chat_id, text):
+        self.messages.append(text)
+        return text
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalStorage(str(tmp_path / "storage"))
+
+
+@pytest.mark.unit
+def test_response_is_read_in_full_unit():
+    """Test if reads of any size return the body of the response in order."""
+    with open_response(make_response(PDF)) as reader:
+        assert reader.read(5) == PDF[:5]
+        assert reader.read(10000) == PDF[5:10005]
+        assert reader.read() == PDF[10005:]
+
+
+@pytest.mark.unit
+def test_stream_to_storage_unit(storage):
+    """Test if the body of a response is stored under the record's key."""
+    stream_to_storage(make_response(PDF), storage, "9731")
+
+    with open(os.path.join(storage.root, "past_questions", "9731.pdf"), "rb") as file:
+        assert file.read() == PDF
+
+
+@pytest.mark.unit
+def test_small_file_is_sent_and_stored_unit(storage, tmp_path):
+    """Test if a file within the limit is sent and stored, and its file id kept."""
+    bot = FakeBot()
+    store = FileIdStore(str(tmp_path / "file_ids.sqlite3"))
+
+    messages = asyncio.run(
+        stream_past_question(
+            bot, 1, make_response(PDF), "9731", storage=storage, store=store
+        )
+    )
+
+    assert len(messages) == 1
+    assert bot.documents == [("9731.pdf", PDF)]
+    assert storage.read_range("past_questions/9731.pdf", 0, 3) == b"%PDF"
+    assert store.get("9731", hashlib.sha256(PDF).hexdigest()) == "file-1"
+
+
+@pytest.mark.unit
+def test_large_file_is_sent_in_parts_unit(storage, monkeypatch):
+    """Test if a file over the limit is stored and sent as the parts it is split into."""
+    split = []
+
+    def split_pdf(file, limit):
+        split.append(file.read())
+        return [b"%PDF part 1", b"%PDF part 2"]
+
+    monkeypatch.setattr(delivery, "split_pdf", split_pdf)
+    bot = FakeBot()
+
+    asyncio.run(
+        stream_past_question(
+            bot, 1, make_response(PDF), "9731", "MATH 121.pdf", storage=storage, limit=1024
+        )
+    )
+
+    assert split == [PDF]
+    assert bot.documents == [
+        ("MATH 121 (part 1 of 2).pdf", b"%PDF part 1"),
+        ("MATH 121 (part 2 of 2).pdf", b"%PDF part 2"),
+    ]
+    assert storage.exists("past_questions/9731.pdf")
+
+
+class LinkedStorage(LocalStorage):
+    """Serves its files over https, like S3Storage."""
+
+    def url(self, key, expires=3600):
+        return f"https://files.example.com/{key}" if self.exists(key) else None
+
+
+def make_pdf(pages):
+    pypdf = pytest.importorskip("pypdf")
+    writer = pypdf.PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=612, height=792)
+    file = io.BytesIO()
+    writer.write(file)
+    file.seek(0)
+    return file
+
+
+@pytest.mark.unit
+def test_large_file_that_cant_be_split_is_linked_unit(tmp_path, monkeypatch):
+    """Test if a link to storage is sent when a large file can't be split."""
+
+    def split_pdf(file, limit):
+        raise ImportError("pypdf is missing")
+
+    monkeypatch.setattr(delivery, "split_pdf", split_pdf)
+    bot = FakeBot()
+    storage = LinkedStorage(str(tmp_path / "storage"))
+
+    asyncio.run(
+        stream_past_question(bot, 1, make_response(PDF), "9731", storage=storage, limit=1024)
+    )
+
+    assert bot.documents == []
+    assert bot.messages == [
+        "9731.pdf is too large to send here, download it from "
+        "https://files.example.com/past_questions/9731.pdf"
+    ]
+
+
+@pytest.mark.unit
+def test_missing_pypdf_is_reported_unit(storage, monkeypatch, caplog):
+    """Test if a missing pypdf is logged as such rather than as a failure to split the file."""
+
+    def split_pdf(file, limit):
+        raise ImportError("Splitting large past questions needs pypdf.")
+
+    monkeypatch.setattr(delivery, "split_pdf", split_pdf)
+
+    with caplog.at_level("ERROR", logger="delivery"):
+        asyncio.run(
+            stream_past_question(
+                FakeBot(), 1, make_response(PDF), "9731", storage=storage, limit=1024
+            )
+        )
+
+    assert [record.getMessage() for record in caplog.records] == [
+        "Large past questions can't be split: Splitting large past questions needs pypdf."
+    ]
+
+
+@pytest.mark.unit
+def test_local_path_is_never_linked_unit(storage, monkeypatch):
+    """Test if a file kept in local storage isn't linked, as its path is on the server."""
+    monkeypatch.setattr(delivery, "split_pdf", lambda file, limit: [])
+    bot = FakeBot()
+
+    asyncio.run(
+        stream_past_question(bot, 1, make_response(PDF), "9731", storage=storage, limit=1024)
+    )
+
+    assert bot.messages == ["9731.pdf is too large to send here."]
+    assert storage.exists("past_questions/9731.pdf")
+
+
+@pytest.mark.unit
+def test_split_pdf_keeps_every_page_within_limit_unit():
+    """Test if a real pdf is split into parts of whole pages that each fit in the limit."""
+    pypdf = pytest.importorskip("pypdf")
+    file = make_pdf(8)
+    whole = len(file.getvalue())
+    limit = whole // 2
+
+    parts = split_pdf(file, limit)
+
+    assert len(parts) > 1
+    assert all(len(part) <= limit for part in parts)
+    assert sum(len(pypdf.PdfReader(io.BytesIO(part)).pages) for part in parts) == 8
+
+
+@pytest.mark.unit
+def test_split_pdf_keeps_small_file_whole_unit():
+    """Test if a pdf within the limit is returned as a single part with all its pages."""
+    pypdf = pytest.importorskip("pypdf")
+    file = make_pdf(3)
+
+    parts = split_pdf(file, 10 * 1024**2)
+
+    assert len(parts) == 1
+    assert len(pypdf.PdfReader(io.BytesIO(parts[0])).pages) == 3
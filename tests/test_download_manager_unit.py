@@ -0,0 +1,74 @@
+"""Download Manager Unit Tests."""
+import os
+import threading
+import time
+
+import pytest
+
+from download_manager import DownloadManager
+
+
+def finish_download_later(directory, name, delay=0.05):
+    def write():
+        partial_file = os.path.join(directory, name + ".crdownload")
+        with open(partial_file, "wb") as file:
+            file.write(b"%PDF")
+        time.sleep(delay)
+        os.replace(partial_file, os.path.join(directory, name))
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    return thread
+
+
+@pytest.mark.unit
+def test_collect_waits_for_partial_file_to_finish_unit(tmp_path):
+    """Test if the file is only returned once Chrome has renamed the partial download."""
+    manager = DownloadManager(str(tmp_path), timeout=2)
+    directory = manager.new_directory()
+    thread = finish_download_later(directory, "MATH 121.pdf")
+    user_file = manager.collect(directory)
+    thread.join()
+    assert user_file == os.path.join(
+        str(tmp_path), os.path.basename(directory) + "-MATH 121.pdf"
+    )
+    assert os.path.exists(user_file)
+    assert not os.path.exists(directory)
+
+
+@pytest.mark.unit
+def test_concurrent_downloads_get_their_own_files_unit(tmp_path):
+    """Test if two downloads with the same file name finishing together don't swap files."""
+    manager = DownloadManager(str(tmp_path), timeout=2)
+    first, second = manager.new_directory(), manager.new_directory()
+    threads = [
+        finish_download_later(first, "paper.pdf", 0.05),
+        finish_download_later(second, "paper.pdf", 0.01),
+    ]
+    first_file, second_file = manager.collect(first), manager.collect(second)
+    for thread in threads:
+        thread.join()
+    assert first_file != second_file
+    assert os.path.basename(first_file).startswith(os.path.basename(first))
+    assert os.path.basename(second_file).startswith(os.path.basename(second))
+
+
+@pytest.mark.unit
+def test_collect_times_out_and_cleans_up_unit(tmp_path):
+    """Test if an unfinished download returns None and its folder is removed."""
+    manager = DownloadManager(str(tmp_path), timeout=0.05)
+    directory = manager.new_directory()
+    open(os.path.join(directory, "paper.pdf.crdownload"), "wb").close()
+    assert manager.collect(directory) is None
+    assert os.listdir(str(tmp_path)) == []
+
+
+@pytest.mark.unit
+def test_cleanup_removes_abandoned_folders_unit(tmp_path):
+    """Test if old request folders are removed and recent ones kept."""
+    manager = DownloadManager(str(tmp_path))
+    old, recent = manager.new_directory(), manager.new_directory()
+    os.utime(old, (time.time() - 7200, time.time() - 7200))
+    manager.cleanup(max_age=3600)
+    assert not os.path.exists(old)
+    assert os.path.exists(recent)
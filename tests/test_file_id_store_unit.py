@@ -0,0 +1,78 @@
+"""File Id Store Unit Tests."""
+import asyncio
+import hashlib
+
+import pytest
+from telegram.error import BadRequest
+
+from file_id_store import FileIdStore, file_fingerprint, send_past_question
+
+
+class FakeBot:
+    """Records documents sent instead of calling Telegram."""
+
+    def __init__(self, rejected_file_ids=()):
+        self.sent = []
+        self.rejected_file_ids = rejected_file_ids
+
+    async def send_document(self, chat_id, document, filename=None):
+        if isinstance(document, str):
+            if document in self.rejected_file_ids:
+                raise BadRequest("Wrong file identifier")
+            self.sent.append(("file_id", document))
+            file_id = document
+        else:
+            self.sent.append(("upload", document.read()))
+            file_id = f"file-{len(self.sent)}"
+        return type("", (), {"document": type("", (), {"file_id": file_id})()})()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FileIdStore(str(tmp_path / "file_ids.sqlite3"))
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    path = tmp_path / "9731.pdf"
+    path.write_bytes(b"%PDF math")
+    return str(path)
+
+
+@pytest.mark.unit
+def test_second_send_reuses_file_id_unit(store, pdf):
+    """Test if a past question is uploaded once and then sent by reference."""
+    bot = FakeBot()
+    asyncio.run(send_past_question(bot, 1, "9731", pdf, store))
+    asyncio.run(send_past_question(bot, 2, "9731", pdf, store))
+    assert bot.sent == [("upload", b"%PDF math"), ("file_id", "file-1")]
+
+
+@pytest.mark.unit
+def test_changed_file_is_uploaded_again_unit(store, pdf):
+    """Test if a file whose content changed isn't sent with the old file id."""
+    bot = FakeBot()
+    asyncio.run(send_past_question(bot, 1, "9731", pdf, store))
+    with open(pdf, "wb") as file:
+        file.write(b"%PDF new scan")
+    asyncio.run(send_past_question(bot, 1, "9731", pdf, store))
+    assert [kind for kind, _ in bot.sent] == ["upload", "upload"]
+
+
+@pytest.mark.unit
+def test_rejected_file_id_is_replaced_unit(store, pdf):
+    """Test if a file id Telegram no longer accepts is dropped and the file re-uploaded."""
+    store.set("9731", file_fingerprint(pdf), "expired")
+    bot = FakeBot(rejected_file_ids=("expired",))
+    asyncio.run(send_past_question(bot, 1, "9731", pdf, store))
+    assert bot.sent == [("upload", b"%PDF math")]
+    assert store.get("9731", file_fingerprint(pdf)) == "file-1"
+
+
+@pytest.mark.unit
+def test_fingerprint_is_read_from_cached_file_name_unit(tmp_path):
+    """Test if files named by their sha256 aren't hashed again."""
+    sha256 = hashlib.sha256(b"anything").hexdigest()
+    path = tmp_path / f"{sha256}.pdf"
+    path.write_bytes(b"not hashed")
+    assert file_fingerprint(str(path)) == sha256
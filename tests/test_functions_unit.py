@@ -0,0 +1,260 @@
+"""Functions Unit Tests."""
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+import requests
+
+from functions import Functions
+from upstream import CircuitBreaker, Upstream, UpstreamUnavailableError
+
+
+class FakeElement:
+    def send_keys(self, *keys):
+        pass
+
+    def click(self):
+        pass
+
+
+class FakeDriver:
+    current_url = "https://balme.ug.edu.gh/past.exampapers/index.php?p=member"
+
+    def __init__(self):
+        self.visited = []
+        self.closed = False
+
+    def get(self, url):
+        self.visited.append(url)
+
+    def find_element(self, by, value):
+        return FakeElement()
+
+    def quit(self):
+        self.closed = True
+
+
+@pytest.fixture
+def started(monkeypatch):
+    drivers = []
+
+    def start_browser(self):
+        drivers.append(FakeDriver())
+        return drivers[-1]
+
+    monkeypatch.setattr(Functions, "_start_browser", start_browser)
+    return drivers
+
+
+@pytest.mark.unit
+def test_lazy_session_starts_nothing_unit(started):
+    """Test if a lazy session doesn't start the browser until it is needed."""
+    scraper = Functions(lazy=True)
+
+    assert started == []
+    assert scraper.logged_in is False
+    assert scraper.is_logged_in() is False
+    scraper.quit()
+    assert started == []
+
+
+@pytest.mark.unit
+def test_lazy_session_starts_on_search_unit(started):
+    """Test if the first search starts the browser and logs in once."""
+    scraper = Functions(lazy=True)
+
+    assert scraper.search_for_past_question("MATH 121") == 0
+    assert scraper.search_for_past_question("UGRC 150") == 0
+
+    assert len(started) == 1
+    assert scraper.logged_in is True
+    assert len(started[0].visited) == 1
+
+
+@pytest.mark.unit
+def test_eager_session_logs_in_unit(started):
+    """Test if a session that isn't lazy starts the browser and logs in straight away."""
+    scraper = Functions()
+
+    assert len(started) == 1
+    assert scraper.logged_in is True
+    scraper.quit()
+    assert started[0].closed is True
+
+
+@pytest.mark.unit
+def test_lean_options_unit():
+    """Test if the lean profile blocks assets and returns once the html is parsed."""
+    options = Functions(lazy=True, lean=True)._chrome_options()
+    preferences = options.experimental_options["prefs"]
+
+    assert "--blink-settings=imagesEnabled=false" in options.arguments
+    assert options.page_load_strategy == "eager"
+    assert preferences["profile.managed_default_content_settings.images"] == 2
+    assert "profile.managed_default_content_settings.stylesheets" not in preferences
+    assert preferences["download.default_directory"].endswith("tmp")
+
+
+@pytest.mark.unit
+def test_default_options_unit():
+    """Test if the default profile loads pages fully."""
+    options = Functions(lazy=True, lean=False)._chrome_options()
+
+    assert "--blink-settings=imagesEnabled=false" not in options.arguments
+    assert options.page_load_strategy == "normal"
+    assert "profile.managed_default_content_settings.images" not in (
+        options.experimental_options["prefs"]
+    )
+
+
+@pytest.mark.unit
+def test_lean_browser_blocks_urls_unit(monkeypatch):
+    """Test if a lean browser blocks images, stylesheets, fonts and analytics over the network domain."""
+    import functions
+
+    commands = []
+
+    class FakeChrome(FakeDriver):
+        def __init__(self, service, options):
+            super().__init__()
+
+        def implicitly_wait(self, seconds):
+            pass
+
+        def set_page_load_timeout(self, seconds):
+            pass
+
+        def execute_cdp_cmd(self, command, parameters):
+            commands.append((command, parameters))
+
+    monkeypatch.setattr("selenium.webdriver.Chrome", FakeChrome)
+    monkeypatch.setattr(functions, "get_chromedriver_path", lambda: "chromedriver")
+
+    Functions(lazy=True, lean=True)._start_browser()
+
+    assert commands[0] == ("Network.enable", {})
+    blocked_urls = commands[1][1]["urls"]
+    assert commands[1][0] == "Network.setBlockedURLs"
+    assert "*.css" in blocked_urls
+    assert "*.woff2" in blocked_urls
+    assert "*google-analytics.com*" in blocked_urls
+
+
+@pytest.mark.unit
+def test_past_question_list_to_string_records_unit():
+    """Test if records are listed like the strings from get_list_of_past_question."""
+    from records import PastQuestionRecord
+
+    scraper = Functions(lazy=True)
+    record = PastQuestionRecord(
+        title="MATH 121: Algebra",
+        year="2019",
+        semester="First Semester",
+        link="https://balme.ug.edu.gh/past.exampapers/index.php?p=show_detail&id=9731",
+    )
+
+    assert scraper.past_question_list_to_string([record, record]) == (
+        scraper.past_question_list_to_string([record.to_text(), record.to_text()])
+    )
+
+
+@pytest.mark.unit
+def test_fetch_counts_server_errors_as_failures_unit(monkeypatch):
+    """Test if a 5xx response is retried and counted against the website instead of returned."""
+    responses = []
+
+    def get(url, **kwargs):
+        response = requests.Response()
+        response.status_code = 503
+        response.url = url
+        responses.append(response)
+        return response
+
+    monkeypatch.setattr("requests.get", get)
+    scraper = Functions(lazy=True)
+    scraper.upstream = Upstream(
+        breaker=CircuitBreaker(failure_threshold=2), retries=5, backoff=0.001
+    )
+    with pytest.raises(UpstreamUnavailableError):
+        scraper._fetch("https://balme.ug.edu.gh/past.exampapers/")
+    assert len(responses) == 2
+    assert scraper.upstream.breaker.is_open
+
+
+@pytest.mark.unit
+def test_browser_retries_with_fresh_driver_unit(monkeypatch):
+    """Test if the chromedriver is resolved again when Chrome fails to start with the cached one."""
+    import functions
+    from selenium.common.exceptions import SessionNotCreatedException
+
+    paths = []
+
+    class FakeChrome(FakeDriver):
+        def __init__(self, service, options):
+            super().__init__()
+            paths.append(service.path)
+            if service.path == "old_chromedriver":
+                raise SessionNotCreatedException("This version of ChromeDriver only supports Chrome version 1")
+
+        def implicitly_wait(self, seconds):
+            pass
+
+        def set_page_load_timeout(self, seconds):
+            pass
+
+    monkeypatch.setattr("selenium.webdriver.Chrome", FakeChrome)
+    monkeypatch.setattr(
+        functions,
+        "get_chromedriver_path",
+        lambda refresh=False: "new_chromedriver" if refresh else "old_chromedriver",
+    )
+
+    Functions(lazy=True, lean=False)._start_browser()
+
+    assert paths == ["old_chromedriver", "new_chromedriver"]
+
+
+@pytest.mark.unit
+def test_all_past_questions_are_downloaded_on_the_pool_unit():
+    """Test if choosing every past question downloads them concurrently on the pool's browsers."""
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    class FakeBrowser:
+        def get_past_question_file(self, link):
+            with lock:
+                running.append(link)
+                peak.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(link)
+            return link + ".pdf"
+
+    class FakePool:
+        size = 3
+
+        @contextmanager
+        def lease(self):
+            yield FakeBrowser()
+
+    links = {1: "a", 2: "b", 3: "c"}
+    done = []
+    files = Functions(lazy=True).get_past_question(
+        links, -1, pool=FakePool(), progress=lambda *args: done.append(args[0])
+    )
+
+    assert sorted(files) == ["a.pdf", "b.pdf", "c.pdf"]
+    assert max(peak) == 3
+    assert done == [1, 2, 3]
+
+
+@pytest.mark.unit
+def test_all_past_questions_are_downloaded_one_at_a_time_without_pool_unit(monkeypatch):
+    """Test if choosing every past question without a pool downloads them in turn on the session's browser."""
+    monkeypatch.setattr(Functions, "get_past_question_file", lambda self, link: link + ".pdf")
+
+    files = Functions(lazy=True).get_past_question({1: "a", 2: "b"}, -1)
+
+    assert list(files) == ["a.pdf", "b.pdf"]
@@ -0,0 +1,237 @@
+"""Http Scraper Unit Tests."""
+import io
+import os
+from contextlib import contextmanager
+
+import pytest
+import requests
+
+import http_scraper
+from catalogue import CatalogueIndex
+from http_scraper import HttpScraper
+from pdf_cache import PdfCache
+from records import PastQuestionRecord
+from upstream import CircuitBreaker, Upstream
+
+SEARCH_URL = "https://balme.ug.edu.gh/past.exampapers/index.php"
+DETAIL_URL = SEARCH_URL + "?p=show_detail&id=9731"
+
+LOGIN_PAGE = """<form action="index.php?p=member" method="post">
+    <input type="hidden" name="csrf_token" value="abc">
+    <input type="text" name="memberID">
+    <input type="password" name="memberPassWord">
+    <input type="submit" name="logMeIn" value="Login">
+</form>"""
+
+RESULTS_PAGE = """<div class="item biblioRecord">
+    <a href="/past.exampapers/index.php?p=show_detail&amp;id=9731" class="titleField">MATH 121: Algebra</a>
+    <div class="customField isbnField">2019</div>
+    <div class="customField collationField">First Semester</div>
+</div>"""
+
+DETAIL_PAGE = """<a class="openPopUp" href="index.php?p=fstream&amp;fid=1&amp;bid=9731">MATH 121</a>"""
+
+VIEWER_PAGE = """<iframe src="js/pdfjs/web/viewer.html?file=index.php%3Fp%3Dfstream-pdf%26fid%3D1%26bid%3D9731"></iframe>"""
+
+
+def make_response(url, content, content_type="text/html"):
+    response = requests.Response()
+    response.url = url
+    response.status_code = 200
+    response.raw = io.BytesIO(content.encode() if isinstance(content, str) else content)
+    response.headers["Content-Type"] = content_type
+    return response
+
+
+class FakeSession:
+    """Serves canned pages instead of the website."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.requests = []
+        self.posted = None
+
+    def get(self, url, params=None, **kwargs):
+        if params:
+            url = url + "?" + "&".join(f"{key}={value}" for key, value in params.items())
+        self.requests.append(url)
+        for prefix, (content, content_type) in self.pages.items():
+            if url.startswith(prefix):
+                return make_response(url, content, content_type)
+        raise requests.ConnectionError(url)
+
+    def post(self, url, data=None, **kwargs):
+        self.posted = (url, data)
+        return make_response(url, '<a id="memberLogout">Logout</a>')
+
+
+@pytest.fixture
+def scraper(tmp_path, monkeypatch):
+    monkeypatch.setattr(http_scraper, "URL", SEARCH_URL + "?p=member")
+    monkeypatch.setattr(http_scraper, "USERNAME", "10000000")
+    monkeypatch.setattr(http_scraper, "PASSWORD", "secret\n")
+    session = FakeSession(
+        {
+            SEARCH_URL + "?p=member": (LOGIN_PAGE, "text/html"),
+            SEARCH_URL + "?keywords": (RESULTS_PAGE, "text/html"),
+            DETAIL_URL: (DETAIL_PAGE, "text/html"),
+            SEARCH_URL + "?p=fstream-pdf": (b"%PDF-1.4 test", "application/pdf"),
+            SEARCH_URL + "?p=fstream": (VIEWER_PAGE, "text/html"),
+        }
+    )
+    scraper = HttpScraper(session=session, upstream=Upstream(retries=0))
+    scraper.path = str(tmp_path)
+    return scraper
+
+
+@pytest.mark.unit
+def test_login_posts_credentials_and_hidden_fields_unit(scraper):
+    """Test if logging in keeps the hidden form fields and strips the password newline."""
+    assert scraper.login() is True
+    url, data = scraper.session.posted
+    assert url == SEARCH_URL + "?p=member"
+    assert data == {
+        "csrf_token": "abc",
+        "logMeIn": "Login",
+        "memberID": "10000000",
+        "memberPassWord": "secret",
+    }
+
+
+@pytest.mark.unit
+def test_search_fetches_results_page_once_unit(scraper):
+    """Test if the list and links are parsed from the page fetched by the search."""
+    assert scraper.search_for_past_question("MATH 121") == 0
+    assert scraper.get_list_of_past_question() == [
+        "MATH 121: Algebra\n2019\nFirst Semester"
+    ]
+    assert scraper.get_links_of_past_question() == {
+        1: "https://balme.ug.edu.gh/past.exampapers/index.php?p=show_detail&id=9731"
+    }
+    assert len(scraper.session.requests) == 1
+
+
+@pytest.mark.unit
+def test_get_list_without_search_unit(scraper):
+    """Test if nothing is returned before a search is made."""
+    assert scraper.get_list_of_past_question() == []
+    assert scraper.get_links_of_past_question() == {}
+
+
+@pytest.mark.unit
+def test_download_follows_viewer_to_pdf_unit(scraper):
+    """Test if the pdf behind the popup viewer is saved under its record id."""
+    user_file = scraper.download_past_question(DETAIL_URL)
+    assert os.path.dirname(user_file) == scraper.path
+    assert os.path.basename(user_file).startswith("9731-")
+    assert user_file.endswith(".pdf")
+    with open(user_file, "rb") as file:
+        assert file.read() == b"%PDF-1.4 test"
+    assert os.listdir(scraper.path) == [os.path.basename(user_file)]
+
+
+@pytest.mark.unit
+def test_overlapping_downloads_of_one_record_unit(scraper, tmp_path):
+    """Test if two downloads of the same record keep their own files until both are cached."""
+    cache = PdfCache(str(tmp_path / "cache"))
+    first_file = scraper._save(make_response(DETAIL_URL, b"%PDF-1.4 test"), DETAIL_URL)
+    second_file = scraper._save(make_response(DETAIL_URL, b"%PDF-1.4 test"), DETAIL_URL)
+    assert first_file != second_file
+
+    first_cached = cache.put("9731", first_file)
+    second_cached = cache.put("9731", second_file)
+
+    assert first_cached == second_cached
+    assert os.path.exists(first_cached)
+    assert not os.path.exists(second_file)
+
+
+@pytest.mark.unit
+def test_download_falls_back_to_browser_unit(scraper):
+    """Test if a browser session is used when the file can't be fetched over http."""
+    visited = []
+
+    class FakeBrowser:
+        def get_past_question_file(self, link):
+            visited.append(link)
+            return os.path.join(scraper.path, "browser.pdf")
+
+    class FakePool:
+        @contextmanager
+        def lease(self):
+            yield FakeBrowser()
+
+    scraper.fallback = FakePool()
+    missing_link = SEARCH_URL + "?p=show_detail&id=1"
+    user_file = scraper.download_past_question(missing_link)
+    assert visited == [missing_link]
+    assert user_file == os.path.join(scraper.path, "browser.pdf")
+
+
+@pytest.mark.unit
+def test_search_returns_records_unit(scraper):
+    """Test if search returns the records of the results page."""
+    records = scraper.search("MATH 121")
+    assert [record.link for record in records] == [
+        "https://balme.ug.edu.gh/past.exampapers/index.php?p=show_detail&id=9731"
+    ]
+    assert records[0].to_text() == "MATH 121: Algebra\n2019\nFirst Semester"
+
+
+@pytest.mark.unit
+def test_download_is_served_from_cache_unit(scraper, tmp_path):
+    """Test if a cached past question is returned without contacting the website."""
+    scraper.cache = PdfCache(str(tmp_path / "cache"))
+    first_file = scraper.download_past_question(DETAIL_URL)
+    requests_made = len(scraper.session.requests)
+    assert scraper.download_past_question(DETAIL_URL) == first_file
+    assert len(scraper.session.requests) == requests_made
+
+
+@pytest.mark.unit
+def test_search_is_answered_from_catalogue_index_unit(scraper):
+    """Test if an indexed course is found without contacting the website."""
+    scraper.index = CatalogueIndex(":memory:")
+    scraper.index.upsert(
+        [
+            PastQuestionRecord(
+                title="MATH 121: Algebra",
+                year="2019",
+                semester="First Semester",
+                link=DETAIL_URL,
+            )
+        ]
+    )
+    assert scraper.get_links_of_past_question() == {}
+    assert scraper.search_for_past_question("math121") == 0
+    assert scraper.get_links_of_past_question() == {1: DETAIL_URL}
+    assert scraper.session.requests == []
+
+
+@pytest.mark.unit
+def test_open_circuit_skips_website_and_browser_unit(scraper):
+    """Test if a failing website isn't contacted again, nor through the browser fallback."""
+    visited = []
+
+    class FakePool:
+        @contextmanager
+        def lease(self):
+            visited.append("browser")
+            yield None
+
+    scraper.fallback = FakePool()
+    scraper.upstream = Upstream(breaker=CircuitBreaker(failure_threshold=1), retries=0)
+    missing_link = SEARCH_URL + "?p=show_detail&id=1"
+
+    assert scraper.download_past_question(missing_link) is None
+    assert visited == []
+    assert scraper.search("MATH 121") == []
+    assert scraper.session.requests == [missing_link]
+
+
+@pytest.mark.unit
+def test_open_past_question_returns_unread_pdf_unit(scraper):
+    """Test if the pdf response is returned for streaming without anything saved to disk."""
+    with scraper.open_past_question(DETAIL_URL) as response:
+        assert response.content == b"%PDF-1.4 test"
+    assert os.listdir(scraper.path) == []
@@ -0,0 +1,95 @@
+"""Logging Setup Unit Tests."""
+import logging
+import queue
+import time
+
+import pytest
+
+from logging_setup import BatchingRotatingFileHandler, DroppingQueueHandler, make_asynchronous
+
+
+@pytest.fixture
+def stats_logger():
+    stats_logger = logging.getLogger("test_stats")
+    stats_logger.propagate = False
+    stats_logger.setLevel(logging.INFO)
+    yield stats_logger
+    for handler in stats_logger.handlers:
+        handler.close()
+    stats_logger.handlers = []
+
+
+@pytest.mark.unit
+def test_file_is_flushed_per_batch_unit(stats_logger, tmp_path):
+    """Test if records reach the file once a batch is full, and the rest on close."""
+    path = tmp_path / "stats_file.log"
+    handler = BatchingRotatingFileHandler(str(path), batch_size=3, flush_interval=60)
+    stats_logger.addHandler(handler)
+
+    stats_logger.info("first")
+    stats_logger.info("second")
+    assert not path.exists() or path.read_text() == ""
+    stats_logger.info("third")
+    assert path.read_text() == "first\nsecond\nthird\n"
+    stats_logger.info("fourth")
+    handler.close()
+    assert path.read_text().endswith("fourth\n")
+
+
+@pytest.mark.unit
+def test_last_batch_is_flushed_by_timer_unit(stats_logger, tmp_path):
+    """Test if records reach the file after flush_interval even when no other record follows."""
+    path = tmp_path / "stats_file.log"
+    stats_logger.addHandler(
+        BatchingRotatingFileHandler(str(path), batch_size=50, flush_interval=0.05)
+    )
+
+    stats_logger.info("last")
+    deadline = time.monotonic() + 2
+    while (not path.exists() or path.read_text() == "") and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert path.read_text() == "last\n"
+
+
+@pytest.mark.unit
+def test_file_is_rotated_by_size_unit(stats_logger, tmp_path):
+    """Test if the file is rotated at maxBytes and only backupCount files are kept."""
+    path = tmp_path / "stats_file.log"
+    stats_logger.addHandler(
+        BatchingRotatingFileHandler(str(path), maxBytes=100, backupCount=2, batch_size=1)
+    )
+    for number in range(50):
+        stats_logger.info(f"record {number:02}")
+
+    assert sorted(file.name for file in tmp_path.iterdir()) == [
+        "stats_file.log",
+        "stats_file.log.1",
+        "stats_file.log.2",
+    ]
+    assert path.stat().st_size <= 100
+
+
+@pytest.mark.unit
+def test_records_are_written_by_listener_unit(stats_logger, tmp_path):
+    """Test if a logger made asynchronous hands its records to its old handlers on another thread."""
+    path = tmp_path / "stats_file.log"
+    stats_logger.addHandler(BatchingRotatingFileHandler(str(path)))
+    listener = make_asynchronous(stats_logger)
+
+    assert isinstance(stats_logger.handlers[0], DroppingQueueHandler)
+    stats_logger.info("User has requested for MATH 121 past question.")
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+    assert path.read_text() == "User has requested for MATH 121 past question.\n"
+
+
+@pytest.mark.unit
+def test_full_queue_drops_records_unit():
+    """Test if records are dropped rather than blocking when the queue is full."""
+    handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+    record = logging.LogRecord("test_stats", logging.INFO, __file__, 1, "stat", None, None)
+    handler.handle(record)
+    handler.handle(record)
+
+    assert handler.dropped == 1
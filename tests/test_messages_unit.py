@@ -0,0 +1,50 @@
+"""Messages Unit Tests."""
+import pytest
+
+from messages import TELEGRAM_MESSAGE_LIMIT, format_past_question_list
+from records import PastQuestionRecord
+
+
+def make_records(count, title="MATH 121: Algebra And Trigonometry"):
+    return [
+        PastQuestionRecord(
+            title=title,
+            year="2019",
+            semester="First Semester",
+            link=f"https://balme.ug.edu.gh/past.exampapers/index.php?p=show_detail&id={number}",
+        )
+        for number in range(count)
+    ]
+
+
+@pytest.mark.unit
+def test_format_past_question_list_unit():
+    """Test if records are numbered and listed like past_question_list_to_string."""
+    assert format_past_question_list(make_records(2)) == [
+        "1. MATH 121: Algebra And Trigonometry, 2019, First Semester\n\n"
+        "2. MATH 121: Algebra And Trigonometry, 2019, First Semester"
+    ]
+    assert format_past_question_list([]) == []
+
+
+@pytest.mark.unit
+def test_format_splits_long_lists_unit():
+    """Test if long lists are split between records into messages Telegram accepts."""
+    messages = format_past_question_list(make_records(200))
+
+    assert len(messages) > 1
+    assert all(len(message) <= TELEGRAM_MESSAGE_LIMIT for message in messages)
+    lines = "\n\n".join(messages).split("\n\n")
+    assert len(lines) == 200
+    assert lines[-1].startswith("200. ")
+
+
+@pytest.mark.unit
+def test_format_truncates_huge_records_unit():
+    """Test if a record longer than a message is cut to fit."""
+    messages = format_past_question_list(make_records(2, title="A" * 5000), start=5)
+
+    assert len(messages) == 2
+    assert messages[0].startswith("5. AAA")
+    assert messages[1].startswith("6. AAA")
+    assert all(len(message) == TELEGRAM_MESSAGE_LIMIT for message in messages)
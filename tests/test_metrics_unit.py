@@ -0,0 +1,125 @@
+"""Metrics Unit Tests."""
+import threading
+import urllib.request
+
+import pytest
+
+from metrics import REGISTRY, MetricsRegistry, start_metrics_server, timed
+from search_cache import SearchCache
+
+
+@pytest.mark.unit
+def test_timed_records_latency_unit():
+    """Test if timed records each call of a decorated function in a histogram."""
+    registry = MetricsRegistry()
+
+    @timed("search", registry)
+    def search():
+        return "done"
+
+    assert search() == "done"
+    assert search() == "done"
+    histogram = registry.histogram("search_seconds")
+    assert histogram.count == 2
+    assert histogram.counts[0] == 2
+
+
+@pytest.mark.unit
+def test_timed_counts_errors_unit():
+    """Test if timed counts the exceptions raised in the timed block and lets them through."""
+    registry = MetricsRegistry()
+
+    with pytest.raises(ValueError):
+        with timed("download", registry):
+            raise ValueError("No pdf")
+
+    assert registry.histogram("download_seconds").count == 1
+    assert registry.counter("download_errors_total").value == 1
+
+
+@pytest.mark.unit
+def test_timed_concurrent_calls_unit():
+    """Test if concurrent calls of a decorated function are each recorded."""
+    registry = MetricsRegistry()
+    started = threading.Barrier(4)
+
+    @timed("login", registry)
+    def login():
+        started.wait()
+
+    threads = [threading.Thread(target=login) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert registry.histogram("login_seconds").count == 4
+
+
+@pytest.mark.unit
+def test_render_prometheus_unit():
+    """Test if the registry renders counters, gauges and histograms in the Prometheus text format."""
+    registry = MetricsRegistry()
+    registry.counter("pdf_cache_hits_total", "Files served from the cache.").inc(3)
+    registry.gauge("session_pool_occupancy").set(2)
+    registry.histogram("upload_seconds", buckets=(1, 5)).observe(2)
+
+    text = registry.render()
+
+    assert "# HELP pasco_pdf_cache_hits_total Files served from the cache." in text
+    assert "# TYPE pasco_pdf_cache_hits_total counter" in text
+    assert "pasco_pdf_cache_hits_total 3" in text
+    assert "pasco_session_pool_occupancy 2" in text
+    assert 'pasco_upload_seconds_bucket{le="1.0"} 0' in text
+    assert 'pasco_upload_seconds_bucket{le="5.0"} 1' in text
+    assert 'pasco_upload_seconds_bucket{le="+Inf"} 1' in text
+    assert "pasco_upload_seconds_count 1" in text
+
+
+@pytest.mark.unit
+def test_listener_receives_updates_unit():
+    """Test if listeners get the statsd type, name and value of every update."""
+    registry = MetricsRegistry()
+    updates = []
+    registry.add_listener(lambda *update: updates.append(update))
+    registry.add_listener(lambda *update: 1 / 0)
+
+    registry.counter("search_cache_hits_total").inc()
+    registry.histogram("search_seconds").observe(0.25)
+
+    assert updates == [
+        ("c", "pasco_search_cache_hits_total", 1),
+        ("ms", "pasco_search_seconds", 250),
+    ]
+
+
+@pytest.mark.unit
+def test_metrics_server_unit():
+    """Test if the metrics server serves the registry at /metrics."""
+    registry = MetricsRegistry()
+    registry.counter("search_cache_misses_total").inc()
+    server = start_metrics_server(0, registry=registry)
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/metrics"
+        with urllib.request.urlopen(url) as response:
+            body = response.read().decode()
+    finally:
+        server.shutdown()
+
+    assert "pasco_search_cache_misses_total 1" in body
+
+
+@pytest.mark.unit
+def test_search_cache_counts_hits_unit():
+    """Test if the search cache reports its hits and misses to the default registry."""
+    hits = REGISTRY.counter("search_cache_hits_total")
+    misses = REGISTRY.counter("search_cache_misses_total")
+    hits_before, misses_before = hits.value, misses.value
+    search_cache = SearchCache()
+
+    search_cache.get("MATH 121")
+    search_cache.set("MATH 121", ["record"])
+    search_cache.get("math121")
+
+    assert misses.value == misses_before + 1
+    assert hits.value == hits_before + 1
@@ -0,0 +1,100 @@
+"""Page Parser Unit Tests."""
+import pytest
+from helpers import read_fixture
+
+from page_parser import (
+    get_page_url,
+    parse_next_page_url,
+    parse_page_count,
+    parse_past_question_records,
+)
+from records import PastQuestionRecord
+
+RESULTS_PAGE = """<html><body>
+<div id="header"><a class="titleField" href="/not-a-result">Header link</a></div>
+<div class="item biblioRecord">
+    <a href="/past.exampapers/index.php?p=show_detail&amp;id=9731" class="titleField">MATH 121: Algebra</a>
+    <div class="customField isbnField">2019</div>
+    <div class="customField collationField">First Semester</div>
+</div>
+<div class="item biblioRecord">
+    <a href="/past.exampapers/index.php?p=show_detail&amp;id=9732" class="titleField">MATH 122: Calculus</a>
+    <div class="customField isbnField">2020</div>
+</div>
+</body></html>"""
+
+
+@pytest.mark.parametrize(
+    "page_content,expected_values",
+    [
+        ("", []),
+        (
+            RESULTS_PAGE,
+            [
+                PastQuestionRecord(
+                    title="MATH 121: Algebra",
+                    year="2019",
+                    semester="First Semester",
+                    link="https://balme.ug.edu.gh/past.exampapers/index.php?p=show_detail&id=9731",
+                ),
+                PastQuestionRecord(
+                    title="MATH 122: Calculus",
+                    year="2020",
+                    semester="",
+                    link="https://balme.ug.edu.gh/past.exampapers/index.php?p=show_detail&id=9732",
+                ),
+            ],
+        ),
+    ],
+)
+@pytest.mark.unit
+def test_parse_past_question_records_unit(page_content, expected_values):
+    """Test if titles, years, semesters and links are extracted together from the result divs only."""
+    assert parse_past_question_records(page_content) == expected_values
+
+
+@pytest.mark.parametrize(
+    "fixture,expected_value",
+    [
+        (
+            "catalogue_page_1.html",
+            "https://balme.ug.edu.gh/past.exampapers/index.php?keywords=&search=search&page=2",
+        ),
+        ("catalogue_page_2.html", None),
+    ],
+)
+@pytest.mark.unit
+def test_parse_next_page_url_unit(fixture, expected_value):
+    """Test if the next page link is found, and None is returned on the last page."""
+    page_url = "https://balme.ug.edu.gh/past.exampapers/index.php?keywords=&search=search"
+    assert parse_next_page_url(read_fixture(fixture), page_url) == expected_value
+
+
+@pytest.mark.parametrize(
+    "fixture,expected_value",
+    [("catalogue_page_1.html", 2), ("catalogue_page_2.html", 1)],
+)
+@pytest.mark.unit
+def test_parse_page_count_unit(fixture, expected_value):
+    """Test if the number of pages is read from the paging links."""
+    assert parse_page_count(read_fixture(fixture)) == expected_value
+
+
+@pytest.mark.unit
+def test_parse_page_count_ignores_links_outside_paging_unit():
+    """Test if page links outside the paging list don't count as pages."""
+    content = (
+        '<a href="index.php?keywords=&amp;page=9">Popular</a>'
+        '<div class="biblioPaging"><span class="pagingList"><b>1</b>'
+        '<a href="index.php?keywords=&amp;page=3">3</a></span></div>'
+    )
+    assert parse_page_count(content) == 3
+
+
+@pytest.mark.unit
+def test_get_page_url_unit():
+    """Test if the page parameter is replaced and the other parameters are kept."""
+    page_url = "https://balme.ug.edu.gh/past.exampapers/index.php?keywords=%22math%22&search=search&page=1"
+    assert get_page_url(page_url, 3) == (
+        "https://balme.ug.edu.gh/past.exampapers/index.php?keywords=%22math%22&search=search&page=3"
+    )
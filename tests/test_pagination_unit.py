@@ -0,0 +1,111 @@
+"""Pagination Unit Tests."""
+import threading
+import time
+
+import pytest
+
+from pagination import iter_result_pages
+
+FIRST_URL = "https://balme.ug.edu.gh/past.exampapers/index.php?keywords=math&search=search"
+
+
+def first_page(page_count):
+    links = "".join(
+        f'<a href="index.php?keywords=math&amp;search=search&amp;page={page}">{page}</a>'
+        for page in range(2, page_count + 1)
+    )
+    return f'<span class="pagingList"><b>1</b>{links}</span>'
+
+
+@pytest.mark.unit
+def test_single_page_is_not_fetched_again_unit():
+    """Test if nothing is fetched when the results fit on one page."""
+    fetched = []
+    pages = list(iter_result_pages(FIRST_URL, "<p>page 1</p>", fetched.append))
+    assert pages == ["<p>page 1</p>"]
+    assert fetched == []
+
+
+@pytest.mark.unit
+def test_pages_are_fetched_concurrently_in_order_unit():
+    """Test if the remaining pages are fetched at once and yielded in page order."""
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def fetch(url):
+        with lock:
+            active.append(url)
+            peak.append(len(active))
+        # Later pages answer first to check the order is kept.
+        time.sleep(0.05 if url.endswith("page=2") else 0.01)
+        with lock:
+            active.remove(url)
+        return url.rsplit("=", 1)[1]
+
+    start = time.monotonic()
+    pages = list(iter_result_pages(FIRST_URL, first_page(5), fetch, max_workers=4))
+    elapsed = time.monotonic() - start
+    assert pages[1:] == ["2", "3", "4", "5"]
+    assert max(peak) == 4
+    assert elapsed < 0.15
+
+
+@pytest.mark.unit
+def test_first_page_is_yielded_before_the_rest_arrive_unit():
+    """Test if the first page is available without waiting for the other pages."""
+    release = threading.Event()
+
+    def fetch(url):
+        release.wait(1)
+        return url
+
+    pages = iter_result_pages(FIRST_URL, first_page(3), fetch)
+    assert next(pages) == first_page(3)
+    release.set()
+    assert len(list(pages)) == 2
+
+
+@pytest.mark.unit
+def test_other_pages_load_while_first_is_read_unit():
+    """Test if the other pages are requested before the caller is done with the first page."""
+    requested = threading.Event()
+
+    def fetch(url):
+        requested.set()
+        return url
+
+    pages = iter_result_pages(FIRST_URL, first_page(3), fetch)
+    next(pages)
+    assert requested.wait(0.5)
+    assert len(list(pages)) == 2
+
+
+@pytest.mark.unit
+def test_failed_page_is_skipped_unit():
+    """Test if a page that fails to load doesn't lose the other pages."""
+
+    def fetch(url):
+        if url.endswith("page=2"):
+            raise ConnectionError(url)
+        return url.rsplit("=", 1)[1]
+
+    pages = list(iter_result_pages(FIRST_URL, first_page(3), fetch))
+    assert pages[1:] == ["3"]
+
+
+@pytest.mark.unit
+def test_results_over_max_pages_are_truncated_with_warning_unit(caplog):
+    """Test if only max_pages are read and the truncation is logged."""
+    fetched = []
+
+    def fetch(url):
+        fetched.append(url)
+        return url
+
+    with caplog.at_level("WARNING", logger="pagination"):
+        pages = list(iter_result_pages(FIRST_URL, first_page(30), fetch, max_pages=20))
+
+    assert len(pages) == 20
+    assert len(fetched) == 19
+    assert "Only reading 20 of the 30 pages" in caplog.text
@@ -0,0 +1,99 @@
+"""Pdf Cache Unit Tests."""
+import os
+import time
+
+import pytest
+
+from pdf_cache import PdfCache
+
+
+def write_pdf(directory, name, content):
+    path = os.path.join(directory, name)
+    with open(path, "wb") as file:
+        file.write(content)
+    return path
+
+
+@pytest.fixture
+def downloads(tmp_path):
+    directory = tmp_path / "downloads"
+    directory.mkdir()
+    return str(directory)
+
+
+@pytest.mark.unit
+def test_put_then_get_returns_cached_file_unit(tmp_path, downloads):
+    """Test if a cached file is returned on a hit and None on a miss."""
+    cache = PdfCache(str(tmp_path / "cache"))
+    cached_file = cache.put("9731", write_pdf(downloads, "a.pdf", b"%PDF math"))
+    assert cache.get("9731") == cached_file
+    assert cache.get("1") is None
+    assert cache.get(None) is None
+    assert os.listdir(downloads) == []
+
+
+@pytest.mark.unit
+def test_same_content_is_stored_once_unit(tmp_path, downloads):
+    """Test if two records with the same file share a single copy."""
+    cache = PdfCache(str(tmp_path / "cache"))
+    first = cache.put("1", write_pdf(downloads, "a.pdf", b"%PDF same"))
+    second = cache.put("2", write_pdf(downloads, "b.pdf", b"%PDF same"))
+    assert first == second
+    assert cache.size == len(b"%PDF same")
+
+
+@pytest.mark.unit
+def test_index_survives_restart_unit(tmp_path, downloads):
+    """Test if a new cache on the same directory finds earlier files."""
+    cached_file = PdfCache(str(tmp_path / "cache")).put(
+        "9731", write_pdf(downloads, "a.pdf", b"%PDF math")
+    )
+    assert PdfCache(str(tmp_path / "cache")).get("9731") == cached_file
+
+
+@pytest.mark.unit
+def test_corrupted_file_is_a_miss_unit(tmp_path, downloads):
+    """Test if a file that changed on disk is dropped from the cache."""
+    cache = PdfCache(str(tmp_path / "cache"))
+    cached_file = cache.put("9731", write_pdf(downloads, "a.pdf", b"%PDF math"))
+    with open(cached_file, "wb") as file:
+        file.write(b"%PDF matx")
+    assert cache.get("9731", verify=True) is None
+    assert not os.path.exists(cached_file)
+
+
+@pytest.mark.unit
+def test_least_recently_used_file_is_evicted_unit(tmp_path, downloads):
+    """Test if the least recently used file is evicted once the cache is full."""
+    cache = PdfCache(str(tmp_path / "cache"), max_bytes=25)
+    cache.put("1", write_pdf(downloads, "a.pdf", b"%PDF 111111"))
+    time.sleep(0.01)
+    cache.put("2", write_pdf(downloads, "b.pdf", b"%PDF 222222"))
+    time.sleep(0.01)
+    cache.get("1")
+    time.sleep(0.01)
+    cache.put("3", write_pdf(downloads, "c.pdf", b"%PDF 333333"))
+    assert cache.get("2") is None
+    assert cache.get("1") is not None
+    assert cache.get("3") is not None
+
+
+@pytest.mark.unit
+def test_hit_doesnt_rewrite_index_unit(tmp_path, downloads, monkeypatch):
+    """Test if a hit keeps its access time in memory until the cache is flushed."""
+    cache = PdfCache(str(tmp_path / "cache"))
+    cache.put("9731", write_pdf(downloads, "a.pdf", b"%PDF math"))
+    saves = []
+    save_index = cache._save_index
+    monkeypatch.setattr(cache, "_save_index", lambda: saves.append(1) or save_index())
+
+    for _ in range(3):
+        assert cache.get("9731") is not None
+    assert saves == []
+
+    last_access = cache._index["9731"]["last_access"]
+    cache.flush()
+    cache.flush()
+    assert saves == [1]
+    assert PdfCache(str(tmp_path / "cache"))._index["9731"]["last_access"] == last_access
+    assert not any(name.endswith(".tmp") for name in os.listdir(tmp_path / "cache"))
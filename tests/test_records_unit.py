@@ -0,0 +1,93 @@
+"""Records Unit Tests."""
+import dataclasses
+
+import pytest
+
+from records import PastQuestionRecord, filter_records, get_course_code, get_record_id
+
+LINK = "https://balme.ug.edu.gh/past.exampapers/index.php?p=show_detail&id=9731&keywords="
+
+
+def make_record(year="2019", semester="First Semester", title="MATH 121: Algebra"):
+    return PastQuestionRecord(title=title, year=year, semester=semester, link=LINK)
+
+
+@pytest.mark.unit
+def test_record_derives_id_and_course_code_unit():
+    """Test if a record reads its id from the link and its course code from the title."""
+    record = make_record(title="Math121 - Algebra And Trigonometry")
+
+    assert record.record_id == "9731"
+    assert record.course_code == "MATH 121"
+
+
+@pytest.mark.unit
+def test_record_is_compact_unit():
+    """Test if records use slots instead of a dictionary per instance."""
+    record = make_record()
+
+    assert not hasattr(record, "__dict__")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        record.year = "2020"
+
+
+@pytest.mark.unit
+def test_record_round_trip_unit():
+    """Test if a record rebuilt from its fields is equal to the original."""
+    record = make_record()
+
+    assert PastQuestionRecord(**dataclasses.asdict(record)) == record
+    assert PastQuestionRecord("MATH 121: Algebra", "2019", "First Semester", LINK) == record
+
+
+@pytest.mark.unit
+def test_filter_records_unit():
+    """Test if records are filtered by year and semester and sorted newest first."""
+    records = [
+        make_record("2017", "Second Semester"),
+        make_record("2019", "First Semester"),
+        make_record("2018", "first semester"),
+        make_record("2019", "Second Semester"),
+    ]
+
+    assert [record.year for record in filter_records(records)] == [
+        "2019",
+        "2019",
+        "2018",
+        "2017",
+    ]
+    assert filter_records(records, year="2019", semester="second") == [records[3]]
+    assert [record.year for record in filter_records(records, semester="FIRST")] == [
+        "2019",
+        "2018",
+    ]
+
+
+@pytest.mark.parametrize(
+    "link,expected_value",
+    [
+        (
+            "https://balme.ug.edu.gh/past.exampapers/index.php?p=show_detail&id=9731&keywords=%22math+121%22",
+            "9731",
+        ),
+        ("https://balme.ug.edu.gh/past.exampapers/index.php", None),
+    ],
+)
+@pytest.mark.unit
+def test_get_record_id_unit(link, expected_value):
+    """Test if the record id is read from a detail link."""
+    assert get_record_id(link) == expected_value
+
+
+@pytest.mark.parametrize(
+    "title,expected_value",
+    [
+        ("MATH 121: Algebra And Trigonometry", "MATH 121"),
+        ("ugrc150 Critical Thinking", "UGRC 150"),
+        ("Introduction to Algebra", None),
+    ],
+)
+@pytest.mark.unit
+def test_get_course_code_unit(title, expected_value):
+    """Test if the course code is read from a title."""
+    assert get_course_code(title) == expected_value
@@ -47,7 +47,10 @@ def test_get_links_of_past_questions_unit(page_content, expected_values, monkeyp
     mock_content = page_content
 
     monkeypatch.setattr(
-        "requests.get", lambda url: type("", (), {"content": mock_content})
+        "requests.get",
+        lambda url, **kwargs: type(
+            "", (), {"content": mock_content, "raise_for_status": staticmethod(lambda: None)}
+        ),
     )
     monkeypatch.setattr("bs4.BeautifulSoup", BeautifulSoup)
 
@@ -84,7 +87,10 @@ def test_get_list_of_past_questions_unit(page_content, expected_values, monkeypa
     mock_content = page_content
 
     monkeypatch.setattr(
-        "requests.get", lambda url: type("", (), {"content": mock_content})
+        "requests.get",
+        lambda url, **kwargs: type(
+            "", (), {"content": mock_content, "raise_for_status": staticmethod(lambda: None)}
+        ),
     )
     monkeypatch.setattr("bs4.BeautifulSoup", BeautifulSoup)
 
@@ -0,0 +1,95 @@
+"""Search Cache Unit Tests."""
+import pytest
+
+from records import PastQuestionRecord
+from search_cache import MemoryBackend, SearchCache, SqliteBackend, normalise_query
+
+RECORDS = [
+    PastQuestionRecord(
+        title="MATH 121: Algebra",
+        year="2019",
+        semester="First Semester",
+        link="https://balme.ug.edu.gh/past.exampapers/index.php?p=show_detail&id=9731",
+    )
+]
+
+
+@pytest.mark.parametrize(
+    "query,expected_value",
+    [
+        ("Math 121", "MATH 121"),
+        ("MATH121", "MATH 121"),
+        ("math 121 ", "MATH 121"),
+        ("  math   -121", "MATH 121"),
+        ("ugrc 150a", "UGRC 150A"),
+        ("Introduction to   Algebra", "INTRODUCTION TO ALGEBRA"),
+    ],
+)
+@pytest.mark.unit
+def test_normalise_query_unit(query, expected_value):
+    """Test if variants of the same course code normalise to one key."""
+    assert normalise_query(query) == expected_value
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+@pytest.mark.unit
+def test_repeat_query_is_served_from_cache_unit(backend, tmp_path):
+    """Test if a repeat query, typed differently, doesn't search again."""
+    if backend == "memory":
+        cache = SearchCache(MemoryBackend())
+    else:
+        cache = SearchCache(SqliteBackend(str(tmp_path / "cache.sqlite3")))
+    searched = []
+
+    def search(query):
+        searched.append(query)
+        return RECORDS
+
+    assert cache.get_or_search("Math 121", search) == RECORDS
+    assert cache.get_or_search("math121 ", search) == RECORDS
+    assert searched == ["MATH 121"]
+    assert cache.stats == {"hits": 1, "misses": 1}
+
+
+@pytest.mark.unit
+def test_expired_results_are_a_miss_unit():
+    """Test if results older than the ttl are searched again."""
+    cache = SearchCache(ttl=-1)
+    cache.set("MATH 121", RECORDS)
+    assert cache.get("MATH 121") is None
+    assert cache.stats == {"hits": 0, "misses": 1}
+
+
+@pytest.mark.unit
+def test_empty_results_are_not_cached_unit():
+    """Test if a failed search isn't cached."""
+    cache = SearchCache()
+    cache.set("MATH 121", [])
+    assert cache.get("MATH 121") is None
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+@pytest.mark.unit
+def test_backend_is_bounded_unit(backend, tmp_path):
+    """Test if the least recently used query is dropped once the backend is full."""
+    if backend == "memory":
+        store = MemoryBackend(max_entries=2)
+    else:
+        store = SqliteBackend(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    cache = SearchCache(store)
+    cache.set("MATH 121", RECORDS)
+    cache.set("MATH 122", RECORDS)
+    cache.get("MATH 121")
+    cache.set("MATH 123", RECORDS)
+    assert cache.get("MATH 122") is None
+    assert cache.get("MATH 121") == RECORDS
+
+
+@pytest.mark.unit
+def test_expired_results_are_served_when_search_fails_unit():
+    """Test if expired results are returned when the website can't be searched."""
+    cache = SearchCache(ttl=-1)
+    cache.set("MATH 121", RECORDS)
+
+    assert cache.get_or_search("math 121", lambda query: []) == RECORDS
+    assert cache.get_or_search("MATH 122", lambda query: []) == []
@@ -0,0 +1,178 @@
+"""Service Unit Tests."""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from service import PastQuestionService, UserBusyError
+
+
+def slow_search(query):
+    time.sleep(0.1)
+    return [query]
+
+
+@pytest.mark.unit
+def test_event_loop_stays_responsive_unit():
+    """Test if the loop keeps running while a blocking search is in progress."""
+
+    async def run():
+        service = PastQuestionService(slow_search, lambda link: None)
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker = asyncio.create_task(tick())
+        assert await service.search(1, "MATH 121") == ["MATH 121"]
+        ticker.cancel()
+        service.shutdown()
+        return ticks
+
+    assert asyncio.run(run()) >= 5
+
+
+@pytest.mark.unit
+def test_chats_run_in_parallel_and_each_chat_in_order_unit():
+    """Test if different chats overlap while one chat's requests keep their order."""
+    order = []
+    lock = threading.Lock()
+
+    def search(query):
+        time.sleep(0.1)
+        with lock:
+            order.append(query)
+        return [query]
+
+    async def run():
+        service = PastQuestionService(search, lambda link: None, max_workers=4)
+        start = time.monotonic()
+        results = await asyncio.gather(
+            service.search(1, "first"),
+            service.search(1, "second"),
+            service.search(2, "other"),
+            service.search(3, "another"),
+        )
+        service.shutdown()
+        return results, time.monotonic() - start
+
+    results, elapsed = asyncio.run(run())
+    assert results == [["first"], ["second"], ["other"], ["another"]]
+    assert order.index("first") < order.index("second")
+    assert elapsed < 0.3
+
+
+@pytest.mark.unit
+def test_request_times_out_unit():
+    """Test if a request longer than the timeout raises TimeoutError."""
+
+    async def run():
+        service = PastQuestionService(slow_search, lambda link: None, timeout=0.01)
+        try:
+            await service.search(1, "MATH 121")
+        finally:
+            service.shutdown()
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(run())
+
+
+@pytest.mark.unit
+def test_cancel_stops_waiting_requests_unit():
+    """Test if cancelling a chat cancels its running and queued requests."""
+
+    async def run():
+        service = PastQuestionService(slow_search, lambda link: None)
+        running = asyncio.ensure_future(service.search(1, "first"))
+        queued = asyncio.ensure_future(service.search(1, "second"))
+        await asyncio.sleep(0.01)
+        assert service.cancel(1) == 2
+        results = await asyncio.gather(running, queued, return_exceptions=True)
+        service.shutdown()
+        return results
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
+
+
+@pytest.mark.unit
+def test_too_many_waiting_requests_are_rejected_unit():
+    """Test if a chat can't queue more than max_pending requests."""
+
+    async def run():
+        service = PastQuestionService(slow_search, lambda link: None, max_pending=1)
+        first = asyncio.ensure_future(service.search(1, "first"))
+        await asyncio.sleep(0.01)
+        second = asyncio.ensure_future(service.search(1, "second"))
+        await asyncio.sleep(0)
+        with pytest.raises(UserBusyError):
+            await service.search(1, "third")
+        await asyncio.gather(first, second)
+        service.shutdown()
+
+    asyncio.run(run())
+
+
+@pytest.mark.unit
+def test_identical_requests_share_one_run_unit():
+    """Test if chats asking for the same query or record at once share a single search and download."""
+    calls = []
+    lock = threading.Lock()
+
+    def record(name, value):
+        time.sleep(0.1)
+        with lock:
+            calls.append(name)
+        return value
+
+    link = "https://balme.ug.edu.gh/past.exampapers/index.php?p=show_detail&id=9731"
+
+    async def run():
+        service = PastQuestionService(
+            lambda query: record("search", [query]),
+            lambda link: record("download", "past_question.pdf"),
+        )
+        try:
+            queries = ["MATH 121", "math121", "Math 121 "]
+            searches = await asyncio.gather(
+                *(service.search(chat_id, query) for chat_id, query in enumerate(queries))
+            )
+            downloads = await asyncio.gather(
+                *(service.download(chat_id, link) for chat_id in range(3))
+            )
+            await service.search(1, "MATH 121")
+        finally:
+            service.shutdown()
+        return searches, downloads
+
+    searches, downloads = asyncio.run(run())
+    assert searches == [["MATH 121"]] * 3
+    assert downloads == ["past_question.pdf"] * 3
+    assert calls == ["search", "download", "search"]
+
+
+@pytest.mark.unit
+def test_shared_failure_reaches_every_waiter_unit():
+    """Test if an error in a shared search is raised to every chat waiting on it."""
+
+    def failing_search(query):
+        time.sleep(0.05)
+        raise ValueError("The website is down.")
+
+    async def run():
+        service = PastQuestionService(failing_search, lambda link: None)
+        try:
+            return await asyncio.gather(
+                service.search(1, "MATH 121"),
+                service.search(2, "MATH 121"),
+                return_exceptions=True,
+            )
+        finally:
+            service.shutdown()
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
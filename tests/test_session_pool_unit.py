@@ -0,0 +1,176 @@
+"""Session Pool Unit Tests."""
+import threading
+import time
+
+import pytest
+
+from session_pool import SessionPool
+
+
+class FakeSession:
+    """Stands in for a logged in Functions instance."""
+
+    def __init__(self, healthy=True):
+        self.logged_in = True
+        self.healthy = healthy
+        self.logins = 0
+        self.closed = False
+
+    def login(self):
+        self.logins += 1
+        self.logged_in = self.healthy
+        return self.logged_in
+
+    def is_logged_in(self):
+        return self.healthy
+
+    def quit(self):
+        self.closed = True
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.mark.unit
+def test_start_warms_up_every_session_unit():
+    """Test if starting the pool creates the configured number of sessions."""
+    pool = SessionPool(size=3, factory=FakeSession)
+    pool.start()
+    assert len(pool._idle) == 3
+    assert pool.occupancy == 0
+    pool.close()
+
+
+@pytest.mark.unit
+def test_lease_returns_session_to_pool_unit():
+    """Test if a leased session becomes idle again once released."""
+    pool = SessionPool(size=1, factory=FakeSession)
+    pool.start()
+    with pool.lease() as session:
+        assert pool.occupancy == 1
+    assert wait_for(lambda: pool.occupancy == 0)
+    with pool.lease(timeout=1) as same_session:
+        assert same_session is session
+    pool.close()
+
+
+@pytest.mark.unit
+def test_acquire_times_out_when_pool_is_busy_unit():
+    """Test if acquire raises once every session is leased out."""
+    pool = SessionPool(size=1, factory=FakeSession)
+    session = pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.05)
+    pool.release(session)
+    pool.close()
+
+
+@pytest.mark.unit
+def test_concurrent_leases_are_served_in_parallel_unit():
+    """Test if concurrent users never get the same session at the same time."""
+    pool = SessionPool(size=2, factory=FakeSession)
+    pool.start()
+    in_use = []
+    errors = []
+    lock = threading.Lock()
+
+    def work():
+        with pool.lease(timeout=2) as session:
+            with lock:
+                if session in in_use:
+                    errors.append(session)
+                in_use.append(session)
+            time.sleep(0.02)
+            with lock:
+                in_use.remove(session)
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    pool.close()
+
+
+@pytest.mark.unit
+def test_release_doesnt_wait_for_health_check_unit():
+    """Test if released sessions are leased again straight away, without a page load per release."""
+    checks = []
+
+    class SlowSession(FakeSession):
+        def is_logged_in(self):
+            checks.append(self)
+            time.sleep(0.5)
+            return True
+
+    pool = SessionPool(size=4, factory=SlowSession)
+    pool.start()
+
+    def work():
+        for _ in range(3):
+            with pool.lease(timeout=2):
+                time.sleep(0.01)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert time.monotonic() - start < 0.5
+    assert checks == []
+    assert pool.occupancy == 0
+    pool.close()
+
+
+@pytest.mark.unit
+def test_failed_lease_is_logged_back_in_unit():
+    """Test if a session whose lease failed is checked and logged in again before reuse."""
+    pool = SessionPool(size=1, factory=FakeSession)
+    pool.start()
+    with pytest.raises(RuntimeError):
+        with pool.lease() as session:
+            session.healthy = False
+            session.login = lambda: True
+            raise RuntimeError("The page didn't load.")
+    assert wait_for(lambda: pool.occupancy == 0)
+    assert pool.acquire(timeout=1) is session
+    pool.close()
+
+
+@pytest.mark.unit
+def test_idle_sweep_logs_expired_session_back_in_unit():
+    """Test if the periodic sweep logs in an idle session that lost its login."""
+    logins = []
+    pool = SessionPool(size=1, factory=FakeSession)
+    pool.start()
+    session = pool.acquire()
+    pool.release(session)
+    session.healthy = False
+    session.login = lambda: logins.append(session) or True
+
+    pool._check_idle_sessions()
+
+    assert logins == [session]
+    assert pool.acquire(timeout=1) is session
+    pool.close()
+
+
+@pytest.mark.unit
+def test_session_is_replaced_after_max_uses_unit():
+    """Test if a session is closed and replaced once it reaches its maximum uses."""
+    pool = SessionPool(size=1, factory=FakeSession, max_uses=1)
+    pool.start()
+    with pool.lease() as session:
+        pass
+    assert wait_for(lambda: session.closed)
+    with pool.lease(timeout=1) as replacement:
+        assert replacement is not session
+    pool.close()
@@ -0,0 +1,56 @@
+"""Stats Unit Tests."""
+import logging
+
+import pytest
+
+from stats import parse_event, record_event
+
+
+@pytest.fixture
+def stats_lines(monkeypatch):
+    lines = []
+
+    class ListHandler(logging.Handler):
+        def emit(self, record):
+            lines.append(self.format(record))
+
+    handler = ListHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(message)s"))
+    file_logger = logging.getLogger("fileLogger")
+    monkeypatch.setattr(file_logger, "handlers", [handler])
+    monkeypatch.setattr(file_logger, "level", logging.INFO)
+    monkeypatch.setattr(file_logger, "disabled", False)
+    return lines
+
+
+@pytest.mark.unit
+def test_event_is_read_back_unit(stats_lines):
+    """Test if an event written to the stats file is parsed back with its fields."""
+    assert record_event("request", query="MATH 121")
+
+    requested_at, event = parse_event(stats_lines[0])
+    assert event == {"event": "request", "query": "MATH 121", "sample_rate": 1.0}
+    assert requested_at.year >= 2024
+
+
+@pytest.mark.unit
+def test_events_are_sampled_unit(stats_lines):
+    """Test if only about sample_rate of the events are written."""
+    written = sum(record_event("request", sample_rate=0.1, query="MATH 121") for _ in range(2000))
+
+    assert 100 < written < 300
+    assert len(stats_lines) == written
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "2024-01-01 10:00:00,000 - User has requested for MATH 121 past question.",
+        "2024-01-01 10:00:00,000 - {not json}",
+        "",
+    ],
+)
+@pytest.mark.unit
+def test_other_lines_are_not_events_unit(line):
+    """Test if free text and malformed lines aren't read as events."""
+    assert parse_event(line) is None
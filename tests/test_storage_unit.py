@@ -0,0 +1,139 @@
+"""Storage Unit Tests."""
+import io
+import os
+import threading
+
+import pytest
+
+from pdf_cache import PdfCache, storage_key
+from storage import LocalStorage, S3Storage, Storage
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalStorage(str(tmp_path / "storage"))
+
+
+@pytest.mark.unit
+def test_local_storage_round_trip_unit(storage, tmp_path):
+    """Test if a streamed upload can be downloaded, read by range and linked to."""
+    storage.upload_fileobj("past_questions/9731.pdf", io.BytesIO(b"%PDF-1.4 math"))
+    assert storage.exists("past_questions/9731.pdf")
+    assert not storage.exists("past_questions/1.pdf")
+    assert storage.read_range("past_questions/9731.pdf", 1, 3) == b"PDF"
+    assert storage.url("past_questions/9731.pdf").startswith("file://")
+    assert storage.download_file("past_questions/9731.pdf", str(tmp_path / "copy.pdf"))
+    assert (tmp_path / "copy.pdf").read_bytes() == b"%PDF-1.4 math"
+    assert not storage.download_file("past_questions/1.pdf", str(tmp_path / "none.pdf"))
+
+
+@pytest.mark.unit
+def test_local_storage_rejects_keys_outside_root_unit(storage):
+    """Test if a key can't escape the storage folder."""
+    with pytest.raises(ValueError):
+        storage.exists("../secrets")
+
+
+@pytest.mark.unit
+def test_incomplete_backend_cant_be_created_unit():
+    """Test if a backend missing part of the interface fails when created rather than when used."""
+
+    class ExistsOnly(Storage):
+        def exists(self, key):
+            return False
+
+    with pytest.raises(TypeError):
+        ExistsOnly()
+
+
+@pytest.mark.unit
+def test_concurrent_uploads_of_one_key_unit(storage):
+    """Test if uploads of the same key from several threads each write their own partial file."""
+
+    class SlowReader(io.BytesIO):
+        def read(self, size=-1):
+            barrier.wait()
+            return super().read(size)
+
+    barrier = threading.Barrier(2, timeout=2)
+    errors = []
+
+    def upload(content):
+        try:
+            storage.upload_fileobj("past_questions/9731.pdf", SlowReader(content))
+        except Exception as error:
+            errors.append(error)
+            barrier.abort()
+
+    threads = [
+        threading.Thread(target=upload, args=(content,))
+        for content in (b"%PDF-1.4 first", b"%PDF-1.4 other")
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert storage.read_range("past_questions/9731.pdf", 0, 13) in (
+        b"%PDF-1.4 first",
+        b"%PDF-1.4 other",
+    )
+    assert os.listdir(os.path.join(storage.root, "past_questions")) == ["9731.pdf"]
+
+
+@pytest.mark.unit
+def test_caches_share_one_corpus_unit(storage, tmp_path):
+    """Test if a file cached by one instance is read through by another."""
+    first = PdfCache(str(tmp_path / "first"), storage=storage)
+    second = PdfCache(str(tmp_path / "second"), storage=storage)
+    downloaded = tmp_path / "9731.pdf"
+    downloaded.write_bytes(b"%PDF math")
+
+    first.put("9731", str(downloaded))
+    assert storage.exists(storage_key("9731"))
+
+    cached_file = second.get("9731")
+    assert cached_file.startswith(str(tmp_path / "second"))
+    with open(cached_file, "rb") as file:
+        assert file.read() == b"%PDF math"
+    assert sorted(os.listdir(str(tmp_path / "second"))) == sorted(
+        [os.path.basename(cached_file), "index.json"]
+    )
+    assert second.get("1") is None
+
+
+@pytest.mark.unit
+def test_s3_storage_round_trip_unit(tmp_path):
+    """Test the S3 backend against moto's in-memory S3."""
+    boto3 = pytest.importorskip("boto3")
+    moto = pytest.importorskip("moto")
+    mock_aws = getattr(moto, "mock_aws", None) or moto.mock_s3
+
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket="past-questions")
+        storage = S3Storage("past-questions", client=client)
+        source = tmp_path / "9731.pdf"
+        source.write_bytes(b"%PDF-1.4 math")
+
+        storage.upload_file("past_questions/9731.pdf", str(source))
+        assert storage.exists("past_questions/9731.pdf")
+        assert not storage.exists("past_questions/1.pdf")
+        assert storage.read_range("past_questions/9731.pdf", 1, 3) == b"PDF"
+        assert "past_questions/9731.pdf" in storage.url("past_questions/9731.pdf")
+        assert storage.download_file("past_questions/9731.pdf", str(tmp_path / "copy.pdf"))
+        assert (tmp_path / "copy.pdf").read_bytes() == b"%PDF-1.4 math"
+
+
+@pytest.mark.unit
+def test_cache_uses_storage_from_environment_unit(tmp_path, monkeypatch):
+    """Test if a cache built without a storage uses the one configured by the environment."""
+    monkeypatch.delenv("S3_BUCKET", raising=False)
+    monkeypatch.delenv("STORAGE_DIRECTORY", raising=False)
+    assert PdfCache(str(tmp_path / "cache")).storage is None
+
+    monkeypatch.setenv("STORAGE_DIRECTORY", str(tmp_path / "shared"))
+    cache = PdfCache(str(tmp_path / "cache"))
+    assert isinstance(cache.storage, LocalStorage)
+    assert cache.storage.root == str(tmp_path / "shared")
@@ -0,0 +1,163 @@
+"""Upstream Unit Tests."""
+import time
+
+import pytest
+import requests
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
+
+from upstream import (
+    CircuitBreaker,
+    TokenBucket,
+    Upstream,
+    UpstreamUnavailableError,
+    is_transient,
+)
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(response=response)
+
+
+@pytest.mark.parametrize(
+    "error,expected_value",
+    [
+        (requests.ConnectionError(), True),
+        (requests.Timeout(), True),
+        (http_error(503), True),
+        (http_error(429), True),
+        (http_error(404), False),
+        (WebDriverException("unknown error: net::ERR_CONNECTION_REFUSED"), True),
+        (WebDriverException("unknown error: net::ERR_NAME_NOT_RESOLVED"), True),
+        (NoSuchElementException("no such element"), False),
+        (ValueError(), False),
+        (UpstreamUnavailableError(), False),
+    ],
+)
+@pytest.mark.unit
+def test_is_transient_unit(error, expected_value):
+    """Test if only timeouts, dropped connections, 429 and 5xx are retried."""
+    assert is_transient(error) is expected_value
+
+
+@pytest.mark.unit
+def test_bucket_limits_rate_unit():
+    """Test if the bucket lets a burst through then waits for new tokens."""
+    bucket = TokenBucket(rate=50, burst=2)
+    start = time.monotonic()
+    for _ in range(4):
+        assert bucket.acquire()
+    assert time.monotonic() - start >= 0.035
+    assert bucket.acquire(timeout=0) is False
+
+
+@pytest.mark.unit
+def test_bucket_adapts_rate_unit():
+    """Test if failures halve the rate down to min_rate and successes raise it back."""
+    bucket = TokenBucket(rate=10, burst=1, min_rate=2)
+    for _ in range(5):
+        bucket.slow_down()
+    assert bucket.rate == 2
+    for _ in range(20):
+        bucket.speed_up()
+    assert bucket.rate == 10
+
+
+@pytest.mark.unit
+def test_breaker_opens_and_lets_one_trial_through_unit():
+    """Test if the breaker opens at the threshold and closes after a successful trial call."""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.is_open
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert not breaker.is_open
+    assert breaker.allow()
+
+
+@pytest.mark.unit
+def test_call_retries_transient_failures_unit():
+    """Test if a transient failure is retried and the result returned."""
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise requests.ConnectionError()
+        return "page"
+
+    upstream = Upstream(retries=2, backoff=0.001)
+    assert upstream.call(flaky) == "page"
+    assert len(attempts) == 3
+
+
+@pytest.mark.unit
+def test_call_fails_fast_once_open_unit():
+    """Test if calls are refused without contacting the website while the breaker is open."""
+    attempts = []
+
+    def failing():
+        attempts.append(1)
+        raise requests.Timeout()
+
+    upstream = Upstream(breaker=CircuitBreaker(failure_threshold=2), retries=5, backoff=0.001)
+    with pytest.raises(UpstreamUnavailableError):
+        upstream.call(failing)
+    assert len(attempts) == 2
+    with pytest.raises(UpstreamUnavailableError):
+        upstream.call(failing)
+    assert len(attempts) == 2
+
+
+@pytest.mark.unit
+def test_call_doesnt_retry_other_errors_unit():
+    """Test if a 404 is raised straight away without counting against the website."""
+    attempts = []
+
+    def missing():
+        attempts.append(1)
+        raise http_error(404)
+
+    upstream = Upstream(breaker=CircuitBreaker(failure_threshold=1))
+    with pytest.raises(requests.HTTPError):
+        upstream.call(missing)
+    assert len(attempts) == 1
+    assert not upstream.breaker.is_open
+
+
+@pytest.mark.unit
+def test_browser_network_errors_open_breaker_unit():
+    """Test if a page the browser can't reach counts against the website."""
+    attempts = []
+
+    def refused():
+        attempts.append(1)
+        raise WebDriverException("unknown error: net::ERR_CONNECTION_REFUSED")
+
+    upstream = Upstream(breaker=CircuitBreaker(failure_threshold=2), retries=5, backoff=0.001)
+    with pytest.raises(UpstreamUnavailableError):
+        upstream.call(refused)
+    assert len(attempts) == 2
+    assert upstream.breaker.is_open
+
+
+@pytest.mark.unit
+def test_call_doesnt_reset_breaker_on_own_errors_unit():
+    """Test if an error unrelated to the website neither counts against it nor closes the breaker."""
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    upstream = Upstream(breaker=breaker)
+
+    def broken():
+        raise ValueError()
+
+    with pytest.raises(ValueError):
+        upstream.call(broken)
+    assert breaker.failures == 1
@@ -0,0 +1,156 @@
+"""Cache Warmer Unit Tests."""
+import logging
+from datetime import datetime, timedelta
+
+import pytest
+
+from catalogue import CatalogueIndex
+from http_scraper import HttpScraper
+from records import PastQuestionRecord
+from search_cache import SearchCache
+from warmer import CacheWarmer, count_requested_queries
+
+
+def stats_line(query, when=None):
+    when = when or datetime.now()
+    return f"{when:%Y-%m-%d %H:%M:%S},123 - User has requested for {query} past question.\n"
+
+
+@pytest.fixture
+def stats_file(tmp_path):
+    path = tmp_path / "stats_file.log"
+    path.write_text(
+        stats_line("Math 121")
+        + stats_line("MATH121")
+        + stats_line("math 121 ")
+        + stats_line("UGRC 150")
+        + stats_line("UGRC 150")
+        + stats_line("Stat 111")
+        + stats_line("ECON 101", datetime.now() - timedelta(days=90))
+        + stats_line("ECON 101", datetime.now() - timedelta(days=90))
+        + stats_line("ECON 101", datetime.now() - timedelta(days=90))
+        + stats_line("ECON 101", datetime.now() - timedelta(days=90))
+        + "2024-01-01 10:00:00,000 - https://balme.ug.edu.gh has been downloaded.\n"
+        + "\n"
+    )
+    return str(path)
+
+
+def records_for(query):
+    return [
+        PastQuestionRecord(
+            title=f"{query}: Paper {number}",
+            year="2019",
+            semester="First Semester",
+            link=f"https://balme.ug.edu.gh/index.php?p=show_detail&id={query[-3:]}{number}",
+        )
+        for number in range(3)
+    ]
+
+
+@pytest.mark.unit
+def test_count_requested_queries_unit(stats_file):
+    """Test if request lines are counted by normalised query."""
+    assert count_requested_queries(stats_file) == {
+        "MATH 121": 3,
+        "UGRC 150": 2,
+        "STAT 111": 1,
+        "ECON 101": 4,
+    }
+    assert "ECON 101" not in count_requested_queries(
+        stats_file, since=datetime.now() - timedelta(days=30)
+    )
+
+
+@pytest.mark.unit
+def test_count_request_events_in_rotated_files_unit(tmp_path):
+    """Test if json request events are counted across rotated files, scaled by their sample rate."""
+    path = tmp_path / "stats_file.log"
+    now = f"{datetime.now():%Y-%m-%d %H:%M:%S},123"
+    (tmp_path / "stats_file.log.1").write_text(
+        stats_line("MATH 121")
+        + f'{now} - {{"event": "request", "query": "Math121", "sample_rate": 0.5}}\n'
+    )
+    path.write_text(
+        f'{now} - {{"event": "request", "query": "UGRC 150", "sample_rate": 1.0}}\n'
+        + f'{now} - {{"event": "download", "link": "https://balme.ug.edu.gh", "sample_rate": 1.0}}\n'
+    )
+
+    assert count_requested_queries(str(path)) == {"MATH 121": 3, "UGRC 150": 1}
+
+
+@pytest.mark.unit
+def test_missing_stats_file_has_no_queries_unit(tmp_path):
+    """Test if a missing stats file counts nothing."""
+    assert count_requested_queries(str(tmp_path / "missing.log")) == {}
+
+
+@pytest.mark.unit
+def test_warm_fills_caches_within_budget_unit(stats_file):
+    """Test if the hottest queries are cached first and downloads stop at the budget."""
+    searched = []
+    downloaded = []
+    search_cache = SearchCache()
+
+    def search(query, record=True):
+        assert record is False
+        searched.append(query)
+        return records_for(query)
+
+    def download(link):
+        downloaded.append(link)
+        return link + ".pdf"
+
+    warmer = CacheWarmer(
+        search,
+        search_cache,
+        download=download,
+        stats_file=stats_file,
+        max_queries=2,
+        max_downloads=4,
+    )
+    assert warmer.warm() == {"queries": 2, "downloads": 4}
+    assert searched == ["MATH 121", "UGRC 150"]
+    assert search_cache.get("math121") == records_for("MATH 121")
+    assert len(downloaded) == 4
+
+
+@pytest.mark.unit
+def test_warm_doesnt_count_as_demand_unit(stats_file, monkeypatch):
+    """Test if the searches of a warm run aren't written to the stats file as requests."""
+    handler = logging.FileHandler(stats_file, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(message)s"))
+    file_logger = logging.getLogger("fileLogger")
+    monkeypatch.setattr(file_logger, "handlers", [handler])
+    monkeypatch.setattr(file_logger, "level", logging.INFO)
+    monkeypatch.setattr(file_logger, "disabled", False)
+
+    index = CatalogueIndex(":memory:")
+    for query in ("MATH 121", "UGRC 150", "STAT 111"):
+        index.upsert(records_for(query))
+    scraper = HttpScraper(index=index)
+    search_cache = SearchCache()
+    warmer = CacheWarmer(scraper.search, search_cache, stats_file=stats_file, max_queries=3)
+    ranking = count_requested_queries(stats_file)
+
+    for _ in range(3):
+        assert warmer.warm()["queries"] == 3
+    assert search_cache.get("math121") == records_for("MATH 121")
+
+    assert count_requested_queries(stats_file) == ranking
+    assert warmer.hot_queries() == ["MATH 121", "UGRC 150", "STAT 111"]
+
+    assert scraper.search("STAT 111") == records_for("STAT 111")
+    handler.close()
+    assert count_requested_queries(stats_file)["STAT 111"] == ranking["STAT 111"] + 1
+
+
+@pytest.mark.parametrize(
+    "off_peak_hours,hour,expected_value",
+    [((1, 6), 3, True), ((1, 6), 6, False), ((22, 5), 23, True), ((22, 5), 12, False)],
+)
+@pytest.mark.unit
+def test_is_off_peak_unit(off_peak_hours, hour, expected_value):
+    """Test if off-peak windows, including ones past midnight, are recognised."""
+    warmer = CacheWarmer(lambda query: [], SearchCache(), off_peak_hours=off_peak_hours)
+    assert warmer.is_off_peak(datetime(2024, 1, 1, hour)) is expected_value